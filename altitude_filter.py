@@ -0,0 +1,281 @@
+"""
+Fusion d'altitude baro / vario / GPS par filtre de Kalman incrémental.
+
+INavDrone expose deux altitudes indépendantes : altitude.estimated_alt
+(estimateur du FC, relative au home, surtout baro) et gps.alt (GPS, MSL).
+AltitudeFilter les fusionne avec le vario dans un filtre de Kalman à trois
+états :
+
+- h : altitude (m), dans le repère de estimated_alt
+- v : vitesse verticale (m/s)
+- b : écart GPS - baro (m), qui absorbe l'altitude MSL du home et la dérive
+  lente du baro
+
+Chaque échantillon est intégré dès sa réception, en O(1) (prédiction à
+accélération aléatoire puis mises à jour scalaires), sans NumPy : le filtre
+tourne dans le thread de polling d'INavDrone. Le bruit d'une mesure GPS est
+pondéré par le HDOP, et une mesure d'altitude dont l'innovation dépasse
+`gate` écarts-types est rejetée (saut de GPS, glitch baro).
+
+altitude() extrapole l'estimation jusqu'à l'instant demandé avec la vitesse
+filtrée : la valeur suit l'altitude réelle sans le retard d'une moyenne
+glissante.
+
+Exemple:
+    f = AltitudeFilter()
+    f.update_baro(t, alt_m, vario_ms)
+    f.update_gps(t, gps_alt_m, hdop)
+    print(f.altitude(), f.vertical_speed, f.std)
+
+    python altitude_filter.py vol_001.msplog     # benchmark sur un vol enregistré
+"""
+
+import argparse
+import math
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+
+class AltitudeFilter:
+    """Kalman (altitude, vitesse verticale, écart GPS-baro) mis à jour échantillon par échantillon."""
+
+    def __init__(self, accel_std: float = 2.0, baro_std: float = 0.5, vario_std: float = 0.3,
+                 gps_std: float = 2.0, bias_drift: float = 0.05, max_hdop: float = 5.0,
+                 gate: float = 5.0, max_extrapolation_s: float = 0.5):
+        """
+        Args:
+            accel_std: Accélération verticale non modélisée (m/s²), bruit de processus
+            baro_std: Bruit de estimated_alt (m)
+            vario_std: Bruit du vario (m/s)
+            gps_std: Bruit de l'altitude GPS à HDOP 1 (m), multiplié par le HDOP
+            bias_drift: Dérive de l'écart GPS-baro (m/√s)
+            max_hdop: Mesures GPS ignorées au-delà
+            gate: Rejet des innovations au-delà de gate écarts-types
+            max_extrapolation_s: Extrapolation maximale de altitude()
+        """
+        self.q_accel = accel_std ** 2
+        self.r_baro = baro_std ** 2
+        self.r_vario = vario_std ** 2
+        self.gps_std = gps_std
+        self.q_bias = bias_drift ** 2
+        self.max_hdop = max_hdop
+        self.gate = gate
+        self.max_extrapolation_s = max_extrapolation_s
+        self.rejected = 0
+        self.reset()
+
+    def reset(self):
+        self.x: List[float] = [0.0, 0.0, 0.0]       # h, v, b
+        self.P: List[List[float]] = [[0.0] * 3 for _ in range(3)]
+        self.t: Optional[float] = None              # instant de la dernière mise à jour (s, monotone)
+        self.has_baro = False
+        self.has_gps = False                        # écart GPS-baro estimé (au moins une mesure GPS)
+
+    @property
+    def ready(self) -> bool:
+        return self.t is not None
+
+    # ------------- Kalman -------------
+
+    def _init(self, t: float, h: float, var_h: float, bias: float):
+        self.x = [h, 0.0, bias]
+        self.P = [[var_h, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 100.0 ** 2]]
+        self.t = t
+
+    def _predict(self, t: float):
+        dt = t - self.t
+        if dt <= 0:
+            return
+        self.t = t
+        P = self.P
+        q = self.q_accel
+        dt2 = dt * dt
+        # F = [[1, dt, 0], [0, 1, 0], [0, 0, 1]], Q : accélération blanche sur (h, v), marche aléatoire sur b
+        p00 = P[0][0] + dt * (P[0][1] + P[1][0]) + dt2 * P[1][1] + q * dt2 * dt2 / 4
+        p01 = P[0][1] + dt * P[1][1] + q * dt2 * dt / 2
+        p02 = P[0][2] + dt * P[1][2]
+        p11 = P[1][1] + q * dt2
+        p12 = P[1][2]
+        p22 = P[2][2] + self.q_bias * dt
+        self.P = [[p00, p01, p02], [p01, p11, p12], [p02, p12, p22]]
+        self.x[0] += self.x[1] * dt
+
+    def _update(self, H: tuple, z: float, r: float, gated: bool = True) -> bool:
+        """Mise à jour scalaire z = H·x + bruit (variance r) ; False si rejetée par le gate."""
+        P, x = self.P, self.x
+        PH = [P[i][0] * H[0] + P[i][1] * H[1] + P[i][2] * H[2] for i in range(3)]
+        s = H[0] * PH[0] + H[1] * PH[1] + H[2] * PH[2] + r
+        y = z - (H[0] * x[0] + H[1] * x[1] + H[2] * x[2])
+        if gated and y * y > self.gate * self.gate * s:
+            self.rejected += 1
+            return False
+        for i in range(3):
+            k = PH[i] / s
+            x[i] += k * y
+            row = P[i]
+            for j in range(3):
+                row[j] -= k * PH[j]
+        return True
+
+    # ------------- Mesures -------------
+
+    def update_baro(self, t: float, alt_m: float, vario_ms: Optional[float] = None):
+        """MSP_ALTITUDE : altitude estimée par le FC (m) et vario (m/s), reçus à t (s)."""
+        if not self.ready:
+            self._init(t, alt_m, self.r_baro, 0.0)
+        elif not self.has_baro:
+            # Première mesure baro après un démarrage sur le GPS : on bascule dans le repère baro
+            self._predict(t)
+            self.x[2] += self.x[0] - alt_m
+            self.x[0] = alt_m
+            self.P[0][0] = self.r_baro
+            self.P[0][2] = self.P[2][0] = 0.0
+        else:
+            self._predict(t)
+            self._update((1.0, 0.0, 0.0), alt_m, self.r_baro)
+        self.has_baro = True
+        if vario_ms is not None:
+            # Vario déjà filtré par le FC : pas de gate, un changement franc de vitesse doit passer
+            self._update((0.0, 1.0, 0.0), vario_ms, self.r_vario, gated=False)
+
+    def update_gps(self, t: float, alt_m: float, hdop: float = 1.0):
+        """MSP_RAW_GPS : altitude GPS (m) et HDOP, reçus à t (s) ; ignorée si HDOP trop élevé."""
+        if hdop <= 0 or hdop > self.max_hdop:
+            return
+        r = (self.gps_std * max(hdop, 1.0)) ** 2
+        if not self.ready:
+            self._init(t, alt_m, r, 0.0)
+            self.has_gps = True
+            return
+        self._predict(t)
+        if self._update((1.0, 0.0, 1.0), alt_m, r):
+            self.has_gps = True
+
+    # ------------- Estimation -------------
+
+    def altitude(self, t: Optional[float] = None) -> Optional[float]:
+        """Altitude filtrée (m, repère estimated_alt) extrapolée à t (maintenant par défaut)."""
+        if not self.ready:
+            return None
+        if t is None:
+            t = time.monotonic()
+        dt = min(max(t - self.t, 0.0), self.max_extrapolation_s)
+        return self.x[0] + self.x[1] * dt
+
+    def gps_altitude(self, t: Optional[float] = None) -> Optional[float]:
+        """Altitude filtrée dans le repère GPS (MSL), None avant la première mesure GPS acceptée."""
+        if not self.has_gps:
+            return None
+        h = self.altitude(t)
+        return None if h is None else h + self.x[2]
+
+    @property
+    def vertical_speed(self) -> float:
+        return self.x[1]
+
+    @property
+    def std(self) -> float:
+        """Écart-type de l'altitude filtrée (m)."""
+        return math.sqrt(max(self.P[0][0], 0.0))
+
+
+# ===================== Benchmark sur vol enregistré =====================
+
+@dataclass
+class AltitudeBenchmark:
+    samples: int                # mesures intégrées (baro + GPS)
+    update_us: float            # coût moyen d'une mise à jour
+    noise_m: dict               # RMS de l'écart à la référence lissée, par source
+    lag_ms: dict                # retard sur la référence lissée, par source
+
+    def summary(self) -> str:
+        lines = [f"{self.samples} mesures, {self.update_us:.1f} µs par mise à jour"]
+        for name in self.noise_m:
+            lines.append(f"  {name:<10} bruit {self.noise_m[name]:.3f} m, retard {self.lag_ms[name]:.0f} ms")
+        return "\n".join(lines)
+
+
+def replay_benchmark(path: str, grid_hz: float = 50.0, reference_s: float = 1.0,
+                     average_s: float = 0.5, **filter_kwargs) -> AltitudeBenchmark:
+    """
+    Rejoue les trames MSP_ALTITUDE / MSP_RAW_GPS d'un enregistrement dans
+    AltitudeFilter et compare, sur une grille régulière à grid_hz :
+
+    - estimated_alt brut, gps.alt brut (recalé sur le baro), une moyenne
+      glissante causale de estimated_alt sur average_s, et le filtre
+    - à une référence lissée à phase nulle (moyenne centrée sur reference_s)
+      de estimated_alt : bruit = RMS de l'écart, retard = décalage qui
+      minimise cet écart
+    """
+    import numpy as np
+    from flight_log import FlightLogReader
+    from inav_drone import INavDrone
+
+    f = AltitudeFilter(**filter_kwargs)
+    t_baro, baro, t_gps, gps, t_fused, fused = [], [], [], [], [], []
+    elapsed_ns = 0
+    with FlightLogReader(path) as log:
+        for sample in log.telemetry(cmds={INavDrone.MSP_ALTITUDE, INavDrone.MSP_RAW_GPS}):
+            t = sample.t_ns / 1e9
+            value = sample.value
+            if sample.cmd == INavDrone.MSP_ALTITUDE:
+                t0 = time.perf_counter_ns()
+                f.update_baro(t, value.estimated_alt, value.vario / 100.0)
+                elapsed_ns += time.perf_counter_ns() - t0
+                t_baro.append(t)
+                baro.append(value.estimated_alt)
+            elif value.fix_type >= 3 and value.alt is not None:
+                t0 = time.perf_counter_ns()
+                f.update_gps(t, value.alt, value.hdop)
+                elapsed_ns += time.perf_counter_ns() - t0
+                t_gps.append(t)
+                gps.append(value.alt - f.x[2])
+            else:
+                continue
+            if f.ready:
+                t_fused.append(t)
+                fused.append(f.x[0])
+
+    n = len(t_baro) + len(t_gps)
+    if len(t_baro) < 2:
+        raise ValueError(f"{path} : pas assez de trames MSP_ALTITUDE pour le benchmark")
+
+    grid = np.arange(t_baro[0], t_baro[-1], 1.0 / grid_hz)
+    baro_g = np.interp(grid, t_baro, baro)
+    k = max(1, int(reference_s * grid_hz))
+    reference = np.convolve(baro_g, np.ones(k) / k, mode="same")
+    w = max(1, int(average_s * grid_hz))
+    average = np.convolve(baro_g, np.ones(w) / w)[:len(grid)]   # causale
+    signals = {"baro": baro_g, "moyenne": average, "filtre": np.interp(grid, t_fused, fused)}
+    if len(t_gps) >= 2:
+        signals["gps"] = np.interp(grid, t_gps, gps)
+
+    # Bords exclus (convolution incomplète)
+    valid = slice(k, len(grid) - k)
+    max_shift = int(0.5 * grid_hz)
+    noise_m, lag_ms = {}, {}
+    for name, signal in signals.items():
+        ref, sig = reference[valid], signal[valid]
+        noise_m[name] = float(np.sqrt(np.mean((sig - ref) ** 2))) if len(ref) else float("nan")
+        errors = [np.mean((sig[s:] - ref[:len(ref) - s]) ** 2) for s in range(min(max_shift, len(ref) - 1))]
+        lag_ms[name] = float(np.argmin(errors)) / grid_hz * 1000 if errors else float("nan")
+    return AltitudeBenchmark(n, elapsed_ns / 1000 / max(n, 1), noise_m, lag_ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la fusion d'altitude sur un vol enregistré")
+    parser.add_argument("logs", nargs="+", help="Enregistrements .msplog")
+    parser.add_argument("--baro-std", type=float, default=0.5)
+    parser.add_argument("--gps-std", type=float, default=2.0)
+    parser.add_argument("--accel-std", type=float, default=2.0)
+    args = parser.parse_args()
+
+    for path in args.logs:
+        result = replay_benchmark(path, baro_std=args.baro_std, gps_std=args.gps_std, accel_std=args.accel_std)
+        print(f"{path} :")
+        print(result.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+État d'armement rapporté par le FC (iNav) et décodage des arming flags.
+
+Sources, par ordre de préférence :
+- MSP2_INAV_STATUS (0x2000, MSP v2) : arming flags complets sur 32 bits
+- MSP_STATUS_EX (150) : arming flags tronqués à 16 bits (ARMED et les
+  premières causes de blocage seulement)
+- MSP_STATUS (101) : pas d'arming flags ; l'état armé est déduit du mode ARM
+  (premier bit des modes actifs)
+
+Le décodage passe par une table précalculée par octet : 4 lookups et 3
+unions d'ensembles, quelle que soit la valeur.
+"""
+
+import struct
+from dataclasses import dataclass, field
+from enum import IntFlag
+from typing import FrozenSet, List, Optional, Tuple
+
+
+class ArmingFlag(IntFlag):
+    """armingFlag_e de iNav (fc/runtime_config.h)."""
+    OK_TO_ARM = 1 << 0
+    PREVENT_ARMING = 1 << 1
+    ARMED = 1 << 2
+    WAS_EVER_ARMED = 1 << 3
+    SIMULATOR_MODE_HITL = 1 << 4
+    SIMULATOR_MODE_SITL = 1 << 5
+    ARMING_DISABLED_GEOZONE = 1 << 6
+    ARMING_DISABLED_FAILSAFE_SYSTEM = 1 << 7
+    ARMING_DISABLED_NOT_LEVEL = 1 << 8
+    ARMING_DISABLED_SENSORS_CALIBRATING = 1 << 9
+    ARMING_DISABLED_SYSTEM_OVERLOADED = 1 << 10
+    ARMING_DISABLED_NAVIGATION_UNSAFE = 1 << 11
+    ARMING_DISABLED_COMPASS_NOT_CALIBRATED = 1 << 12
+    ARMING_DISABLED_ACCELEROMETER_NOT_CALIBRATED = 1 << 13
+    ARMING_DISABLED_ARM_SWITCH = 1 << 14
+    ARMING_DISABLED_HARDWARE_FAILURE = 1 << 15
+    ARMING_DISABLED_BOXFAILSAFE = 1 << 16
+    ARMING_DISABLED_BOXKILLSWITCH = 1 << 17
+    ARMING_DISABLED_RC_LINK = 1 << 18
+    ARMING_DISABLED_THROTTLE = 1 << 19
+    ARMING_DISABLED_CLI = 1 << 20
+    ARMING_DISABLED_CMS_MENU = 1 << 21
+    ARMING_DISABLED_OSD_MENU = 1 << 22
+    ARMING_DISABLED_ROLLPITCH_NOT_CENTERED = 1 << 23
+    ARMING_DISABLED_SERVO_AUTOTRIM = 1 << 24
+    ARMING_DISABLED_OOM = 1 << 25
+    ARMING_DISABLED_INVALID_SETTING = 1 << 26
+    ARMING_DISABLED_PWM_OUTPUT_ERROR = 1 << 27
+    ARMING_DISABLED_NO_PREARM = 1 << 28
+    ARMING_DISABLED_DSHOT_BEEPER = 1 << 29
+    ARMING_DISABLED_LANDING_DETECTED = 1 << 30
+
+
+# Flags qui empêchent l'armement (tous les ARMING_DISABLED_*)
+ARMING_DISABLED_MASK = 0
+for _flag in ArmingFlag:
+    if _flag.name.startswith("ARMING_DISABLED_"):
+        ARMING_DISABLED_MASK |= _flag.value
+
+# Cause lisible et remède, pour les blocages courants
+ARMING_HINTS = {
+    ArmingFlag.ARMING_DISABLED_RC_LINK: "pas de lien RC valide (receiver_type = MSP ? canaux envoyés en continu ?)",
+    ArmingFlag.ARMING_DISABLED_SENSORS_CALIBRATING: "calibration des capteurs en cours, attendre",
+    ArmingFlag.ARMING_DISABLED_NAVIGATION_UNSAFE: "navigation non sûre (fix GPS ? nav_extra_arming_safety)",
+    ArmingFlag.ARMING_DISABLED_THROTTLE: "gaz pas au ralenti (CH3 = 1000)",
+    ArmingFlag.ARMING_DISABLED_ARM_SWITCH: "switch ARM actif avant que l'armement soit possible (CH5 bas puis haut)",
+    ArmingFlag.ARMING_DISABLED_NO_PREARM: "mode PREARM requis mais pas actif",
+    ArmingFlag.ARMING_DISABLED_INVALID_SETTING: "configuration invalide (voir Configurator)",
+    ArmingFlag.ARMING_DISABLED_NOT_LEVEL: "drone pas à plat",
+    ArmingFlag.ARMING_DISABLED_ROLLPITCH_NOT_CENTERED: "manches roll/pitch pas centrés",
+}
+
+# _BYTE_TABLE[i][v] : flags présents quand l'octet i de la valeur 32 bits vaut v
+_BYTE_TABLE: Tuple[Tuple[FrozenSet[ArmingFlag], ...], ...] = tuple(
+    tuple(
+        frozenset(flag for flag in ArmingFlag if (v << (8 * i)) & flag.value)
+        for v in range(256)
+    )
+    for i in range(4)
+)
+
+
+def decode_arming_flags(value: int) -> FrozenSet[ArmingFlag]:
+    """Valeur brute des arming flags -> ensemble de ArmingFlag (bits inconnus ignorés)."""
+    t = _BYTE_TABLE
+    return (t[0][value & 0xFF] | t[1][(value >> 8) & 0xFF]
+            | t[2][(value >> 16) & 0xFF] | t[3][(value >> 24) & 0xFF])
+
+
+@dataclass
+class ArmingState:
+    armed: bool = False
+    flags: FrozenSet[ArmingFlag] = field(default_factory=frozenset)
+    raw: int = 0
+    complete: bool = True  # False si la source ne donne pas tous les flags (STATUS_EX, STATUS)
+
+    @property
+    def blocking(self) -> FrozenSet[ArmingFlag]:
+        """Causes actives d'interdiction d'armement."""
+        return frozenset(f for f in self.flags if f.value & ARMING_DISABLED_MASK)
+
+    def describe(self) -> List[str]:
+        """Une ligne par cause de blocage, avec le remède quand il est connu."""
+        lines = []
+        for flag in sorted(self.blocking, key=lambda f: f.value):
+            hint = ARMING_HINTS.get(flag)
+            lines.append(f"{flag.name}: {hint}" if hint else flag.name)
+        return lines
+
+
+def _state(raw: int, complete: bool) -> ArmingState:
+    return ArmingState(armed=bool(raw & ArmingFlag.ARMED), flags=decode_arming_flags(raw),
+                       raw=raw, complete=complete)
+
+
+def decode_inav_status(payload: bytes) -> Optional[ArmingState]:
+    """MSP2_INAV_STATUS : cycle u16, i2c u16, capteurs u16, charge u16, profils u8, arming flags u32, ..."""
+    if len(payload) < 13:
+        return None
+    raw, = struct.unpack('<I', payload[9:13])
+    return _state(raw, complete=True)
+
+
+def decode_status_ex(payload: bytes) -> Optional[ArmingState]:
+    """MSP_STATUS_EX : ..., modes u32, profil u8, charge u16, arming flags u16 (tronqués)."""
+    if len(payload) < 15:
+        return None
+    raw, = struct.unpack('<H', payload[13:15])
+    return _state(raw, complete=False)
+
+
+def decode_status(payload: bytes) -> Optional[ArmingState]:
+    """MSP_STATUS : pas d'arming flags, armé si le mode ARM (bit 0 des modes actifs) est actif."""
+    if len(payload) < 10:
+        return None
+    modes, = struct.unpack('<I', payload[6:10])
+    raw = int(ArmingFlag.ARMED) if modes & 1 else 0
+    return ArmingState(armed=bool(raw), flags=decode_arming_flags(raw), raw=raw, complete=False)
+
+
+@dataclass
+class ArmResult:
+    """Résultat de INavDrone.arm()."""
+    success: bool
+    phase: str                         # "precondition", "switch" ou "done" : étape atteinte
+    latency_s: Optional[float] = None  # switch ARM -> armement rapporté par le FC
+    total_s: float = 0.0               # durée totale de la séquence
+    polls: int = 0                     # requêtes d'état envoyées
+    blocking: FrozenSet[ArmingFlag] = field(default_factory=frozenset)
+    reason: str = ""
+    state: Optional[ArmingState] = None
+
+    def __bool__(self) -> bool:
+        return self.success
@@ -0,0 +1,263 @@
+"""
+Flux d'attitude haute fréquence pour les boucles de contrôle externes.
+
+Dans la boucle de polling de INavDrone, MSP_ATTITUDE partage un cycle de
+cinq requêtes à 10 Hz. AttitudeStream interroge MSP_ATTITUDE (et
+optionnellement MSP_ALTITUDE) dans son propre thread, en pipeline : jusqu'à
+`window` requêtes restent en vol, une nouvelle part dès qu'une réponse
+arrive, de sorte que le lien n'attend jamais l'aller-retour. Le verrou de
+transaction est relâché toutes les `batch` réponses pour laisser passer la
+boucle de polling (qui saute alors les commandes streamées) et les autres
+requêtes ; l'envoi RC n'en dépend pas.
+
+Chaque échantillon est horodaté à la réception de la trame et rangé dans un
+RingBuffer (voir telemetry_history), et drone.attitude / drone.altitude
+suivent le flux.
+
+Exemple:
+    stream = AttitudeStream(drone, altitude=True)
+    stream.start()
+    while controle_actif:
+        t, values = stream.wait_next(timeout=0.1)   # roll, pitch, yaw, alt, vario
+        ...
+    stream.stop()
+    print(stream.report())
+
+    python attitude_stream.py /dev/ttyACM0 --baud 115200 230400 921600 --duration 3
+"""
+
+import argparse
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from drone_logging import RateLimitedLogger, get_logger, setup_logging
+from inav_drone import MSP_COMMAND_NAMES, INavDrone, MSPUnsupportedError, _is_link_error
+from telemetry_history import RingBuffer
+
+logger = get_logger()
+
+ATTITUDE_FIELDS = ("roll", "pitch", "yaw")
+ALTITUDE_FIELDS = ("estimated_alt", "vario")
+
+# Octets par trame MSP v1 : en-tête 3 + longueur + cmd + payload + checksum
+_REQUEST_BYTES = 6
+_REPLY_BYTES = {INavDrone.MSP_ATTITUDE: 6 + 6, INavDrone.MSP_ALTITUDE: 6 + 6}
+
+
+def link_bound_hz(baudrate: int, altitude: bool = False) -> float:
+    """
+    Fréquence maximale permise par un UART à `baudrate` (8N1, 10 bits par
+    octet), requêtes et réponses se recouvrant en pipeline : le sens le plus
+    chargé (les réponses) borne le débit.
+    """
+    cmds = [INavDrone.MSP_ATTITUDE] + ([INavDrone.MSP_ALTITUDE] if altitude else [])
+    reply = sum(_REPLY_BYTES[c] for c in cmds)
+    request = _REQUEST_BYTES * len(cmds)
+    return baudrate / 10.0 / max(reply, request)
+
+
+class AttitudeStream:
+    """Lecture en continu de MSP_ATTITUDE (+ MSP_ALTITUDE) au débit maximal du lien."""
+
+    def __init__(self, drone: INavDrone, altitude: bool = False, window: int = 2, batch: int = 20,
+                 max_hz: Optional[float] = None, seconds: float = 10.0):
+        """
+        Args:
+            drone: INavDrone connecté
+            altitude: Ajouter MSP_ALTITUDE à chaque échantillon
+            window: Requêtes (ou paires) en vol simultanément
+            batch: Réponses lues avant de rendre le verrou de transaction
+            max_hz: Fréquence maximale, None = débit maximal du lien (pipeline)
+            seconds: Profondeur de l'historique gardé (à 1 kHz)
+        """
+        self.drone = drone
+        self.altitude = altitude
+        self.cmds = [INavDrone.MSP_ATTITUDE] + ([INavDrone.MSP_ALTITUDE] if altitude else [])
+        self.interval_ns = int(1e9 / max_hz) if max_hz else 0
+        # En mode cadencé : une requête (paire) à la fois, verrou rendu à chaque échantillon
+        self.window = 1 if max_hz else max(1, window)
+        self.batch = 1 if max_hz else max(self.window, batch)
+
+        fields = ATTITUDE_FIELDS + (ALTITUDE_FIELDS if altitude else ())
+        self.buffer = RingBuffer(max(2, int(seconds * 1000)), fields)
+        self.samples = 0
+        self.timeouts = 0
+        self.error: Optional[Exception] = None
+        self._t_start = 0.0
+        self._t_stop: Optional[float] = None
+
+        self._listeners: List[Callable[[float, np.ndarray], None]] = []
+        self._new_sample = threading.Condition()
+        self._log = RateLimitedLogger(logger, window_s=10.0)
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------- Callbacks -------------
+
+    def add_listener(self, callback: Callable[[float, np.ndarray], None]):
+        """callback(t, valeurs), appelé dans le thread du flux à chaque échantillon (doit rester rapide)."""
+        self._listeners = self._listeners + [callback]
+
+    # ------------- Thread -------------
+
+    def start(self):
+        self._running = True
+        self._t_start = time.monotonic()
+        self._t_stop = None
+        self.drone._streamed.update(self.cmds)
+        self._thread = threading.Thread(target=self._run, name="inav-attitude-stream", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        self.drone._streamed.difference_update(self.cmds)
+        self._t_stop = time.monotonic()
+
+    # ------------- Lecture -------------
+
+    def latest(self) -> Optional[Tuple[float, np.ndarray]]:
+        """Dernier échantillon (t monotone en s, valeurs), None si aucun."""
+        return self.buffer.latest()
+
+    def wait_next(self, timeout: Optional[float] = None) -> Optional[Tuple[float, np.ndarray]]:
+        """Attend le prochain échantillon et le retourne (None au timeout)."""
+        with self._new_sample:
+            n = self.samples
+            if not self._new_sample.wait_for(lambda: self.samples != n or not self._running, timeout):
+                return None
+        return self.buffer.latest()
+
+    @property
+    def rate_hz(self) -> float:
+        """Fréquence moyenne obtenue depuis start()."""
+        end = self._t_stop if self._t_stop is not None else time.monotonic()
+        return self.samples / (end - self._t_start) if end > self._t_start else 0.0
+
+    def report(self) -> str:
+        bound = link_bound_hz(self.drone.baudrate, self.altitude)
+        what = "+".join("ATTITUDE" if c == INavDrone.MSP_ATTITUDE else "ALTITUDE" for c in self.cmds)
+        return (f"{what} à {self.drone.baudrate} bauds : {self.rate_hz:.0f} Hz mesurés "
+                f"(borne UART {bound:.0f} Hz, fenêtre {self.window}, {self.timeouts} timeouts)")
+
+    # ------------- Échantillonnage -------------
+
+    def _run(self):
+        next_ns = time.perf_counter_ns()
+        while self._running:
+            try:
+                self._batch()
+            except Exception as e:
+                if _is_link_error(e):
+                    self.drone.link_error = e
+                    self.error = e
+                    logger.error("Flux d'attitude interrompu: %s", e)
+                    break
+                self._log.error(f"Attitude stream {type(e).__name__}", "Attitude stream error: %s", e)
+                time.sleep(0.01)
+            if self.interval_ns:
+                next_ns += self.interval_ns
+                delay = next_ns - time.perf_counter_ns()
+                if delay > 0:
+                    time.sleep(delay / 1e9)
+                else:
+                    next_ns = time.perf_counter_ns()
+        self._running = False
+        with self._new_sample:
+            self._new_sample.notify_all()
+
+    def _batch(self):
+        """Une salve sous le verrou de transaction : `batch` échantillons, `window` en vol."""
+        drone = self.drone
+        last_cmd = self.cmds[-1]
+        timeout = drone.link_stats.link_rto.timeout if drone.adaptive_timeouts else drone.DEFAULT_TIMEOUT
+        with drone._transaction_lock:
+            in_flight = 0
+            sent = 0
+            while in_flight < self.window and sent < self.batch:
+                for cmd in self.cmds:
+                    drone._msp_send(cmd, b'')
+                in_flight += 1
+                sent += 1
+
+            attitude_row: Optional[Tuple[float, Tuple[float, ...]]] = None
+            while in_flight:
+                try:
+                    cmd, payload = drone._msp_read_frame(timeout=timeout)
+                except TimeoutError:
+                    # Réponses perdues : elles arriveront peut-être plus tard, ignorées comme inattendues
+                    self.timeouts += 1
+                    return
+                if cmd not in self.cmds:
+                    drone.link_stats.unexpected_cmds += 1
+                    continue
+                if drone._last_rx_error:
+                    raise MSPUnsupportedError(f"Commande MSP {MSP_COMMAND_NAMES.get(cmd, cmd)} refusée par le FC", cmd)
+                t_ns = drone._last_rx_ns
+                value = drone._handle_frame(cmd, payload, t_ns)
+                if value is None:
+                    continue
+                if cmd == INavDrone.MSP_ATTITUDE:
+                    attitude_row = (t_ns / 1e9, (value.roll, value.pitch, value.yaw))
+                else:
+                    if attitude_row is None:
+                        continue
+                    attitude_row = (attitude_row[0], attitude_row[1] + (value.estimated_alt, value.vario))
+                if cmd != last_cmd:
+                    continue
+
+                self._append(*attitude_row)
+                attitude_row = None
+                in_flight -= 1
+                if sent < self.batch and self._running:
+                    for c in self.cmds:
+                        drone._msp_send(c, b'')
+                    in_flight += 1
+                    sent += 1
+
+    def _append(self, t: float, values: Tuple[float, ...]):
+        self.buffer.append(t, values)
+        with self._new_sample:
+            self.samples += 1
+            self._new_sample.notify_all()
+        if self._listeners:
+            row = np.asarray(values)
+            for callback in self._listeners:
+                try:
+                    callback(t, row)
+                except Exception as e:
+                    self._log.error(f"Attitude listener {type(e).__name__}", "Attitude listener error: %s", e)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fréquence maximale du flux d'attitude MSP")
+    parser.add_argument("port", help="Port série du FC (ex: /dev/ttyACM0, /dev/ttyAMA0)")
+    parser.add_argument("--baud", type=int, nargs="+", default=[115200],
+                        help="Débits à tester (port MSP du FC configuré en conséquence ; sans effet sur un VCP USB)")
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--window", type=int, nargs="+", default=[1, 2, 4], help="Requêtes en vol à tester")
+    parser.add_argument("--altitude", action="store_true", help="Ajouter MSP_ALTITUDE")
+    args = parser.parse_args()
+    setup_logging()
+
+    for baud in args.baud:
+        drone = INavDrone(args.port, baudrate=baud)
+        drone.connect()
+        try:
+            for window in args.window:
+                stream = AttitudeStream(drone, altitude=args.altitude, window=window)
+                stream.start()
+                time.sleep(args.duration)
+                stream.stop()
+                print(stream.report())
+        finally:
+            drone.disconnect()
+
+
+if __name__ == "__main__":
+    main()
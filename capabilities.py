@@ -0,0 +1,134 @@
+"""
+Capacités du contrôleur de vol : identité (API, variante, version, carte, UID)
+et liste des commandes MSP supportées / non supportées, avec cache disque.
+
+Le sondage lui-même est fait par INavDrone.probe_capabilities() ; ce module ne
+contient que la structure de données, le décodage des réponses d'identité et
+le cache JSON, indexé par UID de la carte + variante + version du firmware.
+"""
+
+import json
+import os
+import struct
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Set
+
+
+# ===================== Décodage identité =====================
+
+def decode_api_version(payload: bytes) -> Optional[str]:
+    """MSP_API_VERSION : protocole u8, API major u8, API minor u8."""
+    if len(payload) < 3:
+        return None
+    return f"{payload[1]}.{payload[2]}"
+
+def decode_fc_variant(payload: bytes) -> Optional[str]:
+    """MSP_FC_VARIANT : 4 caractères (ex: "INAV")."""
+    if len(payload) < 4:
+        return None
+    return payload[:4].decode('ascii', errors='replace')
+
+def decode_fc_version(payload: bytes) -> Optional[str]:
+    """MSP_FC_VERSION : major, minor, patch."""
+    if len(payload) < 3:
+        return None
+    return f"{payload[0]}.{payload[1]}.{payload[2]}"
+
+def decode_board_info(payload: bytes) -> Optional[str]:
+    """MSP_BOARD_INFO : identifiant carte 4 caractères, révision hardware u16, ..."""
+    if len(payload) < 4:
+        return None
+    board = payload[:4].decode('ascii', errors='replace')
+    if len(payload) >= 6:
+        hw_rev, = struct.unpack('<H', payload[4:6])
+        if hw_rev:
+            board += f" rev{hw_rev}"
+    return board
+
+def decode_uid(payload: bytes) -> Optional[str]:
+    """MSP_UID : identifiant unique du MCU (12 octets), en hexadécimal."""
+    if len(payload) < 12:
+        return None
+    return payload[:12].hex()
+
+
+# ===================== Capacités =====================
+
+@dataclass
+class FCCapabilities:
+    api_version: Optional[str] = None
+    fc_variant: Optional[str] = None   # "INAV", "BTFL", ...
+    fc_version: Optional[str] = None   # "7.1.2"
+    board_id: Optional[str] = None
+    uid: Optional[str] = None
+    supported: Set[int] = field(default_factory=set)
+    unsupported: Set[int] = field(default_factory=set)
+    from_cache: bool = False
+
+    @property
+    def cache_key(self) -> Optional[str]:
+        """Clé de cache : UID (ou carte à défaut) + firmware. None si identité incomplète."""
+        board = self.uid or self.board_id
+        if not board or not self.fc_variant or not self.fc_version:
+            return None
+        return f"{board}/{self.fc_variant}-{self.fc_version}"
+
+    def is_known(self, cmd: int) -> bool:
+        return cmd in self.supported or cmd in self.unsupported
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "api_version": self.api_version,
+            "fc_variant": self.fc_variant,
+            "fc_version": self.fc_version,
+            "board_id": self.board_id,
+            "uid": self.uid,
+            "supported": sorted(self.supported),
+            "unsupported": sorted(self.unsupported),
+        }
+
+
+class CapabilityCache:
+    """Cache JSON {clé: capacités} des commandes supportées par chaque FC/firmware."""
+
+    DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "inav_drone", "capabilities.json")
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or self.DEFAULT_PATH
+        self._lock = threading.Lock()
+
+    def _read(self) -> Dict[str, dict]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def load(self, key: str) -> Optional[dict]:
+        with self._lock:
+            return self._read().get(key)
+
+    def apply(self, caps: FCCapabilities) -> bool:
+        """Complète caps avec les commandes connues du cache. Retourne True si trouvé."""
+        key = caps.cache_key
+        entry = self.load(key) if key else None
+        if not entry:
+            return False
+        caps.supported |= set(entry.get("supported", []))
+        caps.unsupported |= set(entry.get("unsupported", []))
+        caps.from_cache = True
+        return True
+
+    def store(self, caps: FCCapabilities):
+        key = caps.cache_key
+        if not key:
+            return
+        with self._lock:
+            data = self._read()
+            data[key] = caps.to_dict()
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp, self.path)
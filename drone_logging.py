@@ -0,0 +1,172 @@
+"""
+Logging structuré et limité en débit pour les boucles critiques de INavDrone.
+
+- Émission en arrière-plan : le logger "inav_drone" écrit dans une file
+  (QueueHandler) vidée par un thread QueueListener ; les threads série ne
+  bloquent jamais sur la sortie terminal.
+- Limitation par clé d'erreur : la première occurrence d'une clé est émise,
+  les suivantes sont comptées pendant `window_s` puis résumées en une ligne :
+      "RAW_GPS timeout x143 in last 10 s"
+- Champs structurés : chaque enregistrement porte `key` et `count` (extra),
+  exploitables par JsonFormatter ou tout handler de l'application.
+
+À l'import, le logger "inav_drone" n'a qu'un NullHandler : rien n'est
+configuré tant que l'application n'appelle pas setup_logging() (ou ne
+configure pas elle-même le logging, les messages se propageant à la racine).
+
+Exemple:
+    from drone_logging import setup_logging
+    setup_logging(level=logging.INFO, json_lines=True)
+"""
+
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+LOGGER_NAME = "inav_drone"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_setup_lock = threading.Lock()
+
+# Bibliothèque : aucune sortie ni thread tant que l'application n'a rien configuré
+logging.getLogger(LOGGER_NAME).addHandler(logging.NullHandler())
+
+
+class JsonFormatter(logging.Formatter):
+    """Une ligne JSON par enregistrement, avec les champs structurés key / count."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        out = {
+            "t": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        for field in ("key", "count", "window_s"):
+            if hasattr(record, field):
+                out[field] = getattr(record, field)
+        return json.dumps(out, ensure_ascii=False)
+
+
+def setup_logging(level: int = logging.INFO, json_lines: bool = False,
+                  handlers: Optional[List[logging.Handler]] = None) -> logging.handlers.QueueListener:
+    """
+    Configure le logger "inav_drone" pour une émission en arrière-plan.
+
+    Args:
+        level: Niveau minimal
+        json_lines: Format JSON (une ligne par événement) au lieu du texte
+        handlers: Handlers finaux (défaut : StreamHandler sur stderr), exécutés
+                  dans le thread du QueueListener
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+
+        if handlers is None:
+            handler = logging.StreamHandler(sys.stderr)
+            if json_lines:
+                handler.setFormatter(JsonFormatter())
+            else:
+                handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s"))
+            handlers = [handler]
+
+        log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        logger = logging.getLogger(LOGGER_NAME)
+        for h in list(logger.handlers):
+            logger.removeHandler(h)
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        logger.setLevel(level)
+        logger.propagate = False
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        return _listener
+
+
+def get_logger() -> logging.Logger:
+    """Logger "inav_drone" (sans effet de bord : la configuration passe par setup_logging())."""
+    return logging.getLogger(LOGGER_NAME)
+
+
+class RateLimitedLogger:
+    """
+    Limite et agrège les messages répétés par clé.
+
+    La première occurrence d'une clé est émise immédiatement ; les suivantes,
+    dans la fenêtre de `window_s`, sont seulement comptées. À la fin de chaque
+    fenêtre (première occurrence suivante, ou flush() appelé périodiquement par
+    la boucle de polling), un résumé est émis : une erreur permanente produit
+    donc une ligne par fenêtre. Une clé sans occurrence pendant une fenêtre
+    complète est oubliée et sa prochaine occurrence est de nouveau émise.
+
+    Partagé par les threads de polling et RC : l'état par clé est protégé par
+    un verrou, les messages sont émis hors verrou.
+    """
+
+    def __init__(self, logger: logging.Logger, window_s: float = 10.0):
+        self.logger = logger
+        self.window_s = window_s
+        # clé -> [début de fenêtre, nb supprimés, niveau, dernier message]
+        self._state: Dict[str, list] = {}
+        self._next_flush = float("inf")
+        self._lock = threading.Lock()
+
+    def log(self, level: int, key: str, msg: str, *args):
+        now = time.monotonic()
+        summary = None
+        with self._lock:
+            state = self._state.get(key)
+            if state is not None:
+                state[1] += 1
+                state[2] = level
+                state[3] = (msg, args)
+                if now - state[0] >= self.window_s:
+                    summary = (state[1], level, state[3])
+                    state[0], state[1] = now, 0
+                    self._next_flush = min(self._next_flush, now + self.window_s)
+            else:
+                self._state[key] = [now, 0, level, None]
+                self._next_flush = min(self._next_flush, now + self.window_s)
+        if summary is not None:
+            self._summary(key, *summary)
+        elif state is None:
+            self.logger.log(level, msg, *args, extra={"key": key, "count": 1})
+
+    def error(self, key: str, msg: str, *args):
+        self.log(logging.ERROR, key, msg, *args)
+
+    def warning(self, key: str, msg: str, *args):
+        self.log(logging.WARNING, key, msg, *args)
+
+    def _summary(self, key: str, count: int, level: int, last: tuple):
+        last_msg = last[0] % last[1] if last[1] else last[0]
+        self.logger.log(level, "%s x%d in last %g s (dernier: %s)", key, count, self.window_s, last_msg,
+                        extra={"key": key, "count": count, "window_s": self.window_s})
+
+    def flush(self):
+        """Émet les résumés des fenêtres écoulées (peu coûteux si rien à faire)."""
+        now = time.monotonic()
+        if now < self._next_flush:
+            return
+        summaries = []
+        with self._lock:
+            next_flush = float("inf")
+            for key, state in list(self._state.items()):
+                if now - state[0] >= self.window_s:
+                    if not state[1]:
+                        del self._state[key]
+                        continue
+                    summaries.append((key, state[1], state[2], state[3]))
+                    state[0], state[1] = now, 0
+                next_flush = min(next_flush, state[0] + self.window_s)
+            self._next_flush = next_flush
+        for summary in summaries:
+            self._summary(*summary)
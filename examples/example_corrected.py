@@ -7,9 +7,12 @@ Ce script montre comment utiliser correctement la classe INavDrone avec :
 - Navigation basique
 """
 
+from drone_logging import setup_logging
 from inav_drone import INavDrone
 import time
 
+setup_logging()
+
 def main():
     # Connexion au drone
     print("[Exemple] Connexion au drone...")
@@ -1,10 +1,11 @@
+from drone_logging import setup_logging
 from inav_drone import INavDrone
-import time
 
-drone = INavDrone("/dev/ttyAMA0", 115200)
-drone.connect()
+setup_logging()
 
-time.sleep(1.0)  # laisse le temps à la télémétrie d'arriver
+drone = INavDrone("/dev/ttyAMA0", 115200)
+if not drone.connect(timeout=2.0):  # attend le premier instantané de télémétrie
+    print("Télémétrie incomplète")
 print("VOLTS:", drone.battery.voltage)
 print("GPS:", drone.gps)
 
@@ -0,0 +1,129 @@
+"""
+Superviseur failsafe : heartbeat obligatoire du code applicatif.
+
+Tant que l'override RC est actif, _rc_loop renvoie les derniers manches à
+chaque cycle : si le code de mission se bloque ou plante, le drone continue
+avec ces valeurs indéfiniment. Le superviseur impose un heartbeat périodique
+(heartbeat() au moins toutes les `timeout_s` secondes) ; à la première
+échéance manquée, la boucle RC applique l'action de secours configurée
+(hold, rth, land, disarm) et l'envoie immédiatement, sans attendre le cycle
+suivant.
+
+Le contrôle dans la boucle RC est une seule comparaison d'entiers avec
+l'horodatage déjà pris pour l'itération. Une fois déclenché, le failsafe
+est verrouillé : set_rc_override() est ignoré jusqu'à clear() (ou stop()) ;
+disarm() passe toujours. Le verrou est tenu par source ("heartbeat",
+"geofence") : il ne se lève que quand plus aucune source n'est déclenchée.
+
+Exemple:
+    failsafe = drone.start_failsafe(timeout_s=1.0, action="rth")
+    while mission_en_cours:
+        ...
+        drone.heartbeat()
+"""
+
+import time
+from typing import Callable, Dict, List, Optional
+
+from drone_logging import get_logger
+
+logger = get_logger()
+
+# Manches au neutre : en POSHOLD, gaz au milieu = maintien de l'altitude
+NEUTRAL_STICKS: Dict[int, int] = {1: 1500, 2: 1500, 3: 1500, 4: 1500}
+
+# Canaux envoyés par action (mêmes conventions AUX que INavDrone.set_mode)
+ACTION_CHANNELS: Dict[str, Dict[int, int]] = {
+    "hold": {**NEUTRAL_STICKS, 6: 1500},          # POSHOLD
+    "rth": {**NEUTRAL_STICKS, 7: 1800},           # RTH
+    "land": {**NEUTRAL_STICKS, 3: 1300, 6: 1500},  # POSHOLD, gaz bas = descente lente
+    "disarm": {3: 1000, 5: 1000},
+}
+
+ACTION_MODES: Dict[str, str] = {"hold": "POSHOLD", "rth": "RTH", "land": "POSHOLD"}
+
+
+def apply_action(drone, action: str, channels: Optional[Dict[int, int]] = None, source: str = "heartbeat"):
+    """
+    Applique une action de secours par le chemin prioritaire (envoi immédiat)
+    et verrouille set_rc_override() au nom de `source` jusqu'à release_action().
+    Partagé par le heartbeat et le géofencing (geofence.py).
+    """
+    drone._failsafe_sources.add(source)
+    if action in ACTION_MODES:
+        drone.nav.mode = ACTION_MODES[action]
+    drone._send_rc_priority(channels if channels is not None else ACTION_CHANNELS[action])
+
+
+def release_action(drone, source: str) -> bool:
+    """Lève le verrou de `source` ; True si set_rc_override() est de nouveau libre (plus aucune source)."""
+    drone._failsafe_sources.discard(source)
+    if drone._failsafe_sources:
+        logger.warning("Verrou %s levé, maintenu par : %s", source, ", ".join(sorted(drone._failsafe_sources)))
+        return False
+    return True
+
+
+class FailsafeSupervisor:
+    """Déclenche une action de secours si l'application cesse d'appeler heartbeat()."""
+
+    def __init__(self, drone, timeout_s: float = 1.0, action: str = "hold",
+                 channels: Optional[Dict[int, int]] = None):
+        """
+        Args:
+            drone: INavDrone
+            timeout_s: Délai maximal entre deux heartbeat()
+            action: "hold", "rth", "land" ou "disarm"
+            channels: Canaux à envoyer à la place de ceux de l'action (config AUX différente)
+        """
+        if action not in ACTION_CHANNELS:
+            raise ValueError(f"Action failsafe inconnue: {action}")
+        self.drone = drone
+        self.timeout_s = timeout_s
+        self.action = action
+        self.channels = dict(channels if channels is not None else ACTION_CHANNELS[action])
+        self.triggered = False
+        self.triggered_at: Optional[float] = None  # time.monotonic() du déclenchement
+        self.late_s = 0.0  # retard du heartbeat au moment du déclenchement
+        self._timeout_ns = int(timeout_s * 1e9)
+        self._listeners: List[Callable[[str], None]] = []
+
+    def add_listener(self, callback: Callable[[str], None]):
+        """callback(action), appelé dans le thread RC au déclenchement (doit rester rapide)."""
+        self._listeners = self._listeners + [callback]
+
+    def heartbeat(self):
+        """Repousse l'échéance de timeout_s (à appeler par la boucle de mission)."""
+        self.drone._heartbeat_deadline_ns = time.perf_counter_ns() + self._timeout_ns
+
+    def start(self):
+        self.heartbeat()
+
+    def stop(self):
+        """Plus d'échéance, et verrou levé : sans superviseur, personne d'autre ne le lèverait."""
+        self.drone._heartbeat_deadline_ns = self.drone.NO_DEADLINE_NS
+        if self.triggered:
+            self.triggered = False
+            release_action(self.drone, "heartbeat")
+
+    def clear(self):
+        """Lève le verrou après un déclenchement : l'application reprend la main."""
+        self.triggered = False
+        self.heartbeat()
+        if release_action(self.drone, "heartbeat"):
+            logger.warning("Failsafe levé, contrôle rendu à l'application")
+
+    def _trigger(self, now_ns: int):
+        """Appelé par la boucle RC à la première échéance manquée."""
+        drone = self.drone
+        self.late_s = (now_ns - drone._heartbeat_deadline_ns) / 1e9
+        drone._heartbeat_deadline_ns = drone.NO_DEADLINE_NS
+        self.triggered = True
+        self.triggered_at = time.monotonic()
+        apply_action(drone, self.action, self.channels, source="heartbeat")
+        logger.error("Heartbeat manqué (%.0f ms après l'échéance) : failsafe %s", self.late_s * 1000, self.action)
+        for callback in self._listeners:
+            try:
+                callback(self.action)
+            except Exception as e:
+                logger.error("Failsafe listener error: %s", e)
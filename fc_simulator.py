@@ -0,0 +1,383 @@
+"""
+Contrôleur de vol iNav simulé, pour tester INavDrone sans matériel.
+
+SimulatedFC répond aux requêtes MSP v1 / v2 avec une télémétrie synthétique
+(attitude, GPS, altitude, batterie, RC, état d'armement, sorties moteurs /
+servos) et renvoie en MSP_RC les canaux reçus par MSP_SET_RAW_RC. L'armement
+suit le switch CH5 comme iNav : refusé tant qu'une cause de blocage est
+active (arming_disabled, gaz pas au ralenti, pas de RC reçue depuis 0.5 s).
+Armé, les moteurs suivent les gaz (CH3) avec un retard de `motor_lag_s`.
+
+Il fournit une fabrique de ports série compatible avec
+INavDrone(serial_factory=...) et permet de simuler les pannes du lien :
+
+- unplug() / plug() : disparition du port (VCP USB débranché) ; read/write
+  lèvent SerialException et la réouverture échoue tant que le port est absent
+- set_silent(True) : le port reste ouvert mais le FC ne répond plus (UART muet)
+
+Exemple:
+    fc = SimulatedFC()
+    drone = INavDrone("sim", serial_factory=fc.serial_factory)
+    drone.connect()
+
+Mesure du temps de reprise du watchdog :
+    python fc_simulator.py --outage 1.0
+"""
+
+import argparse
+import struct
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import serial
+
+from arming import ArmingFlag
+from drone_logging import setup_logging
+from inav_drone import INavDrone, encode_msp_v1, encode_msp_v2
+
+
+class SimulatedFC:
+    """État et logique MSP d'un FC simulé, partagés par tous les ports ouverts."""
+
+    def __init__(self, latency_s: float = 0.0, unsupported: Iterable[int] = (INavDrone.MSP_NAV_STATUS,),
+                 silent_cmds: Iterable[int] = (), motor_count: int = 4, motor_lag_s: float = 0.02):
+        """
+        Args:
+            latency_s: Délai de réponse à chaque requête (s)
+            unsupported: Commandes auxquelles le FC répond par une trame d'erreur '$M!'
+            silent_cmds: Commandes qui ne reçoivent jamais de réponse
+            motor_count: Nombre de moteurs rapportés par MSP_MOTOR
+            motor_lag_s: Retard entre une commande de gaz reçue et la sortie moteur
+        """
+        self.latency_s = latency_s
+        self.unsupported = set(unsupported)
+        self.silent_cmds = set(silent_cmds)
+        self.present = True
+        self.silent = False
+        self.opens = 0
+
+        self.identity = {
+            INavDrone.MSP_API_VERSION: bytes([0, 2, 5]),
+            INavDrone.MSP_FC_VARIANT: b"INAV",
+            INavDrone.MSP_FC_VERSION: bytes([7, 1, 2]),
+            INavDrone.MSP_BOARD_INFO: b"SIMU" + struct.pack('<H', 0),
+            INavDrone.MSP_UID: bytes(range(12)),
+        }
+        self.roll = 0.0
+        self.pitch = 0.0
+        self.yaw = 90.0
+        self.lat = 48.8566
+        self.lon = 2.3522
+        self.alt_m = 0.0
+        self.vario_cms = 0
+        self.speed_ms = 0.0       # vitesse sol GPS
+        self.course_deg = 0.0     # route GPS
+        self.vbat = 12.6
+        self.rc: List[int] = [1500] * 8
+        self.rc_rx_t_ns = 0  # horodatage du dernier MSP_SET_RAW_RC reçu
+        self.armed = False
+        self.was_ever_armed = False
+        self.arming_disabled = 0  # ArmingFlag.ARMING_DISABLED_* imposés par le test
+        self.motor_count = motor_count
+        self.motor_lag_ns = int(motor_lag_s * 1e9)
+        self._throttle_log: List[Tuple[int, int]] = [(0, 1000)]  # (t_ns, CH3) à chaque changement
+
+        self._ports: List["SimulatedSerial"] = []
+        self._lock = threading.Lock()
+
+    # ------------- Pannes -------------
+
+    def unplug(self):
+        """Le port disparaît : les ports ouverts sont morts, la réouverture échoue."""
+        with self._lock:
+            self.present = False
+            for port in self._ports:
+                port._dead = True
+            self._ports = []
+
+    def plug(self):
+        with self._lock:
+            self.present = True
+
+    def set_silent(self, silent: bool):
+        """FC muet (port ouvert, plus aucune réponse)."""
+        self.silent = silent
+
+    # ------------- Port série -------------
+
+    def serial_factory(self, port: str, baudrate: int = 115200, timeout: Optional[float] = 0.2) -> "SimulatedSerial":
+        """Équivalent de serial.Serial(port, baudrate, timeout=...) pour INavDrone."""
+        with self._lock:
+            if not self.present:
+                raise serial.SerialException(f"could not open port {port}: No such file or directory")
+            ser = SimulatedSerial(self, timeout)
+            self._ports.append(ser)
+            self.opens += 1
+            return ser
+
+    # ------------- MSP -------------
+
+    def respond(self, cmd: int, payload: bytes, v2: bool = False) -> Optional[bytes]:
+        """Trame de réponse à une requête, None si pas de réponse."""
+        if self.silent or cmd in self.silent_cmds:
+            return None
+        if cmd in self.unsupported:
+            return self._frame(cmd, b'', True, v2)
+        if cmd in self.identity:
+            return self._frame(cmd, self.identity[cmd], False, v2)
+        if cmd == INavDrone.MSP_SET_RAW_RC:
+            n = len(payload) // 2
+            channels = struct.unpack('<' + 'H' * n, payload[:2 * n])
+            self.rc[:n] = channels
+            self.rc_rx_t_ns = time.monotonic_ns()
+            if self.rc[2] != self._throttle_log[-1][1]:
+                self._throttle_log.append((self.rc_rx_t_ns, self.rc[2]))
+                del self._throttle_log[:-64]
+            self._update_arming()
+            return self._frame(cmd, b'', False, v2)  # acquittement vide
+        data = self.telemetry(cmd)
+        if data is None:
+            return self._frame(cmd, b'', True, v2)
+        return self._frame(cmd, data, False, v2)
+
+    @staticmethod
+    def _frame(cmd: int, payload: bytes, error: bool, v2: bool) -> bytes:
+        if v2:
+            return encode_msp_v2(cmd, payload, b'$X!' if error else b'$X>')
+        return encode_msp_v1(cmd, payload, b'$M!' if error else b'$M>')
+
+    # ------------- Armement -------------
+
+    def blocking_flags(self) -> int:
+        flags = self.arming_disabled
+        if time.monotonic_ns() - self.rc_rx_t_ns > 500_000_000:
+            flags |= ArmingFlag.ARMING_DISABLED_RC_LINK
+        if self.rc[2] > 1100:
+            flags |= ArmingFlag.ARMING_DISABLED_THROTTLE
+        return int(flags)
+
+    def arming_flags(self) -> int:
+        if self.armed:
+            return int(ArmingFlag.ARMED | ArmingFlag.WAS_EVER_ARMED)
+        flags = self.blocking_flags()
+        if not flags:
+            flags |= ArmingFlag.OK_TO_ARM
+        if self.was_ever_armed:
+            flags |= ArmingFlag.WAS_EVER_ARMED
+        return int(flags)
+
+    def _update_arming(self):
+        arm_switch = self.rc[4] > 1700
+        if not arm_switch:
+            self.armed = False
+        elif not self.armed and not self.blocking_flags():
+            self.armed = True
+            self.was_ever_armed = True
+
+    # ------------- Sorties -------------
+
+    MOTOR_STOP = 1000
+    MOTOR_IDLE = 1150  # throttle_idle : moteurs au ralenti une fois armé
+
+    def motor_outputs(self) -> List[int]:
+        """Gaz reçus il y a motor_lag_s, mis à l'échelle entre ralenti et plein gaz."""
+        if not self.armed:
+            return [self.MOTOR_STOP] * self.motor_count
+        t = time.monotonic_ns() - self.motor_lag_ns
+        throttle = 1000
+        for t_ns, value in reversed(self._throttle_log):
+            if t_ns <= t:
+                throttle = value
+                break
+        throttle = min(max(throttle, 1000), 2000)
+        out = self.MOTOR_IDLE + (throttle - 1000) * (2000 - self.MOTOR_IDLE) // 1000
+        return [out] * self.motor_count
+
+    def telemetry(self, cmd: int) -> Optional[bytes]:
+        if cmd == INavDrone.MSP_ATTITUDE:
+            return struct.pack('<hhh', int(self.roll * 10), int(self.pitch * 10), int(self.yaw * 10))
+        if cmd == INavDrone.MSP_RAW_GPS:
+            return struct.pack('<BBllhhhH', 3, 12, int(self.lat * 1e7), int(self.lon * 1e7),
+                               int(self.alt_m * 100), int(self.speed_ms * 100), int(self.course_deg * 10), 90)
+        if cmd == INavDrone.MSP_ALTITUDE:
+            return struct.pack('<lh', int(self.alt_m * 100), self.vario_cms)
+        if cmd == INavDrone.MSP_ANALOG:
+            return bytes([int(self.vbat * 10)]) + struct.pack('<HHH', 0, 1023, 0)
+        if cmd == INavDrone.MSP_RC:
+            return struct.pack('<' + 'H' * len(self.rc), *self.rc)
+        if cmd == INavDrone.MSP_MOTOR:
+            motors = self.motor_outputs() + [0] * (8 - self.motor_count)
+            return struct.pack('<8H', *motors)
+        if cmd == INavDrone.MSP_SERVO:
+            return struct.pack('<8H', *([1500] * 8))
+        if cmd == INavDrone.MSP_STATUS:
+            return struct.pack('<HHHIB', 1000, 0, 0x23, int(self.armed), 0)
+        if cmd == INavDrone.MSP_STATUS_EX:
+            return struct.pack('<HHHIBHHB', 1000, 0, 0x23, int(self.armed), 0, 10,
+                               self.arming_flags() & 0xFFFF, 0)
+        if cmd == INavDrone.MSP2_INAV_STATUS:
+            return struct.pack('<HHHHBIQB', 1000, 0, 0x23, 10, 0, self.arming_flags(), int(self.armed), 0)
+        return None
+
+
+class SimulatedSerial:
+    """Port série connecté à un SimulatedFC (sous-ensemble de l'API pyserial utilisé par INavDrone)."""
+
+    def __init__(self, fc: SimulatedFC, timeout: Optional[float] = 0.2):
+        self.fc = fc
+        self.timeout = timeout
+        self._dead = False
+        self._closed = False
+        self._rx: List[Tuple[float, bytes]] = []  # (disponible à t monotone, octets)
+        self._buf = bytearray()
+        self._tx = bytearray()
+        self._cv = threading.Condition()
+
+    def _check(self):
+        if self._closed:
+            raise serial.SerialException("Attempting to use a port that is not open")
+        if self._dead:
+            raise serial.SerialException("device reports readiness to read but returned no data "
+                                         "(device disconnected or multiple access on port?)")
+
+    def write(self, data: bytes) -> int:
+        self._check()
+        self._tx += data
+        now = time.monotonic()
+        replies = []
+        while True:
+            request = self._take_request()
+            if request is None:
+                break
+            reply = self.fc.respond(*request)
+            if reply is not None:
+                replies.append((now + self.fc.latency_s, reply))
+        if replies:
+            with self._cv:
+                self._rx.extend(replies)
+                self._cv.notify_all()
+        return len(data)
+
+    def _take_request(self) -> Optional[Tuple[int, bytes, bool]]:
+        """Extrait la prochaine requête complète '$M<' ou '$X<' du tampon : (cmd, payload, v2)."""
+        buf = self._tx
+        starts = [i for i in (buf.find(b'$M<'), buf.find(b'$X<')) if i >= 0]
+        if not starts:
+            del buf[:max(0, len(buf) - 2)]
+            return None
+        i = min(starts)
+        del buf[:i]
+        if buf[1] == ord('X'):
+            if len(buf) < 8:
+                return None
+            _, cmd, n = struct.unpack_from('<BHH', buf, 3)
+            if len(buf) < 9 + n:
+                return None
+            payload = bytes(buf[8:8 + n])
+            del buf[:9 + n]
+            return cmd, payload, True
+        if len(buf) < 6 or len(buf) < 6 + buf[3]:
+            return None
+        n, cmd = buf[3], buf[4]
+        payload = bytes(buf[5:5 + n])
+        del buf[:6 + n]
+        return cmd, payload, False
+
+    def _release(self, now: float):
+        while self._rx and self._rx[0][0] <= now:
+            self._buf += self._rx.pop(0)[1]
+
+    def read(self, size: int = 1) -> bytes:
+        self._check()
+        deadline = time.monotonic() + (self.timeout or 0.0)
+        with self._cv:
+            while True:
+                now = time.monotonic()
+                self._release(now)
+                if len(self._buf) >= size or now >= deadline or self._dead or self._closed:
+                    break
+                wait = deadline - now
+                if self._rx:
+                    wait = min(wait, self._rx[0][0] - now)
+                self._cv.wait(max(wait, 0.0))
+            self._check()
+            out = bytes(self._buf[:size])
+            del self._buf[:size]
+            return out
+
+    @property
+    def in_waiting(self) -> int:
+        self._check()
+        with self._cv:
+            self._release(time.monotonic())
+            return len(self._buf)
+
+    def reset_input_buffer(self):
+        self._check()
+        with self._cv:
+            self._rx.clear()
+            self._buf.clear()
+
+    def close(self):
+        with self._cv:
+            self._closed = True
+            self._cv.notify_all()
+
+
+# ===================== Mesure du temps de reprise =====================
+
+def measure_recovery(outage_s: float = 1.0, mode: str = "unplug", stall_s: float = 0.5,
+                     runs: int = 3) -> List[float]:
+    """
+    Coupe le lien pendant outage_s et mesure, pour chaque essai, le temps entre
+    le rétablissement du lien simulé et la reconnexion signalée par le watchdog.
+    """
+    fc = SimulatedFC()
+    drone = INavDrone("sim", serial_factory=fc.serial_factory)
+    drone.connect()
+    drone.enable_rc_override()
+    recovered = threading.Event()
+    watchdog = drone.start_watchdog(stall_s=stall_s)
+    watchdog.add_reconnect_listener(lambda event: recovered.set())
+
+    results = []
+    try:
+        for _ in range(runs):
+            time.sleep(0.5)
+            recovered.clear()
+            if mode == "unplug":
+                fc.unplug()
+            else:
+                fc.set_silent(True)
+            time.sleep(outage_s)
+            t_restore = time.monotonic()
+            if mode == "unplug":
+                fc.plug()
+            else:
+                fc.set_silent(False)
+            if recovered.wait(outage_s + 10.0):
+                results.append(time.monotonic() - t_restore)
+    finally:
+        drone.disconnect()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Temps de reprise du lien MSP (FC simulé)")
+    parser.add_argument("--outage", type=float, default=1.0, help="Durée de la coupure (s)")
+    parser.add_argument("--mode", choices=("unplug", "silent"), default="unplug")
+    parser.add_argument("--stall", type=float, default=0.5, help="Seuil de détection du watchdog (s)")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    setup_logging()
+
+    results = measure_recovery(args.outage, args.mode, args.stall, args.runs)
+    for i, dt in enumerate(results, 1):
+        print(f"essai {i}: reprise {dt * 1000:.0f} ms après rétablissement du lien")
+    if len(results) < args.runs:
+        print(f"{args.runs - len(results)} essai(s) sans reconnexion")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Lecteur indexé des enregistrements de vol MSP (voir flight_recorder.py).
+
+Le fichier est mappé en mémoire (mmap) : à l'ouverture, seuls les en-têtes de
+chunks sont parcourus pour construire un index temporel creux (un point par
+chunk). Une recherche par horodatage ne décompresse ensuite que les chunks
+concernés, ce qui permet d'exploiter des logs de plusieurs heures sur le Pi.
+
+Usage:
+    python3 flight_log.py vol_001.msplog
+"""
+
+import bisect
+import mmap
+import sys
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Set
+
+from flight_recorder import (
+    FILE_HEADER, FILE_MAGIC, CHUNK_HEADER, CHUNK_MAGIC, RECORD_HEADER,
+    DIR_TX, DIR_RX, FLAG_ERROR, decompress_chunk,
+)
+from inav_drone import INavDrone
+
+
+@dataclass
+class ChunkInfo:
+    offset: int        # position des données (après l'en-tête du chunk)
+    codec: int
+    n_records: int
+    raw_size: int
+    stored_size: int
+    t_first_ns: int
+    t_last_ns: int
+
+@dataclass
+class LogRecord:
+    t_ns: int          # horodatage monotone (ns)
+    direction: int     # DIR_TX / DIR_RX
+    flags: int
+    cmd: int
+    payload: bytes
+
+@dataclass
+class TelemetrySample:
+    t_ns: int          # horodatage monotone (ns) de réception de la trame
+    cmd: int
+    name: str          # "ATTITUDE", "RAW_GPS", ...
+    value: object      # Attitude, GPSState, AltitudeState, BatteryState, dict RC
+
+
+class FlightLogReader:
+    """
+    Lecture d'un enregistrement MSP sans le charger en entier.
+
+    Les temps passés aux méthodes publiques sont en secondes depuis le début de
+    l'enregistrement ; les enregistrements retournés gardent leur horodatage
+    monotone brut (t_ns).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mm) < FILE_HEADER.size:
+            self.close()
+            raise ValueError(f"Fichier trop court: {path}")
+        magic, self.version, _, self.t_wall_ns, self.t_mono_ns = FILE_HEADER.unpack_from(self._mm, 0)
+        if magic != FILE_MAGIC:
+            self.close()
+            raise ValueError(f"Pas un enregistrement MSP: {path}")
+
+        self.chunks: List[ChunkInfo] = self._build_index()
+        self._t_last = [c.t_last_ns for c in self.chunks]
+
+    def _build_index(self) -> List[ChunkInfo]:
+        """Parcourt les en-têtes de chunks (sans décompresser les données)."""
+        chunks = []
+        pos = FILE_HEADER.size
+        size = len(self._mm)
+        while pos + CHUNK_HEADER.size <= size:
+            magic, codec, _, _, n, raw_size, stored_size, t_first, t_last = CHUNK_HEADER.unpack_from(self._mm, pos)
+            data_pos = pos + CHUNK_HEADER.size
+            if magic != CHUNK_MAGIC or data_pos + stored_size > size:
+                # Chunk tronqué (enregistrement interrompu) : on s'arrête là
+                break
+            chunks.append(ChunkInfo(data_pos, codec, n, raw_size, stored_size, t_first, t_last))
+            pos = data_pos + stored_size
+        return chunks
+
+    # ------------- Informations -------------
+
+    @property
+    def start_ns(self) -> int:
+        return self.t_mono_ns
+
+    @property
+    def end_ns(self) -> int:
+        return self.chunks[-1].t_last_ns if self.chunks else self.t_mono_ns
+
+    @property
+    def duration(self) -> float:
+        """Durée couverte par l'enregistrement (s)."""
+        return (self.end_ns - self.start_ns) / 1e9
+
+    @property
+    def n_records(self) -> int:
+        return sum(c.n_records for c in self.chunks)
+
+    def _to_ns(self, t_s: Optional[float]) -> Optional[int]:
+        return None if t_s is None else self.t_mono_ns + int(t_s * 1e9)
+
+    # ------------- Recherche / itération -------------
+
+    def seek(self, t_s: float) -> int:
+        """Index du premier chunk contenant des trames à t_s ou après."""
+        return bisect.bisect_left(self._t_last, self._to_ns(t_s))
+
+    def _chunk_records(self, chunk: ChunkInfo) -> Iterator[LogRecord]:
+        raw = decompress_chunk(chunk.codec, self._mm[chunk.offset:chunk.offset + chunk.stored_size])
+        pos = 0
+        for _ in range(chunk.n_records):
+            t_ns, direction, flags, cmd, length = RECORD_HEADER.unpack_from(raw, pos)
+            pos += RECORD_HEADER.size
+            yield LogRecord(t_ns, direction, flags, cmd, raw[pos:pos + length])
+            pos += length
+
+    def records(self, start_s: Optional[float] = None, end_s: Optional[float] = None,
+                direction: Optional[int] = None, cmds: Optional[Set[int]] = None) -> Iterator[LogRecord]:
+        """
+        Générateur des trames dans la fenêtre [start_s, end_s].
+
+        Args:
+            start_s / end_s: Bornes en secondes depuis le début (None = pas de borne)
+            direction: DIR_TX, DIR_RX ou None pour les deux
+            cmds: Ensemble de commandes MSP à garder (None = toutes)
+        """
+        start_ns = self._to_ns(start_s)
+        end_ns = self._to_ns(end_s)
+        first = 0 if start_ns is None else self.seek(start_s)
+
+        for chunk in self.chunks[first:]:
+            if end_ns is not None and chunk.t_first_ns > end_ns:
+                return
+            for rec in self._chunk_records(chunk):
+                if start_ns is not None and rec.t_ns < start_ns:
+                    continue
+                if end_ns is not None and rec.t_ns > end_ns:
+                    return
+                if direction is not None and rec.direction != direction:
+                    continue
+                if cmds is not None and rec.cmd not in cmds:
+                    continue
+                yield rec
+
+    def telemetry(self, start_s: Optional[float] = None, end_s: Optional[float] = None,
+                  cmds: Optional[Set[int]] = None) -> Iterator[TelemetrySample]:
+        """Générateur des trames de télémétrie reçues, décodées comme dans INavDrone."""
+        decoders = INavDrone.TELEMETRY_DECODERS
+        wanted = set(decoders) if cmds is None else set(cmds) & set(decoders)
+        for rec in self.records(start_s, end_s, direction=DIR_RX, cmds=wanted):
+            if rec.flags & FLAG_ERROR:
+                continue
+            name, decoder, _ = decoders[rec.cmd]
+            value = decoder(rec.payload)
+            if value is not None:
+                yield TelemetrySample(rec.t_ns, rec.cmd, name, value)
+
+    # ------------- Fermeture -------------
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    with FlightLogReader(sys.argv[1]) as log:
+        print(f"Fichier   : {log.path}")
+        print(f"Durée     : {log.duration:.1f} s")
+        print(f"Chunks    : {len(log.chunks)}")
+        print(f"Trames    : {log.n_records}")
+
+        counts = {}
+        for rec in log.records():
+            key = ("TX" if rec.direction == DIR_TX else "RX", rec.cmd)
+            counts[key] = counts.get(key, 0) + 1
+        for (direction, cmd), n in sorted(counts.items()):
+            print(f"  {direction} cmd {cmd:5d} : {n}")
+
+
+if __name__ == "__main__":
+    main()
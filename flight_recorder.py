@@ -0,0 +1,213 @@
+"""
+Enregistreur de vol binaire du trafic MSP brut.
+
+Chaque trame MSP émise (TX) ou reçue (RX) par INavDrone est ajoutée à un
+fichier binaire en mode append-only, avec un horodatage monotone en
+nanosecondes. Les enregistrements sont regroupés en chunks, éventuellement
+compressés (zlib / lzma) par un thread d'écriture dédié : le chemin critique
+(threads série) se limite à un struct.pack dans un bytearray.
+
+Format du fichier :
+    En-tête fichier (FILE_HEADER) :
+        magic 'MSPREC1\\0', version u16, réservé u16,
+        t_wall_ns i64 (time.time_ns au démarrage),
+        t_mono_ns i64 (time.monotonic_ns au démarrage)
+    Puis une suite de chunks :
+        En-tête chunk (CHUNK_HEADER) :
+            magic 'CHNK', codec u8, réservé u8+u16,
+            n_records u32, raw_size u32, stored_size u32,
+            t_first_ns i64, t_last_ns i64
+        Données (stored_size octets, compressées selon codec) :
+            suite d'enregistrements RECORD_HEADER + payload
+    RECORD_HEADER : t_ns i64, direction u8, flags u8, cmd u16, length u16
+"""
+
+import lzma
+import queue
+import struct
+import threading
+import time
+import zlib
+from typing import Optional
+
+from drone_logging import RateLimitedLogger, get_logger
+
+logger = get_logger()
+
+
+FILE_MAGIC = b'MSPREC1\x00'
+FILE_VERSION = 1
+CHUNK_MAGIC = b'CHNK'
+
+FILE_HEADER = struct.Struct('<8sHHqq')
+CHUNK_HEADER = struct.Struct('<4sBBHIIIqq')
+RECORD_HEADER = struct.Struct('<qBBHH')
+
+# Direction des trames
+DIR_TX = 0   # client -> FC
+DIR_RX = 1   # FC -> client
+
+# Flags d'enregistrement
+FLAG_MSP_V2 = 0x01   # trame MSP v2 (cmd sur 16 bits)
+FLAG_ERROR = 0x02    # réponse d'erreur du FC ('$M!' / '$X!')
+
+# Codecs de compression des chunks
+CODEC_NONE = 0
+CODEC_ZLIB = 1
+CODEC_LZMA = 2
+
+CODECS = {
+    None: CODEC_NONE,
+    'none': CODEC_NONE,
+    'zlib': CODEC_ZLIB,
+    'lzma': CODEC_LZMA,
+}
+
+
+def compress_chunk(codec: int, raw: bytes, level: int) -> bytes:
+    if codec == CODEC_ZLIB:
+        return zlib.compress(raw, level)
+    if codec == CODEC_LZMA:
+        return lzma.compress(raw, preset=level)
+    return raw
+
+
+def decompress_chunk(codec: int, data: bytes) -> bytes:
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(data)
+    if codec == CODEC_LZMA:
+        return lzma.decompress(data)
+    if codec == CODEC_NONE:
+        return bytes(data)
+    raise ValueError(f"Codec de chunk inconnu: {codec}")
+
+
+class FlightRecorder:
+    """
+    Enregistreur append-only des trames MSP.
+
+    - record() est appelé depuis les threads série : il ne fait qu'ajouter
+      l'enregistrement au chunk courant (bytearray) sous un verrou très court.
+    - Quand le chunk atteint chunk_size octets, il est passé au thread
+      d'écriture qui le compresse et l'écrit sur disque.
+    - Sans chunk plein pendant flush_interval_s, le thread d'écriture écrit
+      le chunk partiel : avec une télémétrie lente, un crash ne perd pas plus
+      de flush_interval_s d'enregistrement.
+    - La file vers le thread d'écriture est bornée : si le disque ne suit pas,
+      les chunks sont abandonnés (compteur chunks_dropped) plutôt que de
+      bloquer les threads série.
+    """
+
+    def __init__(self, path: str, codec: Optional[str] = 'zlib', level: int = 1,
+                 chunk_size: int = 64 * 1024, max_pending_chunks: int = 16,
+                 flush_interval_s: Optional[float] = 1.0):
+        if codec not in CODECS:
+            raise ValueError(f"Codec inconnu: {codec}")
+
+        self.path = path
+        self.codec = CODECS[codec]
+        self.level = level
+        self.chunk_size = chunk_size
+        self.flush_interval_s = flush_interval_s  # None = chunks écrits seulement une fois pleins
+
+        self.records = 0
+        self.chunks_written = 0
+        self.chunks_dropped = 0
+        self.bytes_written = 0
+
+        self._buf = bytearray()
+        self._n = 0
+        self._t_first = 0
+        self._t_last = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        self._log = RateLimitedLogger(logger, window_s=10.0)
+
+        self._file = open(path, 'wb')
+        self._file.write(FILE_HEADER.pack(FILE_MAGIC, FILE_VERSION, 0, time.time_ns(), time.monotonic_ns()))
+        self._file.flush()
+
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=max_pending_chunks)
+        self._writer = threading.Thread(target=self._writer_loop, daemon=True)
+        self._writer.start()
+
+    # ------------- Chemin critique -------------
+
+    def record(self, direction: int, cmd: int, payload: bytes, flags: int = 0, t_ns: Optional[int] = None):
+        """Ajoute une trame au chunk courant (appelé depuis les threads série)."""
+        with self._lock:
+            if self._closed:
+                return
+            # Horodatage pris sous le verrou : les enregistrements restent triés
+            # dans le fichier même quand plusieurs threads enregistrent.
+            if t_ns is None:
+                t_ns = time.monotonic_ns()
+            if self._n == 0:
+                self._t_first = t_ns
+            self._t_last = t_ns
+            self._buf += RECORD_HEADER.pack(t_ns, direction, flags, cmd, len(payload))
+            self._buf += payload
+            self._n += 1
+            self.records += 1
+
+            if len(self._buf) >= self.chunk_size:
+                self._submit_locked()
+
+    def _submit_locked(self, block: bool = False):
+        """Passe le chunk courant au thread d'écriture (verrou déjà pris)."""
+        if self._n == 0:
+            return
+        chunk = (bytes(self._buf), self._n, self._t_first, self._t_last)
+        self._buf = bytearray()
+        self._n = 0
+        try:
+            self._queue.put(chunk, block=block)
+        except queue.Full:
+            self.chunks_dropped += 1
+
+    # ------------- Thread d'écriture -------------
+
+    def _writer_loop(self):
+        while True:
+            try:
+                chunk = self._queue.get(timeout=self.flush_interval_s)
+            except queue.Empty:
+                self.flush()  # chunk partiel vers la file, écrit à l'itération suivante
+                continue
+            if chunk is None:
+                break
+            raw, n, t_first, t_last = chunk
+            try:
+                data = compress_chunk(self.codec, raw, self.level)
+                self._file.write(CHUNK_HEADER.pack(CHUNK_MAGIC, self.codec, 0, 0, n, len(raw), len(data), t_first, t_last))
+                self._file.write(data)
+                self._file.flush()
+                self.chunks_written += 1
+                self.bytes_written += CHUNK_HEADER.size + len(data)
+            except Exception as e:
+                self._log.error(f"Recorder write {type(e).__name__}", "Écriture de l'enregistrement impossible: %s", e)
+            self._log.flush()
+
+    # ------------- Fermeture -------------
+
+    def flush(self):
+        """Force l'envoi du chunk courant (même incomplet) au thread d'écriture."""
+        with self._lock:
+            self._submit_locked()
+
+    def close(self):
+        """Écrit le dernier chunk, arrête le thread d'écriture et ferme le fichier."""
+        with self._lock:
+            if self._closed:
+                return
+            self._submit_locked(block=True)
+            self._closed = True
+        self._queue.put(None)
+        self._writer.join()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
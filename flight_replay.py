@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Rejeu d'un vol enregistré (voir flight_recorder.py) dans une instance INavDrone.
+
+Les trames reçues du FC pendant le vol sont réinjectées comme si elles
+arrivaient du port série : elles passent par le parseur MSP de INavDrone
+(_msp_read_frame) puis par le décodage de télémétrie (_handle_frame).
+
+- speed=1.0 : timing d'origine des octets respecté
+- speed=10.0 : rejeu accéléré x10
+- speed=0 : aussi vite que possible (benchmark du parseur / décodage)
+- max_gap_s : compresse les silences plus longs que cette durée
+
+Usage:
+    python3 flight_replay.py vol_001.msplog [--speed 0] [--start 60] [--end 120]
+"""
+
+import argparse
+import collections
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from drone_logging import setup_logging
+from flight_log import FlightLogReader
+from flight_recorder import DIR_RX, FLAG_ERROR, FLAG_MSP_V2
+from inav_drone import INavDrone, encode_msp_v1, encode_msp_v2
+
+
+class ReplaySerial:
+    """
+    Objet compatible serial.Serial (read / write / timeout) qui restitue le flux
+    d'octets RX d'un enregistrement, trame par trame, à leur instant d'origine.
+    """
+
+    MAX_BUFFERED = 64 * 1024
+
+    def __init__(self, log: FlightLogReader, speed: float = 1.0, max_gap_s: Optional[float] = None,
+                 start_s: Optional[float] = None, end_s: Optional[float] = None):
+        self.timeout: Optional[float] = 0.2
+        self.speed = speed
+        self.max_gap_ns = None if max_gap_s is None else int(max_gap_s * 1e9)
+
+        self._records = log.records(start_s, end_s, direction=DIR_RX)
+        self._buf = bytearray()
+        self._pending = None            # prochaine trame pas encore "arrivée"
+        self._release_ns = 0            # instant (monotone) d'arrivée de _pending
+        self._prev_t_ns: Optional[int] = None
+        self._t0_wall_ns = 0
+
+        # (offset de fin de trame dans le flux, t_ns enregistré)
+        self._frame_ends = collections.deque()
+        self._produced = 0
+        self._consumed = 0
+
+        self.exhausted = False
+        self.last_t_ns = 0              # t_ns enregistré de la dernière trame lue en entier
+        self.bytes_written = 0
+
+    def _next_record(self):
+        for rec in self._records:
+            if rec.flags & FLAG_MSP_V2:
+                frame = encode_msp_v2(rec.cmd, rec.payload, b'$X!' if rec.flags & FLAG_ERROR else b'$X>')
+            else:
+                frame = encode_msp_v1(rec.cmd, rec.payload, b'$M!' if rec.flags & FLAG_ERROR else b'$M>')
+
+            # Instant d'arrivée : écart enregistré, compressé puis mis à l'échelle
+            if self._prev_t_ns is None:
+                self._t0_wall_ns = time.monotonic_ns()
+                self._release_ns = self._t0_wall_ns
+            elif self.speed:
+                gap = rec.t_ns - self._prev_t_ns
+                if self.max_gap_ns is not None and gap > self.max_gap_ns:
+                    gap = self.max_gap_ns
+                self._release_ns += int(gap / self.speed)
+            self._prev_t_ns = rec.t_ns
+            return frame, rec.t_ns
+        return None
+
+    def _release(self, now_ns: int):
+        """Ajoute au tampon les trames arrivées à now_ns (tampon borné en mode max)."""
+        while len(self._buf) < self.MAX_BUFFERED:
+            if self._pending is None:
+                self._pending = self._next_record()
+                if self._pending is None:
+                    self.exhausted = True
+                    return
+            if self.speed and self._release_ns > now_ns:
+                return
+            frame, t_ns = self._pending
+            self._pending = None
+            self._buf += frame
+            self._produced += len(frame)
+            self._frame_ends.append((self._produced, t_ns))
+
+    def read(self, size: int = 1) -> bytes:
+        deadline = time.monotonic_ns() + int((self.timeout or 0) * 1e9)
+        while True:
+            now = time.monotonic_ns()
+            if len(self._buf) < size:
+                self._release(now)
+            if len(self._buf) >= size or self.exhausted:
+                break
+            wait_until = min(deadline, self._release_ns)
+            if wait_until <= now:
+                if now >= deadline:
+                    break
+                continue
+            time.sleep((wait_until - now) / 1e9)
+
+        data = bytes(self._buf[:size])
+        del self._buf[:size]
+        self._consumed += len(data)
+        while self._frame_ends and self._frame_ends[0][0] <= self._consumed:
+            self.last_t_ns = self._frame_ends.popleft()[1]
+        return data
+
+    def write(self, data: bytes) -> int:
+        # Les requêtes du drone ne sont pas rejouées vers un FC : on les ignore.
+        self.bytes_written += len(data)
+        return len(data)
+
+    @property
+    def bytes_read(self) -> int:
+        """Octets lus par le drone, en-têtes et checksums compris (trames v1 ou v2 réelles)."""
+        return self._consumed
+
+    @property
+    def in_waiting(self) -> int:
+        return len(self._buf)
+
+    def reset_input_buffer(self):
+        self._buf.clear()
+
+    def close(self):
+        pass
+
+
+@dataclass
+class ReplayStats:
+    frames: int = 0
+    telemetry: int = 0       # trames décodées en télémétrie
+    errors: int = 0          # trames d'erreur '$M!' / '$X!' (commandes refusées par le FC)
+    bytes: int = 0
+    wall_s: float = 0.0      # durée réelle du rejeu
+    log_s: float = 0.0       # durée couverte dans l'enregistrement
+
+    @property
+    def frames_per_s(self) -> float:
+        return self.frames / self.wall_s if self.wall_s > 0 else 0.0
+
+    @property
+    def mbytes_per_s(self) -> float:
+        return self.bytes / self.wall_s / 1e6 if self.wall_s > 0 else 0.0
+
+    @property
+    def realtime_factor(self) -> float:
+        return self.log_s / self.wall_s if self.wall_s > 0 else 0.0
+
+
+class FlightReplay:
+    """
+    Rejoue un enregistrement dans un INavDrone (créé si non fourni).
+
+    Le drone n'a pas besoin d'être connecté : son port série est remplacé par
+    un ReplaySerial pendant le rejeu, et l'état (attitude, gps, ...) évolue
+    comme pendant le vol.
+    """
+
+    def __init__(self, path: str, drone: Optional[INavDrone] = None, speed: float = 1.0,
+                 max_gap_s: Optional[float] = None, start_s: Optional[float] = None,
+                 end_s: Optional[float] = None):
+        self.path = path
+        self.drone = drone if drone is not None else INavDrone(port=path)
+        self.speed = speed
+        self.max_gap_s = max_gap_s
+        self.start_s = start_s
+        self.end_s = end_s
+        self.stats = ReplayStats()
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run(self) -> ReplayStats:
+        """Rejoue l'enregistrement (bloquant) et retourne les statistiques."""
+        self._stop.clear()
+        stats = ReplayStats()
+        self.stats = stats
+
+        with FlightLogReader(self.path) as log:
+            ser = ReplaySerial(log, self.speed, self.max_gap_s, self.start_s, self.end_s)
+            drone = self.drone
+            previous_ser = drone._ser
+            drone._ser = ser
+            first_t_ns = None
+            t_start = time.perf_counter()
+            try:
+                while not self._stop.is_set():
+                    try:
+                        cmd, payload = drone._msp_read_frame(expected_cmd=None, timeout=1.0)
+                    except TimeoutError:
+                        if ser.exhausted and not ser.in_waiting:
+                            break
+                        continue
+
+                    stats.frames += 1
+                    if first_t_ns is None:
+                        first_t_ns = ser.last_t_ns
+                    if drone._last_rx_error:
+                        stats.errors += 1
+                        continue
+                    if drone._handle_frame(cmd, payload, ser.last_t_ns) is not None:
+                        stats.telemetry += 1
+            finally:
+                stats.wall_s = time.perf_counter() - t_start
+                stats.bytes = ser.bytes_read
+                if first_t_ns is not None:
+                    stats.log_s = (ser.last_t_ns - first_t_ns) / 1e9
+                drone._ser = previous_ser
+
+        return stats
+
+    def start(self):
+        """Lance le rejeu dans un thread (l'état du drone évolue en arrière-plan)."""
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rejoue un vol MSP enregistré dans INavDrone")
+    parser.add_argument("path", help="Fichier d'enregistrement (.msplog)")
+    parser.add_argument("--speed", type=float, default=0.0, help="1=temps réel, 0=max (benchmark)")
+    parser.add_argument("--max-gap", type=float, default=None, help="Compresse les silences > N secondes")
+    parser.add_argument("--start", type=float, default=None, help="Début (s depuis le début du log)")
+    parser.add_argument("--end", type=float, default=None, help="Fin (s depuis le début du log)")
+    args = parser.parse_args()
+    setup_logging()
+
+    replay = FlightReplay(args.path, speed=args.speed, max_gap_s=args.max_gap,
+                          start_s=args.start, end_s=args.end)
+    stats = replay.run()
+
+    print(f"Trames      : {stats.frames} ({stats.telemetry} télémétrie, {stats.errors} erreurs)")
+    print(f"Octets      : {stats.bytes}")
+    print(f"Durée vol   : {stats.log_s:.2f} s")
+    print(f"Durée rejeu : {stats.wall_s:.2f} s (x{stats.realtime_factor:.1f})")
+    print(f"Débit       : {stats.frames_per_s:.0f} trames/s, {stats.mbytes_per_s:.2f} Mo/s")
+    print(f"Dernier état: {replay.drone.attitude} {replay.drone.gps}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Géodésie : repère local tangent (ENU) et distances / caps sur lat/lon.
+
+LocalFrame fixe une origine (le home en général) et convertit des lots de
+points lat/lon/alt en mètres Est / Nord / Haut, et inversement, par l'ECEF
+du WGS84 : exact quelle que soit la distance à l'origine (pas
+d'approximation de la Terre plate), et vectorisé NumPy, donc adapté aux
+missions ou géofences de milliers de points.
+
+Les fonctions haversine_m / bearing_deg / destination travaillent sur la
+sphère moyenne (erreur < 0.5 %), acceptent des scalaires ou des tableaux
+et servent aux tests d'arrivée.
+
+Exemple:
+    frame = LocalFrame.from_gps(drone.gps)
+    enu = frame.to_enu(lats, lons, alts)            # (n, 3) en m
+    lat, lon, alt = frame.to_geodetic(enu[:, 0], enu[:, 1], enu[:, 2])
+    d = haversine_m(drone.gps.lat, drone.gps.lon, wp_lat, wp_lon)
+"""
+
+import math
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Sphère moyenne (rayon moyen IUGG) pour haversine / cap / destination
+EARTH_RADIUS_M = 6371008.8
+
+# Ellipsoïde WGS84
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_E2 = WGS84_F * (2 - WGS84_F)
+WGS84_B = WGS84_A * (1 - WGS84_F)
+
+
+# ===================== Sphère : distance, cap, destination =====================
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """Distance orthodromique (m) entre deux points (degrés), scalaires ou tableaux."""
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = np.radians(np.asarray(lon2) - np.asarray(lon1))
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def bearing_deg(lat1, lon1, lat2, lon2):
+    """Cap initial (degrés, 0 = Nord, sens horaire) du point 1 vers le point 2."""
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    dlmb = np.radians(np.asarray(lon2) - np.asarray(lon1))
+    y = np.sin(dlmb) * np.cos(phi2)
+    x = np.cos(phi1) * np.sin(phi2) - np.sin(phi1) * np.cos(phi2) * np.cos(dlmb)
+    return np.degrees(np.arctan2(y, x)) % 360.0
+
+
+def destination(lat, lon, bearing, distance_m):
+    """Point atteint depuis (lat, lon) en suivant `bearing` (degrés) sur `distance_m` : (lat, lon)."""
+    phi1, lmb1 = np.radians(lat), np.radians(lon)
+    theta = np.radians(bearing)
+    delta = np.asarray(distance_m) / EARTH_RADIUS_M
+    phi2 = np.arcsin(np.sin(phi1) * np.cos(delta) + np.cos(phi1) * np.sin(delta) * np.cos(theta))
+    lmb2 = lmb1 + np.arctan2(np.sin(theta) * np.sin(delta) * np.cos(phi1),
+                             np.cos(delta) - np.sin(phi1) * np.sin(phi2))
+    return np.degrees(phi2), (np.degrees(lmb2) + 540.0) % 360.0 - 180.0
+
+
+# ===================== WGS84 : géodésique <-> ECEF =====================
+
+def geodetic_to_ecef(lat, lon, alt=0.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """lat/lon (degrés), alt (m, ellipsoïdale) -> x, y, z ECEF (m)."""
+    phi, lmb = np.radians(lat), np.radians(lon)
+    sin_phi, cos_phi = np.sin(phi), np.cos(phi)
+    n = WGS84_A / np.sqrt(1 - WGS84_E2 * sin_phi ** 2)
+    alt = np.asarray(alt, dtype=np.float64)
+    x = (n + alt) * cos_phi * np.cos(lmb)
+    y = (n + alt) * cos_phi * np.sin(lmb)
+    z = (n * (1 - WGS84_E2) + alt) * sin_phi
+    return x, y, z
+
+
+def ecef_to_geodetic(x, y, z) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """x, y, z ECEF (m) -> lat/lon (degrés), alt (m), par la formule de Bowring (précision sub-mm près du sol)."""
+    x, y, z = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64), np.asarray(z, dtype=np.float64)
+    ep2 = (WGS84_A ** 2 - WGS84_B ** 2) / WGS84_B ** 2
+    p = np.hypot(x, y)
+    theta = np.arctan2(z * WGS84_A, p * WGS84_B)
+    phi = np.arctan2(z + ep2 * WGS84_B * np.sin(theta) ** 3,
+                     p - WGS84_E2 * WGS84_A * np.cos(theta) ** 3)
+    sin_phi, cos_phi = np.sin(phi), np.cos(phi)
+    n = WGS84_A / np.sqrt(1 - WGS84_E2 * sin_phi ** 2)
+    # Près des pôles, p / cos(phi) devient instable : hauteur par z
+    alt = np.where(np.abs(cos_phi) > 1e-6,
+                   p / np.where(np.abs(cos_phi) > 1e-6, cos_phi, 1.0) - n,
+                   np.abs(z) / np.maximum(np.abs(sin_phi), 1e-12) - n * (1 - WGS84_E2))
+    return np.degrees(phi), np.degrees(np.arctan2(y, x)), alt
+
+
+# ===================== Repère local ENU =====================
+
+class LocalFrame:
+    """Repère Est / Nord / Haut tangent à l'ellipsoïde en une origine fixe."""
+
+    def __init__(self, lat0: float, lon0: float, alt0: float = 0.0):
+        self.lat0 = lat0
+        self.lon0 = lon0
+        self.alt0 = alt0
+        self._origin = np.array(geodetic_to_ecef(lat0, lon0, alt0), dtype=np.float64)
+        phi, lmb = math.radians(lat0), math.radians(lon0)
+        sp, cp, sl, cl = math.sin(phi), math.cos(phi), math.sin(lmb), math.cos(lmb)
+        # Lignes : vecteurs unitaires Est, Nord, Haut exprimés en ECEF
+        self._rot = np.array([
+            [-sl, cl, 0.0],
+            [-sp * cl, -sp * sl, cp],
+            [cp * cl, cp * sl, sp],
+        ])
+        self._rot_rows = [tuple(float(v) for v in row) for row in self._rot]
+        self._origin_xyz = tuple(float(v) for v in self._origin)
+
+    @classmethod
+    def from_gps(cls, gps) -> "LocalFrame":
+        """Origine à la position GPS courante (GPSState avec fix)."""
+        if gps.lat is None or gps.lon is None:
+            raise ValueError("Pas de position GPS pour fixer l'origine")
+        return cls(gps.lat, gps.lon, gps.alt or 0.0)
+
+    def __repr__(self) -> str:
+        return f"LocalFrame({self.lat0:.7f}, {self.lon0:.7f}, {self.alt0:.1f})"
+
+    def to_enu(self, lat, lon, alt=None) -> np.ndarray:
+        """
+        lat/lon (degrés) et alt (m, même référence que alt0 ; None = alt0) -> (n, 3)
+        [est, nord, haut] en m. Un point scalaire donne un tableau (3,).
+        """
+        scalar = np.ndim(lat) == 0
+        lat = np.atleast_1d(np.asarray(lat, dtype=np.float64))
+        lon = np.atleast_1d(np.asarray(lon, dtype=np.float64))
+        alt = np.full_like(lat, self.alt0) if alt is None else np.broadcast_to(np.asarray(alt, dtype=np.float64), lat.shape)
+        ecef = np.stack(geodetic_to_ecef(lat, lon, alt), axis=-1) - self._origin
+        enu = ecef @ self._rot.T
+        return enu[0] if scalar else enu
+
+    def to_enu_point(self, lat: float, lon: float, alt: Optional[float] = None) -> Tuple[float, float, float]:
+        """
+        Un seul point, en flottants Python : même calcul que to_enu sans le
+        coût fixe de NumPy (quelques µs), pour les contrôles à chaque échantillon.
+        """
+        if alt is None:
+            alt = self.alt0
+        phi, lmb = math.radians(lat), math.radians(lon)
+        sin_phi, cos_phi = math.sin(phi), math.cos(phi)
+        n = WGS84_A / math.sqrt(1 - WGS84_E2 * sin_phi * sin_phi)
+        x0, y0, z0 = self._origin_xyz
+        dx = (n + alt) * cos_phi * math.cos(lmb) - x0
+        dy = (n + alt) * cos_phi * math.sin(lmb) - y0
+        dz = (n * (1 - WGS84_E2) + alt) * sin_phi - z0
+        (e0, e1, e2), (n0, n1, n2), (u0, u1, u2) = self._rot_rows
+        return e0 * dx + e1 * dy + e2 * dz, n0 * dx + n1 * dy + n2 * dz, u0 * dx + u1 * dy + u2 * dz
+
+    def to_geodetic(self, east, north, up=0.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """est / nord / haut (m) -> lat, lon (degrés), alt (m)."""
+        east, north, up = np.broadcast_arrays(np.asarray(east, dtype=np.float64),
+                                              np.asarray(north, dtype=np.float64),
+                                              np.asarray(up, dtype=np.float64))
+        enu = np.stack([east, north, up], axis=-1)
+        ecef = enu @ self._rot + self._origin
+        lat, lon, alt = ecef_to_geodetic(ecef[..., 0], ecef[..., 1], ecef[..., 2])
+        return lat, lon, alt
+
+    def distance_m(self, lat, lon) -> np.ndarray:
+        """Distance horizontale (m) de l'origine à chaque point."""
+        enu = self.to_enu(lat, lon)
+        return np.hypot(enu[..., 0], enu[..., 1])
@@ -0,0 +1,427 @@
+"""
+Géofence : zones autorisées, zones interdites et plafonds, contrôlés à chaque
+mise à jour GPS.
+
+Les polygones (lat/lon) sont projetés dans un repère local ENU (geodesy) puis
+indexés sur une grille de cellules de `cell_m` mètres, précalculée une fois :
+
+- cellule entièrement d'un côté de toutes les frontières : verdict (zone
+  en cause, plafond) stocké, une lecture de liste suffit
+- cellule traversée par une frontière : on garde l'état du centre de la
+  cellule pour chaque polygone et les arêtes qui la traversent ; l'état du
+  point s'en déduit par la parité des arêtes coupées entre le centre et le
+  point (quelques arêtes au plus)
+
+Le coût d'un contrôle ne dépend donc ni du nombre de sommets ni du nombre de
+zones. GeofenceMonitor le fait à chaque MSP_RAW_GPS (listener de télémétrie)
+et, à la première violation drone armé, applique l'action configurée par le
+chemin prioritaire du failsafe (failsafe.apply_action) : hold, rth, land ou
+disarm, set_rc_override() verrouillé jusqu'à clear(). Le verrou de la
+géofence est distinct de celui du heartbeat : lever l'un ne lève pas l'autre.
+
+Exemple:
+    fence = Geofence.load("terrain.json")
+    monitor = GeofenceMonitor(fence, action="rth")
+    monitor.attach(drone)
+    ...
+    print(monitor.last, f"{monitor.mean_check_us:.1f} µs par contrôle")
+
+    python geofence.py terrain.json --bench
+"""
+
+import argparse
+import json
+import math
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from drone_logging import get_logger, setup_logging
+from failsafe import ACTION_CHANNELS, apply_action, release_action
+from geodesy import LocalFrame
+from inav_drone import INavDrone
+
+logger = get_logger()
+
+
+@dataclass
+class Zone:
+    name: str
+    inclusion: bool                 # True = zone autorisée, False = zone interdite
+    points: np.ndarray              # (n, 2) lat, lon
+    ceiling_m: Optional[float] = None  # plafond (zones autorisées), m au-dessus du home
+
+
+@dataclass
+class FenceCheck:
+    ok: bool
+    reason: str = ""                # vide si ok
+    zone: Optional[str] = None      # zone interdite en cause
+    ceiling_m: Optional[float] = None  # plafond applicable au point
+
+
+def _crossings(cx: float, cy: float, px: float, py: float, edges: List[Tuple[float, float, float, float]]) -> int:
+    """Nombre d'arêtes coupées par le segment (c, p) (règle semi-ouverte aux sommets)."""
+    dx, dy = px - cx, py - cy
+    n = 0
+    for ax, ay, bx, by in edges:
+        oa = dx * (ay - cy) - dy * (ax - cx)
+        ob = dx * (by - cy) - dy * (bx - cx)
+        if (oa > 0) == (ob > 0):
+            continue
+        ex, ey = bx - ax, by - ay
+        oc = ex * (cy - ay) - ey * (cx - ax)
+        op = ex * (py - ay) - ey * (px - ax)
+        if (oc > 0) != (op > 0):
+            n += 1
+    return n
+
+
+def _points_in_polygon(x: np.ndarray, y: np.ndarray, poly: np.ndarray) -> np.ndarray:
+    """Lancer de rayon vectorisé sur les points, boucle sur les arêtes du polygone (x, y en m)."""
+    inside = np.zeros(x.shape, dtype=bool)
+    ax, ay = poly[:, 0], poly[:, 1]
+    bx, by = np.roll(ax, -1), np.roll(ay, -1)
+    for i in range(len(poly)):
+        straddle = (ay[i] > y) != (by[i] > y)
+        if not straddle.any():
+            continue
+        x_cross = ax[i] + (y - ay[i]) * (bx[i] - ax[i]) / (by[i] - ay[i] if by[i] != ay[i] else 1e-12)
+        inside ^= straddle & (x < x_cross)
+    return inside
+
+
+class Geofence:
+    """Zones autorisées / interdites et plafonds, indexés sur une grille ENU."""
+
+    def __init__(self, origin: Optional[Tuple[float, float]] = None, cell_m: float = 5.0,
+                 ceiling_m: Optional[float] = None):
+        """
+        Args:
+            origin: (lat, lon) de l'origine du repère local ; None = premier sommet ajouté
+            cell_m: Taille des cellules de la grille (m)
+            ceiling_m: Plafond global (m au-dessus du home), None = aucun
+        """
+        self.origin = origin
+        self.cell_m = cell_m
+        self.ceiling_m = ceiling_m
+        self.zones: List[Zone] = []
+        self.frame: Optional[LocalFrame] = None
+        self._built = False
+
+    # ------------- Définition -------------
+
+    def add_inclusion(self, points: Sequence[Tuple[float, float]], ceiling_m: Optional[float] = None,
+                      name: Optional[str] = None):
+        """Zone autorisée (polygone lat/lon). Avec au moins une zone autorisée, tout le reste est interdit."""
+        self._add(Zone(name or f"inclusion{len(self.zones)}", True, np.asarray(points, dtype=np.float64), ceiling_m))
+
+    def add_exclusion(self, points: Sequence[Tuple[float, float]], name: Optional[str] = None):
+        """Zone interdite (polygone lat/lon), sur toute la hauteur."""
+        self._add(Zone(name or f"exclusion{len(self.zones)}", False, np.asarray(points, dtype=np.float64)))
+
+    def _add(self, zone: Zone):
+        if zone.points.ndim != 2 or zone.points.shape[1] != 2 or len(zone.points) < 3:
+            raise ValueError(f"Zone {zone.name} : au moins 3 sommets (lat, lon) requis")
+        self.zones.append(zone)
+        self._built = False
+
+    @classmethod
+    def load(cls, path: str) -> "Geofence":
+        """
+        Charge une géofence JSON :
+            {"origin": [lat, lon], "cell_m": 5, "ceiling_m": 120,
+             "inclusions": [{"name": "terrain", "points": [[lat, lon], ...], "ceiling_m": 50}],
+             "exclusions": [{"name": "route", "points": [[lat, lon], ...]}]}
+        """
+        with open(path) as f:
+            data = json.load(f)
+        fence = cls(tuple(data["origin"]) if "origin" in data else None,
+                    data.get("cell_m", 5.0), data.get("ceiling_m"))
+        for zone in data.get("inclusions", []):
+            fence.add_inclusion(zone["points"], zone.get("ceiling_m"), zone.get("name"))
+        for zone in data.get("exclusions", []):
+            fence.add_exclusion(zone["points"], zone.get("name"))
+        return fence
+
+    # ------------- Index -------------
+
+    def build(self):
+        """Projette les zones et précalcule la grille (appelé automatiquement au premier contrôle)."""
+        if not self.zones:
+            raise ValueError("Géofence vide")
+        if self.origin is None:
+            self.origin = tuple(self.zones[0].points[0])
+        self.frame = LocalFrame(self.origin[0], self.origin[1])
+        polys = [self.frame.to_enu(z.points[:, 0], z.points[:, 1])[:, :2] for z in self.zones]
+        self._polys = polys
+        self._has_inclusion = any(z.inclusion for z in self.zones)
+
+        cell = self.cell_m
+        allxy = np.vstack(polys)
+        self._x0, self._y0 = (float(v) for v in allxy.min(axis=0) - cell)
+        nx, ny = (np.ceil((allxy.max(axis=0) + cell - (self._x0, self._y0)) / cell)).astype(int)
+        self._nx, self._ny = int(nx), int(ny)
+        cx = self._x0 + (np.arange(self._nx) + 0.5) * cell
+        cy = self._y0 + (np.arange(self._ny) + 0.5) * cell
+        gx, gy = np.meshgrid(cx, cy)
+        gx, gy = gx.ravel(), gy.ravel()
+
+        # État du centre de chaque cellule, par zone : (n_cellules, n_zones)
+        center = np.stack([_points_in_polygon(gx, gy, p) for p in polys], axis=1)
+
+        # Cellules traversées par chaque arête : échantillonnage au quart de cellule,
+        # étendu aux 8 voisines (une arête qui touche une cellule passe à moins
+        # d'une cellule d'un échantillon)
+        boundary: Dict[int, Dict[int, List[Tuple[float, float, float, float]]]] = {}
+        for zi, p in enumerate(polys):
+            for a, b in zip(p, np.roll(p, -1, axis=0)):
+                steps = max(1, int(math.ceil(np.hypot(*(b - a)) / (cell / 4))))
+                s = np.linspace(0.0, 1.0, steps + 1)[:, None]
+                pts = a + s * (b - a)
+                ix = np.floor((pts[:, 0] - self._x0) / cell).astype(int)
+                iy = np.floor((pts[:, 1] - self._y0) / cell).astype(int)
+                cells = set()
+                for di in (-1, 0, 1):
+                    for dj in (-1, 0, 1):
+                        jx, jy = ix + di, iy + dj
+                        ok = (jx >= 0) & (jx < self._nx) & (jy >= 0) & (jy < self._ny)
+                        cells.update((jy[ok] * self._nx + jx[ok]).tolist())
+                edge = (float(a[0]), float(a[1]), float(b[0]), float(b[1]))
+                for k in cells:
+                    boundary.setdefault(k, {}).setdefault(zi, []).append(edge)
+
+        # Verdict des cellules intérieures : un calcul par combinaison de zones distincte
+        combos, inverse = np.unique(center, axis=0, return_inverse=True)
+        verdicts = [self._verdict(combo.tolist()) for combo in combos]
+        cells: List[Optional[Tuple[bool, str, Optional[str], Optional[float]]]] = \
+            [verdicts[i] for i in inverse.ravel().tolist()]
+        # Par cellule frontière : centre, état du centre par zone, arêtes par zone
+        self._boundary = {}
+        for k, per_zone in boundary.items():
+            cells[k] = None
+            self._boundary[k] = (float(gx[k]), float(gy[k]), center[k].tolist(), list(per_zone.items()))
+        self._cells = cells
+        self._built = True
+        logger.info("Géofence : %d zones, grille %dx%d de %.1f m, %d cellules frontière",
+                    len(self.zones), self._nx, self._ny, cell, len(self._boundary))
+
+    def _verdict(self, inside: Sequence[bool]) -> Tuple[bool, str, Optional[str], Optional[float]]:
+        """(ok horizontal, raison, zone interdite, plafond) d'après l'appartenance à chaque zone."""
+        ceiling = self.ceiling_m
+        included = not self._has_inclusion
+        zone_ceiling = None
+        for zone, flag in zip(self.zones, inside):
+            if not flag:
+                continue
+            if not zone.inclusion:
+                return False, "zone interdite", zone.name, ceiling
+            included = True
+            if zone.ceiling_m is None:
+                zone_ceiling = math.inf
+            elif zone_ceiling is None or zone.ceiling_m > zone_ceiling:
+                zone_ceiling = zone.ceiling_m
+        if not included:
+            return False, "hors zone autorisée", None, ceiling
+        if zone_ceiling is not None and zone_ceiling != math.inf:
+            ceiling = zone_ceiling if ceiling is None else min(ceiling, zone_ceiling)
+        return True, "", None, ceiling
+
+    # ------------- Contrôle -------------
+
+    def check(self, lat: float, lon: float, alt_m: Optional[float] = None) -> FenceCheck:
+        """
+        Contrôle d'un point, en temps constant.
+
+        Args:
+            lat, lon: Position (degrés)
+            alt_m: Altitude au-dessus du home (m), None = plafond non contrôlé
+        """
+        if not self._built:
+            self.build()
+        x, y, _ = self.frame.to_enu_point(lat, lon)
+        ix = int((x - self._x0) // self.cell_m)
+        iy = int((y - self._y0) // self.cell_m)
+        if not (0 <= ix < self._nx and 0 <= iy < self._ny):
+            if self._has_inclusion:
+                return FenceCheck(False, "hors zone autorisée")
+            ok, reason, zone, ceiling = True, "", None, self.ceiling_m
+        else:
+            k = iy * self._nx + ix
+            verdict = self._cells[k]
+            if verdict is None:
+                cx, cy, inside, per_zone = self._boundary[k]
+                inside = list(inside)
+                for zi, edges in per_zone:
+                    if _crossings(cx, cy, x, y, edges) & 1:
+                        inside[zi] = not inside[zi]
+                verdict = self._verdict(inside)
+            ok, reason, zone, ceiling = verdict
+        if not ok:
+            return FenceCheck(False, reason, zone, ceiling)
+        if alt_m is not None and ceiling is not None and alt_m > ceiling:
+            return FenceCheck(False, "plafond dépassé", None, ceiling)
+        return FenceCheck(True, ceiling_m=ceiling)
+
+    def contains(self, lats, lons) -> np.ndarray:
+        """Contrôle horizontal vectorisé de lots de points (planification de mission), sans la grille."""
+        if not self._built:
+            self.build()
+        enu = self.frame.to_enu(np.atleast_1d(lats), np.atleast_1d(lons))
+        inside = [_points_in_polygon(enu[:, 0], enu[:, 1], p) for p in self._polys]
+        ok = np.ones(len(enu), dtype=bool) if not self._has_inclusion else np.zeros(len(enu), dtype=bool)
+        for zone, flags in zip(self.zones, inside):
+            if zone.inclusion:
+                ok |= flags
+        for zone, flags in zip(self.zones, inside):
+            if not zone.inclusion:
+                ok &= ~flags
+        return ok
+
+
+class GeofenceMonitor:
+    """Contrôle la géofence à chaque MSP_RAW_GPS et déclenche l'action de secours."""
+
+    def __init__(self, fence: Geofence, action: Optional[str] = "hold",
+                 channels: Optional[Dict[int, int]] = None, armed_only: bool = True):
+        """
+        Args:
+            fence: Géofence à surveiller
+            action: "hold", "rth", "land", "disarm" ou None (signalement seul)
+            channels: Canaux à envoyer à la place de ceux de l'action (config AUX différente)
+            armed_only: N'agir que drone armé (les contrôles continuent au sol)
+        """
+        if action is not None and action not in ACTION_CHANNELS:
+            raise ValueError(f"Action géofence inconnue: {action}")
+        fence.build()
+        self.fence = fence
+        self.action = action
+        self.channels = channels
+        self.armed_only = armed_only
+        self.last: Optional[FenceCheck] = None
+        self.breach: Optional[FenceCheck] = None   # violation qui a déclenché l'action
+        self.triggered = False
+        self.triggered_at: Optional[float] = None
+        self.checks = 0
+        self.check_ns_total = 0
+        self.check_ns_max = 0
+        self._listeners: List[Callable[[FenceCheck], None]] = []
+        self._drone: Optional[INavDrone] = None
+
+    def add_listener(self, callback: Callable[[FenceCheck], None]):
+        """callback(violation), appelé dans le thread de polling au déclenchement (doit rester rapide)."""
+        self._listeners = self._listeners + [callback]
+
+    def attach(self, drone: INavDrone):
+        self._drone = drone
+        drone.add_telemetry_listener(self.on_telemetry)
+
+    def detach(self):
+        """Retire le listener et lève le verrou de la géofence (plus personne pour le faire ensuite)."""
+        if self._drone is not None:
+            self._drone.remove_telemetry_listener(self.on_telemetry)
+            if self.triggered:
+                self.triggered = False
+                release_action(self._drone, "geofence")
+            self._drone = None
+
+    @property
+    def mean_check_us(self) -> float:
+        """Coût moyen d'un contrôle (µs), altitude et conversion ENU comprises."""
+        return self.check_ns_total / self.checks / 1000 if self.checks else 0.0
+
+    @property
+    def max_check_us(self) -> float:
+        return self.check_ns_max / 1000
+
+    def on_telemetry(self, cmd: int, value: object, t_ns: int):
+        """Listener INavDrone : contrôle chaque position GPS avec fix."""
+        if cmd != INavDrone.MSP_RAW_GPS or value.fix_type < 2 or value.lat is None:
+            return
+        drone = self._drone
+        t0 = time.perf_counter_ns()
+        result = self.fence.check(value.lat, value.lon, drone.current_altitude())
+        dt = time.perf_counter_ns() - t0
+        self.checks += 1
+        self.check_ns_total += dt
+        if dt > self.check_ns_max:
+            self.check_ns_max = dt
+        self.last = result
+        if result.ok or self.triggered or (self.armed_only and not drone.armed):
+            return
+        self._trigger(result)
+
+    def _trigger(self, result: FenceCheck):
+        drone = self._drone
+        self.triggered = True
+        self.triggered_at = time.monotonic()
+        self.breach = result
+        if self.action is not None:
+            apply_action(drone, self.action, self.channels, source="geofence")
+        logger.error("Géofence violée (%s%s) : %s", result.reason,
+                     f" : {result.zone}" if result.zone else "", self.action or "aucune action")
+        for callback in self._listeners:
+            try:
+                callback(result)
+            except Exception as e:
+                logger.error("Geofence listener error: %s", e)
+
+    def clear(self):
+        """Lève le verrou après une violation : l'application reprend la main."""
+        self.triggered = False
+        self.breach = None
+        if self._drone is not None and release_action(self._drone, "geofence"):
+            logger.warning("Géofence : violation levée, contrôle rendu à l'application")
+
+
+def benchmark(fence: Geofence, n: int = 100_000, seed: int = 0) -> Tuple[float, float]:
+    """
+    Coût d'un contrôle (µs) sur n points tirés dans l'emprise de la géofence :
+    (grille, lancer de rayon direct sur tous les polygones) pour comparaison.
+    """
+    fence.build()
+    rng = np.random.default_rng(seed)
+    x = rng.uniform(fence._x0, fence._x0 + fence._nx * fence.cell_m, n)
+    y = rng.uniform(fence._y0, fence._y0 + fence._ny * fence.cell_m, n)
+    lats, lons, _ = fence.frame.to_geodetic(x, y)
+    lats, lons = lats.tolist(), lons.tolist()
+
+    t0 = time.perf_counter_ns()
+    grid = [fence.check(la, lo).ok for la, lo in zip(lats, lons)]
+    grid_us = (time.perf_counter_ns() - t0) / n / 1000
+
+    m = min(n, 2000)
+    t0 = time.perf_counter_ns()
+    direct = [bool(fence.contains(la, lo)[0]) for la, lo in zip(lats[:m], lons[:m])]
+    direct_us = (time.perf_counter_ns() - t0) / m / 1000
+    if grid[:m] != direct:
+        logger.warning("Géofence : %d désaccords grille / lancer de rayon",
+                       sum(a != b for a, b in zip(grid[:m], direct)))
+    return grid_us, direct_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Contrôle / benchmark d'une géofence JSON")
+    parser.add_argument("fence", help="Fichier JSON de la géofence (voir Geofence.load)")
+    parser.add_argument("--point", type=float, nargs="+", metavar=("LAT", "LON"),
+                        help="Contrôler un point : LAT LON [ALT]")
+    parser.add_argument("--bench", action="store_true", help="Mesurer le coût d'un contrôle")
+    parser.add_argument("-n", type=int, default=100_000)
+    args = parser.parse_args()
+    setup_logging()
+
+    fence = Geofence.load(args.fence)
+    fence.build()
+    print(f"{len(fence.zones)} zones, grille {fence._nx}x{fence._ny} de {fence.cell_m:g} m, "
+          f"{len(fence._boundary)} cellules frontière")
+    if args.point:
+        print(fence.check(*args.point[:3]))
+    if args.bench:
+        grid_us, direct_us = benchmark(fence, args.n)
+        print(f"contrôle : {grid_us:.2f} µs (grille) contre {direct_us:.1f} µs (lancer de rayon direct)")
+
+
+if __name__ == "__main__":
+    main()
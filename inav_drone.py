@@ -3,7 +3,20 @@ import struct
 import threading
 import time
 from dataclasses import dataclass
-from typing import Optional, Dict, List, Tuple
+from typing import Callable, Optional, Dict, List, Set, Tuple
+
+from altitude_filter import AltitudeFilter
+from arming import ArmResult, ArmingState, decode_inav_status, decode_status, decode_status_ex
+from capabilities import (
+    CapabilityCache, FCCapabilities,
+    decode_api_version, decode_board_info, decode_fc_variant, decode_fc_version, decode_uid,
+)
+from drone_logging import RateLimitedLogger, get_logger
+from failsafe import FailsafeSupervisor
+from flight_recorder import FlightRecorder, DIR_TX, DIR_RX, FLAG_ERROR, FLAG_MSP_V2
+from link_stats import LinkStats, LoopStats
+from link_watchdog import LinkWatchdog
+from msp_trace import Tracer
 
 
 # ===================== Métriques =====================
@@ -41,6 +54,143 @@ class NavStatus:
     # tu peux ajouter d’autres champs si tu décodes MSP_NAV_STATUS
 
 
+logger = get_logger()
+
+
+class MSPUnsupportedError(RuntimeError):
+    """Le FC a répondu par une trame d'erreur ('$M!') : commande inconnue ou refusée."""
+
+    def __init__(self, message: str, cmd: Optional[int] = None):
+        super().__init__(message)
+        self.cmd = cmd
+
+
+def _error_key(name: str, e: Exception) -> str:
+    """Clé d'agrégation d'une erreur de boucle, ex: "RAW_GPS timeout"."""
+    return f"{name} {'timeout' if isinstance(e, TimeoutError) else type(e).__name__}"
+
+
+def _is_link_error(e: Exception) -> bool:
+    """Erreur du port lui-même (SerialException, OSError), par opposition à un timeout MSP."""
+    return isinstance(e, OSError) and not isinstance(e, TimeoutError)
+
+
+# ===================== Trames MSP =====================
+
+def encode_msp_v1(cmd: int, payload: bytes = b'', header: bytes = b'$M<') -> bytes:
+    """
+    Construit une trame MSP v1 : header, longueur, cmd, payload, checksum XOR.
+    header : b'$M<' (client -> FC), b'$M>' (réponse FC), b'$M!' (erreur FC).
+    """
+    body = bytes([len(payload), cmd]) + payload
+    checksum = 0
+    for b in body:
+        checksum ^= b
+    return header + body + bytes([checksum])
+
+
+def _crc8_dvb_s2_table() -> bytes:
+    table = []
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0xD5) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return bytes(table)
+
+_CRC8_TABLE = _crc8_dvb_s2_table()
+
+def crc8_dvb_s2(data: bytes, crc: int = 0) -> int:
+    """CRC8 DVB-S2 (polynôme 0xD5) des trames MSP v2."""
+    for b in data:
+        crc = _CRC8_TABLE[crc ^ b]
+    return crc
+
+def encode_msp_v2(cmd: int, payload: bytes = b'', header: bytes = b'$X<') -> bytes:
+    """
+    Construit une trame MSP v2 : header, flag, cmd u16, longueur u16, payload, CRC8 DVB-S2.
+    header : b'$X<' (client -> FC), b'$X>' (réponse FC), b'$X!' (erreur FC).
+    """
+    body = struct.pack('<BHH', 0, cmd, len(payload)) + payload
+    return header + body + bytes([crc8_dvb_s2(body)])
+
+# En-têtes des trames FC -> client
+RESPONSE_HEADERS = (b'$M>', b'$M!', b'$X>', b'$X!')
+
+
+# ===================== Décodage MSP =====================
+
+def decode_attitude(payload: bytes) -> Optional[Attitude]:
+    """MSP_ATTITUDE : roll/pitch en 1/10°, cap en degrés."""
+    if len(payload) < 6:
+        return None
+    angx, angy, heading = struct.unpack('<hhh', payload[:6])
+    return Attitude(
+        roll=angx / 10.0,
+        pitch=angy / 10.0,
+        yaw=heading / 10.0,  # deci-degrees to degrees
+    )
+
+def decode_raw_gps(payload: bytes) -> Optional[GPSState]:
+    """MSP_RAW_GPS : fix, sats, lat/lon (1e-7°), alt (cm), vitesse (cm/s), cap (1/10°), HDOP (1/100)."""
+    if len(payload) < 18:
+        return None
+    fix, sats, lat_i, lon_i, alt_cm, speed_cms, gc_decdeg, hdop = struct.unpack('<BBllhhhH', payload[:18])
+    return GPSState(
+        lat=lat_i / 1e7,
+        lon=lon_i / 1e7,
+        alt=alt_cm / 100.0,           # cm to m
+        speed=speed_cms / 100.0,      # cm/s to m/s
+        ground_course=gc_decdeg / 10.0,  # deci-degrees to degrees
+        hdop=hdop / 100.0,            # HDOP
+        sats=sats,
+        fix_type=fix,
+    )
+
+def decode_altitude(payload: bytes) -> Optional[AltitudeState]:
+    """MSP_ALTITUDE : altitude estimée (cm) et vario (cm/s)."""
+    if len(payload) < 6:
+        return None
+    alt_cm, vario_cms = struct.unpack('<lh', payload[:6])
+    return AltitudeState(
+        estimated_alt=alt_cm / 100.0,  # cm to m
+        vario=float(vario_cms),        # cm/s
+    )
+
+def decode_analog(payload: bytes) -> Optional[BatteryState]:
+    """MSP_ANALOG : vbat (0.1 V), mAh consommés, RSSI, courant."""
+    if len(payload) < 7:
+        return None
+    vbat_raw = payload[0]          # 0.1V units
+    mah_drawn, rssi, amps = struct.unpack('<HHH', payload[1:7])
+    return BatteryState(
+        voltage=vbat_raw / 10.0,
+        mah=float(mah_drawn),
+    )
+
+def decode_rc(payload: bytes) -> Optional[Dict[int, int]]:
+    """MSP_RC : canaux RC en uint16 (µs), au moins 8 canaux."""
+    if len(payload) < 16:
+        return None
+    n_ch = len(payload) // 2
+    values = struct.unpack('<' + 'H' * n_ch, payload[:2 * n_ch])
+    return {i: v for i, v in enumerate(values, start=1)}
+
+def _decode_u16_list(payload: bytes) -> Optional[List[int]]:
+    n = len(payload) // 2
+    if n == 0:
+        return None
+    return list(struct.unpack('<' + 'H' * n, payload[:2 * n]))
+
+def decode_motor(payload: bytes) -> Optional[List[int]]:
+    """MSP_MOTOR : sortie de chaque moteur en uint16 (µs ou valeur DShot mise à l'échelle)."""
+    return _decode_u16_list(payload)
+
+def decode_servo(payload: bytes) -> Optional[List[int]]:
+    """MSP_SERVO : sortie de chaque servo en uint16 (µs)."""
+    return _decode_u16_list(payload)
+
+
 # ===================== Classe principale =====================
 
 class INavDrone:
@@ -48,23 +198,84 @@ class INavDrone:
     Contrôle d'un drone iNAV via MSP v1.
 
     - Connexion série / MSP
-    - Télémétrie : attitude, GPS, batterie, RC
+    - Télémétrie : attitude, GPS, batterie, RC, sorties moteurs / servos
     - Contrôle RC (MSP_SET_RAW_RC)
     - Navigation basique : go_to, follow_path, climb_to
     """
 
     # Command IDs MSP
+    MSP_API_VERSION = 1
+    MSP_FC_VARIANT = 2
+    MSP_FC_VERSION = 3
+    MSP_BOARD_INFO = 4
+    MSP_STATUS     = 101
+    MSP_SERVO      = 103
+    MSP_MOTOR      = 104
     MSP_RC         = 105
     MSP_RAW_GPS    = 106
     MSP_ATTITUDE   = 108
     MSP_ALTITUDE   = 109
     MSP_ANALOG     = 110
     MSP_NAV_STATUS = 121  # non utilisé pour l’instant
+    MSP_STATUS_EX  = 150
 
+    MSP_UID        = 160
     MSP_SET_RAW_RC = 200
     MSP_SET_WP     = 209
-
-    def __init__(self, port: str, baudrate: int = 115200, poll_interval: float = 0.1, rc_update_hz: float = 20.0):
+    MSP2_INAV_STATUS = 0x2000  # MSP v2
+
+    DEFAULT_TIMEOUT = 0.2  # s, timeout MSP fixe (et initial en mode adaptatif)
+    NO_DEADLINE_NS = 2 ** 63 - 1  # échéance de heartbeat quand le failsafe est inactif
+
+    # Télémétrie interrogée à chaque cycle de _poll_loop (dans cet ordre)
+    TELEMETRY_CMDS = (MSP_ATTITUDE, MSP_RAW_GPS, MSP_ALTITUDE, MSP_ANALOG, MSP_RC)
+
+    # cmd -> (nom, décodeur, attribut de l'instance mis à jour)
+    TELEMETRY_DECODERS: Dict[int, Tuple[str, Callable[[bytes], object], str]] = {
+        MSP_ATTITUDE: ("ATTITUDE", decode_attitude, "attitude"),
+        MSP_RAW_GPS:  ("RAW_GPS", decode_raw_gps, "gps"),
+        MSP_ALTITUDE: ("ALTITUDE", decode_altitude, "altitude"),
+        MSP_ANALOG:   ("ANALOG", decode_analog, "battery"),
+        MSP_RC:       ("RC", decode_rc, "rc_channels"),
+        MSP_MOTOR:    ("MOTOR", decode_motor, "motors"),
+        MSP_SERVO:    ("SERVO", decode_servo, "servos"),
+        MSP2_INAV_STATUS: ("INAV_STATUS", decode_inav_status, "arming"),
+        MSP_STATUS_EX:    ("STATUS_EX", decode_status_ex, "arming"),
+        MSP_STATUS:       ("STATUS", decode_status, "arming"),
+    }
+
+    # Sorties moteurs / servos, interrogées à outputs_hz (voir output_capture pour la haute fréquence)
+    OUTPUT_CMDS = (MSP_MOTOR, MSP_SERVO)
+
+    # Sources de l'état d'armement, par préférence (la première supportée est interrogée)
+    STATUS_CMDS = (MSP2_INAV_STATUS, MSP_STATUS_EX, MSP_STATUS)
+
+    # Commandes d'identité lues au sondage : cmd -> (champ de FCCapabilities, décodeur)
+    IDENTITY_CMDS: Dict[int, Tuple[str, Callable[[bytes], Optional[str]]]] = {
+        MSP_API_VERSION: ("api_version", decode_api_version),
+        MSP_FC_VARIANT:  ("fc_variant", decode_fc_variant),
+        MSP_FC_VERSION:  ("fc_version", decode_fc_version),
+        MSP_BOARD_INFO:  ("board_id", decode_board_info),
+        MSP_UID:         ("uid", decode_uid),
+    }
+
+    # Commandes dont le support est sondé à la connexion (résultat mis en cache)
+    PROBED_CMDS = TELEMETRY_CMDS + (MSP_NAV_STATUS,) + STATUS_CMDS + OUTPUT_CMDS
+    PROBE_ATTEMPTS = 2  # une commande muette est déclarée non supportée après N timeouts
+
+    def __init__(self, port: str, baudrate: int = 115200, poll_interval: float = 0.1, rc_update_hz: float = 20.0,
+                 adaptive_timeouts: bool = True, timeout_floor: float = 0.02, timeout_ceiling: float = 0.5,
+                 serial_factory: Optional[Callable[..., serial.Serial]] = None, status_hz: float = 2.0,
+                 outputs_hz: float = 5.0):
+        """
+        Args:
+            adaptive_timeouts: Timeout MSP par commande dérivé du RTT mesuré (sinon 0.2 s fixe)
+            timeout_floor / timeout_ceiling: Bornes du timeout adaptatif (s)
+            serial_factory: Ouverture du port, appelée comme serial.Serial(port, baudrate, timeout=...)
+                            (défaut : serial.Serial ; voir fc_simulator.SimulatedFC)
+            status_hz: Fréquence de lecture de l'état d'armement du FC (0 = jamais)
+            outputs_hz: Fréquence de lecture des sorties moteurs / servos (0 = jamais)
+        """
         self.port = port
         self.baudrate = baudrate
         self.poll_interval = poll_interval
@@ -75,6 +286,10 @@ class INavDrone:
         self._poll_thread: Optional[threading.Thread] = None
         self._rc_thread: Optional[threading.Thread] = None
         self._lock = threading.Lock()  # pour protéger le port série
+        # Une requête (envoi + lecture de la réponse) à la fois : un autre lecteur volerait ses trames
+        self._transaction_lock = threading.Lock()
+        self._serial_factory = serial_factory or serial.Serial
+        self.link_error: Optional[Exception] = None  # dernière erreur du port, effacée à la réouverture
 
         # Métriques
         self.attitude = Attitude()
@@ -82,26 +297,290 @@ class INavDrone:
         self.altitude = AltitudeState()
         self.battery = BatteryState()
         self.nav = NavStatus()
-        self.armed: bool = False
+        self.armed: bool = False  # état rapporté par le FC (voir arming)
+        self.arming: Optional[ArmingState] = None
+        self._arming_listeners: List[Callable[[Optional[ArmingState], ArmingState], None]] = []
+        self.status_interval_ns = int(1e9 / status_hz) if status_hz > 0 else 0
+        self._next_status_ns = 0
+        self.motors: List[int] = []  # sorties moteurs rapportées par le FC (MSP_MOTOR)
+        self.servos: List[int] = []  # sorties servos (MSP_SERVO)
+        self.outputs_interval_ns = int(1e9 / outputs_hz) if outputs_hz > 0 else 0
+        self._next_outputs_ns = 0
 
         # RC (1000–2000 µs)
         self.rc_channels: Dict[int, int] = {i: 1500 for i in range(1, 9)}  # 8 canaux lus du FC
         self._rc_channels_tx: Dict[int, int] = {i: 1500 for i in range(1, 9)}  # 8 canaux à envoyer
         self._rc_override_enabled = False  # Active la transmission continue MSP_SET_RAW_RC
+        self.rc_tx_t_ns = 0  # horodatage monotone (ns) du dernier MSP_SET_RAW_RC envoyé
+
+        self._last_rx_ns = 0  # horodatage monotone (ns) de la dernière trame reçue
+        self._last_rx_error = False  # la dernière trame reçue était une erreur '$M!' / '$X!'
+        self.telemetry_t_ns: Dict[int, int] = {}  # cmd -> horodatage de la dernière valeur décodée
+
+        # Fusion baro / vario / GPS de l'altitude, alimentée à chaque échantillon
+        self.altitude_filter = AltitudeFilter()
+
+        # Callbacks appelés à chaque télémétrie décodée : callback(cmd, valeur, t_ns)
+        self._telemetry_listeners: List[Callable[[int, object, int], None]] = [self._update_altitude_filter]
+
+        # Statistiques du lien MSP (RTT par commande, timeouts, erreurs, débits)
+        self.adaptive_timeouts = adaptive_timeouts
+        self.link_stats = LinkStats(self.DEFAULT_TIMEOUT, timeout_floor, timeout_ceiling)
+        self.poll_loop_stats = LoopStats(poll_interval)
+        self.rc_loop_stats = LoopStats(self.rc_update_interval)
+
+        # Erreurs des boucles : limitées / agrégées par clé, émises en arrière-plan
+        self._log = RateLimitedLogger(logger, window_s=10.0)
+
+        # Enregistreur de vol (trafic MSP brut), None = désactivé
+        self.recorder: Optional[FlightRecorder] = None
+
+        # Traceur des transactions MSP (format Chrome trace), None = désactivé
+        self.tracer: Optional[Tracer] = None
+
+        # Surveillance du lien et reconnexion automatique, None = désactivée
+        self.watchdog: Optional[LinkWatchdog] = None
+
+        # Failsafe applicatif : échéance du heartbeat (perf_counter_ns) vérifiée par _rc_loop
+        self.failsafe: Optional[FailsafeSupervisor] = None
+        self._heartbeat_deadline_ns = self.NO_DEADLINE_NS
+        # Sources de failsafe déclenchées ("heartbeat", "geofence") : set_rc_override ignoré tant qu'il en reste
+        self._failsafe_sources: Set[str] = set()
+
+        # Capacités du FC (identité + commandes supportées), renseignées par probe_capabilities()
+        self.capabilities: Optional[FCCapabilities] = None
+        self._unsupported: Set[int] = set()  # commandes sautées par la boucle de polling
+        self._streamed: Set[int] = set()     # commandes lues par un flux dédié (attitude_stream), sautées aussi
+
+        # Premier instantané complet de la télémétrie (signalé par _check_snapshot)
+        self.snapshot_ready = threading.Event()
+        self.first_snapshot_s: Optional[float] = None  # durée connect() -> instantané complet
+        self._connect_t0_ns = 0
 
     # ------------- Connexion / boucle de télémétrie -------------
 
-    def connect(self):
-        """Ouvre le port MSP et lance les boucles de télémétrie et RC."""
-        self._ser = serial.Serial(self.port, self.baudrate, timeout=0.2)
+    def connect(self, probe: bool = True, wait: bool = True, timeout: float = 2.0) -> bool:
+        """
+        Ouvre le port MSP, fait la poignée de main et lance les boucles de télémétrie et RC.
+
+        La poignée de main envoie d'un bloc les requêtes d'identité et de toute
+        la télémétrie (pipeline) : le premier instantané complet est en général
+        disponible au retour, sans attente fixe. Sur un FC déjà connu (cache
+        des capacités), les commandes non supportées ne sont même pas attendues.
+
+        Args:
+            probe: Poignée de main + sondage des commandes supportées (voir
+                   probe_capabilities) ; sinon la télémétrie arrive par la boucle de polling
+            wait: Attend le premier instantané complet (au plus `timeout` s)
+            timeout: Attente maximale de l'instantané (s)
+
+        Returns:
+            True si un instantané complet de la télémétrie est disponible
+            (durée depuis l'appel dans `first_snapshot_s`).
+        """
+        self._connect_t0_ns = time.perf_counter_ns()
+        self.first_snapshot_s = None
+        self.snapshot_ready.clear()
+        self.telemetry_t_ns.clear()
+
+        self._ser = self._open_serial()
+        self.link_error = None
+        if probe:
+            try:
+                self.probe_capabilities()
+            except Exception as e:
+                logger.warning("Sondage des capacités du FC impossible: %s", e)
         self._running = True
-        self._poll_thread = threading.Thread(target=self._poll_loop, daemon=True)
+        self._poll_thread = threading.Thread(target=self._poll_loop, name="inav-poll", daemon=True)
         self._poll_thread.start()
-        self._rc_thread = threading.Thread(target=self._rc_loop, daemon=True)
+        self._rc_thread = threading.Thread(target=self._rc_loop, name="inav-rc", daemon=True)
         self._rc_thread.start()
 
+        if wait:
+            return self.wait_for_snapshot(timeout)
+        return self.snapshot_ready.is_set()
+
+    def wait_for_snapshot(self, timeout: Optional[float] = None) -> bool:
+        """Attend que chaque télémétrie supportée ait été reçue au moins une fois."""
+        return self.snapshot_ready.wait(timeout)
+
+    def _check_snapshot(self):
+        """Signale snapshot_ready dès que toute la télémétrie supportée a une valeur."""
+        for cmd in self.TELEMETRY_CMDS:
+            if cmd not in self.telemetry_t_ns and cmd not in self._unsupported:
+                return
+        if self._connect_t0_ns:
+            self.first_snapshot_s = (time.perf_counter_ns() - self._connect_t0_ns) / 1e9
+            logger.info("Premier instantané de télémétrie complet en %.0f ms%s", self.first_snapshot_s * 1000,
+                        " (capacités en cache)" if self.capabilities and self.capabilities.from_cache else "")
+        self.snapshot_ready.set()
+
+    def probe_capabilities(self, use_cache: bool = True,
+                           cache: Optional[CapabilityCache] = None) -> FCCapabilities:
+        """
+        Lit l'identité du FC (API, variante, version, carte, UID) et détermine
+        quelles commandes de PROBED_CMDS il supporte.
+
+        Toutes les requêtes partent d'un bloc (voir _msp_request_many) et les
+        réponses de télémétrie mettent à jour l'état au fil de l'eau. Une
+        commande est non supportée si le FC répond par une trame d'erreur
+        ('$M!') ou ne répond pas après PROBE_ATTEMPTS salves. Le résultat est mis
+        en cache sur disque, indexé par UID + firmware : aux connexions
+        suivantes, dès que l'identité est reçue, les commandes connues comme non
+        supportées ne sont plus attendues.
+
+        À appeler avant le démarrage des boucles (connect() le fait).
+
+        Args:
+            use_cache: Lit le cache disque (il est toujours mis à jour)
+            cache: Cache à utiliser (défaut : ~/.cache/inav_drone/capabilities.json)
+        """
+        cache = cache or CapabilityCache()
+        caps = FCCapabilities()
+        self.capabilities = caps
+        wanted = list(self.IDENTITY_CMDS) + [c for c in self.PROBED_CMDS if c not in self.IDENTITY_CMDS]
+        replies: Dict[int, Optional[bytes]] = {}
+        cache_checked = not use_cache
+
+        def on_reply(cmd: int, payload: Optional[bytes]) -> bool:
+            nonlocal cache_checked
+            replies[cmd] = payload
+            identity = self.IDENTITY_CMDS.get(cmd)
+            if identity is not None:
+                if payload is not None:
+                    setattr(caps, identity[0], identity[1](payload))
+            elif payload is not None:
+                self._handle_frame(cmd, payload, self._last_rx_ns)
+            else:
+                # Refus explicite : définitif, l'instantané n'a pas à l'attendre
+                caps.supported.discard(cmd)
+                caps.unsupported.add(cmd)
+                self._unsupported.add(cmd)
+                if not self.snapshot_ready.is_set():
+                    self._check_snapshot()
+            if not cache_checked and all(c in replies for c in self.IDENTITY_CMDS):
+                cache_checked = True
+                cache.apply(caps)
+            return all(c in replies or c in caps.unsupported for c in wanted)
+
+        for _ in range(self.PROBE_ATTEMPTS):
+            pending = [c for c in wanted if c not in replies and c not in caps.unsupported]
+            if not pending:
+                break
+            self._msp_request_many(pending, on_reply)
+            if not cache_checked:
+                # Identité incomplète : le cache reste utilisable si la clé l'est
+                cache_checked = True
+                cache.apply(caps)
+
+        if not replies:
+            # Aucune réponse : lien coupé ou FC absent, pas une absence de support
+            raise TimeoutError("Aucune réponse du FC pendant le sondage des capacités")
+
+        # Un refus explicite contredisant le cache (firmware reconfiguré) le met à jour
+        probed = any(replies.get(c, b'') is None for c in self.PROBED_CMDS)
+        for cmd in self.PROBED_CMDS:
+            if caps.is_known(cmd):
+                continue
+            probed = True
+            if replies.get(cmd) is not None:
+                caps.supported.add(cmd)
+            else:
+                caps.unsupported.add(cmd)
+
+        if probed:
+            try:
+                cache.store(caps)
+            except OSError as e:
+                logger.warning("Écriture du cache de capacités impossible: %s", e)
+
+        self.capabilities = caps
+        self._unsupported = set(caps.unsupported)
+        if caps.unsupported:
+            logger.info("Commandes MSP non supportées par %s %s: %s", caps.fc_variant, caps.fc_version,
+                        ", ".join(MSP_COMMAND_NAMES.get(c, str(c)) for c in sorted(caps.unsupported)))
+        if not self.snapshot_ready.is_set():
+            self._check_snapshot()
+        return caps
+
+    def supports(self, cmd: int) -> bool:
+        """False si cmd est connue comme non supportée par le FC."""
+        return cmd not in self._unsupported
+
+    def _open_serial(self):
+        return self._serial_factory(self.port, self.baudrate, timeout=0.2)
+
+    def _reopen_serial(self):
+        """
+        Ferme et rouvre le port série (utilisé par le watchdog), puis vide le
+        buffer d'entrée : le parseur repart sur une trame complète.
+        """
+        with self._transaction_lock, self._lock:
+            old, self._ser = self._ser, None
+            if old is not None:
+                try:
+                    old.close()
+                except Exception:
+                    pass
+            ser = self._open_serial()
+            ser.reset_input_buffer()
+            self._ser = ser
+            self.link_error = None
+
+    def start_watchdog(self, **kwargs) -> LinkWatchdog:
+        """
+        Démarre la surveillance du lien : reconnexion automatique si la
+        télémétrie s'arrête ou si le port disparaît.
+
+        Args:
+            **kwargs: Options de LinkWatchdog (stall_s, backoff_initial, backoff_max, ...)
+        """
+        self.stop_watchdog()
+        self.watchdog = LinkWatchdog(self, **kwargs)
+        self.watchdog.start()
+        return self.watchdog
+
+    def stop_watchdog(self):
+        watchdog = self.watchdog
+        self.watchdog = None
+        if watchdog:
+            watchdog.stop()
+
+    def start_failsafe(self, timeout_s: float = 1.0, action: str = "hold", **kwargs) -> FailsafeSupervisor:
+        """
+        Exige un heartbeat() de l'application au moins toutes les timeout_s
+        secondes ; sinon la boucle RC applique l'action de secours.
+
+        Args:
+            timeout_s: Délai maximal entre deux heartbeat()
+            action: "hold", "rth", "land" ou "disarm"
+            **kwargs: Options de FailsafeSupervisor (channels)
+        """
+        self.stop_failsafe()
+        self.failsafe = FailsafeSupervisor(self, timeout_s, action, **kwargs)
+        self.failsafe.start()
+        return self.failsafe
+
+    def stop_failsafe(self):
+        failsafe = self.failsafe
+        if failsafe:
+            failsafe.stop()  # avant de retirer l'objet : la boucle RC ne doit plus voir d'échéance
+        self.failsafe = None
+
+    @property
+    def _failsafe_active(self) -> bool:
+        return bool(self._failsafe_sources)
+
+    def heartbeat(self):
+        """Signale que le code applicatif est vivant (sans effet si le failsafe est inactif)."""
+        failsafe = self.failsafe
+        if failsafe is not None:
+            failsafe.heartbeat()
+
     def disconnect(self):
         """Arrête les boucles et ferme le port série."""
+        self.stop_failsafe()
+        self.stop_watchdog()
         self._running = False
         if self._poll_thread:
             self._poll_thread.join(timeout=1.0)
@@ -110,13 +589,64 @@ class INavDrone:
         if self._ser:
             self._ser.close()
             self._ser = None
+        self.stop_recording()
+
+    # ------------- Enregistrement de vol -------------
+
+    def start_recording(self, path: str, **kwargs) -> FlightRecorder:
+        """
+        Démarre l'enregistrement binaire de toutes les trames MSP TX/RX.
+
+        Args:
+            path: Fichier de sortie (ex: "vol_001.msplog")
+            **kwargs: Options de FlightRecorder (codec='zlib'|'lzma'|None, level, chunk_size, flush_interval_s)
+        """
+        self.stop_recording()
+        self.recorder = FlightRecorder(path, **kwargs)
+        return self.recorder
+
+    def stop_recording(self):
+        """Arrête l'enregistrement en cours et ferme le fichier."""
+        recorder = self.recorder
+        self.recorder = None
+        if recorder:
+            recorder.close()
+
+    # ------------- Traçage -------------
+
+    def start_tracing(self, capacity: int = 100_000) -> Tracer:
+        """
+        Active le traçage des transactions MSP, attentes de verrou, envois RC et
+        itérations de boucles (buffer circulaire des `capacity` derniers événements).
+        """
+        self.tracer = Tracer(capacity)
+        return self.tracer
+
+    def stop_tracing(self, path: Optional[str] = None) -> Optional[Tracer]:
+        """Désactive le traçage ; écrit la trace Chrome/Perfetto dans `path` si fourni."""
+        tracer = self.tracer
+        self.tracer = None
+        if tracer is not None and path:
+            tracer.dump(path)
+        return tracer
 
     def _poll_loop(self):
         while self._running:
+            if self._ser is None:
+                # Port fermé pendant une reconnexion
+                time.sleep(self.poll_interval)
+                continue
+            t0 = time.perf_counter_ns()
             try:
                 self._update_metrics_once()
             except Exception as e:
-                print("[INavDrone] Poll error:", e)
+                self._log.error(_error_key("Poll", e), "Poll error: %s", e)
+            self._log.flush()
+            t1 = time.perf_counter_ns()
+            self.poll_loop_stats.record(t0, t1)
+            tracer = self.tracer
+            if tracer is not None:
+                tracer.complete("poll cycle", "loop", t0, t1)
             time.sleep(self.poll_interval)
 
     def _rc_loop(self):
@@ -125,95 +655,204 @@ class INavDrone:
         IMPORTANT: iNav requiert MSP_SET_RAW_RC à ≥5Hz pour éviter le failsafe RC.
         """
         while self._running:
+            t0 = time.perf_counter_ns()
+            sent = False
             try:
-                if self._rc_override_enabled:
-                    self._send_rc_channels()
+                failsafe = self.failsafe  # lu une fois : stop_failsafe() peut le retirer depuis un autre thread
+                if self._rc_override_enabled and self._ser is not None:
+                    if failsafe is not None and t0 > self._heartbeat_deadline_ns:
+                        failsafe._trigger(t0)  # envoie lui-même les canaux de secours
+                    else:
+                        self._send_rc_channels()
+                    sent = True
             except Exception as e:
-                print("[INavDrone] RC loop error:", e)
+                if _is_link_error(e):
+                    self.link_error = e
+                self._log.error(_error_key("RC loop", e), "RC loop error: %s", e)
+            t1 = time.perf_counter_ns()
+            self.rc_loop_stats.record(t0, t1)
+            tracer = self.tracer
+            if tracer is not None and sent:
+                tracer.complete("rc send", "rc", t0, t1)
             time.sleep(self.rc_update_interval)
 
     def _update_metrics_once(self):
         """Lit une fois chaque télémétrie principale via MSP (bloquant court)."""
-        # ATTITUDE
-        try:
-            payload = self._msp_request(self.MSP_ATTITUDE)
-            if payload and len(payload) >= 6:
-                angx, angy, heading = struct.unpack('<hhh', payload[:6])
-                self.attitude.roll = angx / 10.0
-                self.attitude.pitch = angy / 10.0
-                self.attitude.yaw = heading / 10.0  # deci-degrees to degrees
-        except Exception as e:
-            print("[INavDrone] ATTITUDE error:", e)
-
-        # RAW_GPS
-        try:
-            payload = self._msp_request(self.MSP_RAW_GPS)
-            if payload and len(payload) >= 18:
-                fix, sats, lat_i, lon_i, alt_cm, speed_cms, gc_decdeg, hdop = struct.unpack('<BBllhhhH', payload[:18])
-                self.gps.fix_type = fix
-                self.gps.sats = sats
-                self.gps.lat = lat_i / 1e7
-                self.gps.lon = lon_i / 1e7
-                self.gps.alt = alt_cm / 100.0           # cm to m
-                self.gps.speed = speed_cms / 100.0      # cm/s to m/s
-                self.gps.ground_course = gc_decdeg / 10.0  # deci-degrees to degrees
-                self.gps.hdop = hdop / 100.0            # HDOP
-        except Exception as e:
-            print("[INavDrone] RAW_GPS error:", e)
-
-        # ALTITUDE
-        try:
-            payload = self._msp_request(self.MSP_ALTITUDE)
-            if payload and len(payload) >= 6:
-                alt_cm, vario_cms = struct.unpack('<lh', payload[:6])
-                self.altitude.estimated_alt = alt_cm / 100.0  # cm to m
-                self.altitude.vario = float(vario_cms)        # cm/s
-        except Exception as e:
-            print("[INavDrone] ALTITUDE error:", e)
-
-        # ANALOG (bat)
-        try:
-            payload = self._msp_request(self.MSP_ANALOG)
-            if payload and len(payload) >= 7:
-                vbat_raw = payload[0]          # 0.1V units
-                mah_drawn, rssi, amps = struct.unpack('<HHH', payload[1:7])
-                self.battery.voltage = vbat_raw / 10.0
-                self.battery.mah = float(mah_drawn)
-        except Exception as e:
-            print("[INavDrone] ANALOG error:", e)
-
-        # RC
-        try:
-            payload = self._msp_request(self.MSP_RC)
-            if payload and len(payload) >= 16:
-                n_ch = len(payload) // 2
-                values = struct.unpack('<' + 'H' * n_ch, payload)
-                for i, v in enumerate(values, start=1):
-                    self.rc_channels[i] = v
-        except Exception as e:
-            print("[INavDrone] RC error:", e)
+        for cmd in self.TELEMETRY_CMDS:
+            if cmd in self._unsupported or cmd in self._streamed:
+                continue
+            try:
+                payload = self._msp_request(cmd)
+                self._handle_frame(cmd, payload, self._last_rx_ns)
+            except Exception as e:
+                name = MSP_COMMAND_NAMES.get(cmd, str(cmd))
+                self._log.error(_error_key(name, e), "%s error: %s", name, e)
+                if _is_link_error(e):
+                    # Port mort : inutile d'essayer les autres commandes
+                    self.link_error = e
+                    return
+
+        # État d'armement, à sa propre fréquence
+        if self.status_interval_ns:
+            now = time.perf_counter_ns()
+            cmd = self.status_cmd
+            if cmd is not None and now >= self._next_status_ns:
+                self._next_status_ns = now + self.status_interval_ns
+                try:
+                    self._handle_frame(cmd, self._msp_request(cmd), self._last_rx_ns)
+                except Exception as e:
+                    name = MSP_COMMAND_NAMES.get(cmd, str(cmd))
+                    self._log.error(_error_key(name, e), "%s error: %s", name, e)
+                    if _is_link_error(e):
+                        self.link_error = e
+                        return
+
+        # Sorties moteurs / servos, à leur propre fréquence
+        if self.outputs_interval_ns:
+            now = time.perf_counter_ns()
+            if now >= self._next_outputs_ns:
+                self._next_outputs_ns = now + self.outputs_interval_ns
+                for cmd in self.OUTPUT_CMDS:
+                    if cmd in self._unsupported:
+                        continue
+                    try:
+                        self._handle_frame(cmd, self._msp_request(cmd), self._last_rx_ns)
+                    except Exception as e:
+                        name = MSP_COMMAND_NAMES.get(cmd, str(cmd))
+                        self._log.error(_error_key(name, e), "%s error: %s", name, e)
+                        if _is_link_error(e):
+                            self.link_error = e
+                            return
+
+    def _handle_frame(self, cmd: int, payload: bytes, t_ns: Optional[int] = None):
+        """
+        Décode une trame de télémétrie reçue et met à jour l'état correspondant.
+        Utilisé par la boucle de polling et par le rejeu de vols enregistrés.
+
+        Returns:
+            L'objet décodé, ou None si la commande n'est pas de la télémétrie
+            connue ou si le payload est trop court.
+        """
+        entry = self.TELEMETRY_DECODERS.get(cmd)
+        if entry is None:
+            return None
+        _, decoder, attr = entry
+        value = decoder(payload)
+        if value is None:
+            return None
+
+        if attr == "arming":
+            if cmd != self.status_cmd:
+                return None  # source moins complète que celle interrogée (sondage à la connexion)
+            self._update_arming(value)
+        else:
+            setattr(self, attr, value)
+        if t_ns is None:
+            t_ns = time.monotonic_ns()
+        self.telemetry_t_ns[cmd] = t_ns
+        if not self.snapshot_ready.is_set():
+            self._check_snapshot()
+        for callback in self._telemetry_listeners:
+            try:
+                callback(cmd, value, t_ns)
+            except Exception as e:
+                self._log.error(_error_key("Telemetry listener", e), "Telemetry listener error: %s", e)
+        return value
+
+    def _update_altitude_filter(self, cmd: int, value: object, t_ns: int):
+        """Listener interne : intègre MSP_ALTITUDE et MSP_RAW_GPS (fix 3D) dans altitude_filter."""
+        if cmd == self.MSP_ALTITUDE:
+            self.altitude_filter.update_baro(t_ns / 1e9, value.estimated_alt, value.vario / 100.0)
+        elif cmd == self.MSP_RAW_GPS and value.fix_type >= 3 and value.alt is not None:
+            self.altitude_filter.update_gps(t_ns / 1e9, value.alt, value.hdop)
+
+    def _update_arming(self, state: ArmingState):
+        """Met à jour l'état d'armement et prévient les listeners s'il a changé."""
+        prev = self.arming
+        self.arming = state
+        self.armed = state.armed
+        if prev is not None and prev.armed == state.armed and prev.flags == state.flags:
+            return
+        for callback in self._arming_listeners:
+            try:
+                callback(prev, state)
+            except Exception as e:
+                self._log.error(_error_key("Arming listener", e), "Arming listener error: %s", e)
+
+    def add_arming_listener(self, callback: Callable[[Optional[ArmingState], ArmingState], None]):
+        """
+        Enregistre un callback(ancien, nouveau) appelé quand l'état armé ou les
+        arming flags rapportés par le FC changent (thread de polling).
+        """
+        if callback not in self._arming_listeners:
+            self._arming_listeners = self._arming_listeners + [callback]
+
+    def remove_arming_listener(self, callback: Callable[[Optional[ArmingState], ArmingState], None]):
+        self._arming_listeners = [cb for cb in self._arming_listeners if cb != callback]
+
+    @property
+    def status_cmd(self) -> Optional[int]:
+        """Commande interrogée pour l'état d'armement (la plus complète supportée)."""
+        for cmd in self.STATUS_CMDS:
+            if cmd not in self._unsupported:
+                return cmd
+        return None
+
+    def telemetry_age(self, cmd: int) -> Optional[float]:
+        """Âge (s) de la dernière valeur décodée pour cmd, None si jamais reçue."""
+        t_ns = self.telemetry_t_ns.get(cmd)
+        if t_ns is None:
+            return None
+        return (time.monotonic_ns() - t_ns) / 1e9
+
+    def add_telemetry_listener(self, callback: Callable[[int, object, int], None]):
+        """
+        Enregistre un callback appelé à chaque télémétrie décodée (thread de polling).
+
+        Args:
+            callback: fonction(cmd, valeur, t_ns) ; valeur est l'objet décodé
+                      (Attitude, GPSState, ...) et t_ns l'horodatage monotone de réception.
+                      Doit rester rapide : il s'exécute dans la boucle de télémétrie.
+        """
+        if callback not in self._telemetry_listeners:
+            # Copie : la boucle de polling itère sans verrou sur l'ancienne liste
+            self._telemetry_listeners = self._telemetry_listeners + [callback]
+
+    def remove_telemetry_listener(self, callback: Callable[[int, object, int], None]):
+        """Retire un callback enregistré par add_telemetry_listener."""
+        self._telemetry_listeners = [cb for cb in self._telemetry_listeners if cb != callback]
 
     # ------------- MSP bas niveau -------------
 
     def _msp_send(self, cmd: int, payload: bytes = b''):
-        """Envoie un paquet MSP v1 (-> FC)."""
+        """Envoie un paquet MSP (-> FC) : v1, ou v2 pour les commandes sur 16 bits (MSP2_*)."""
         if not self._ser:
             raise RuntimeError("Port série non ouvert")
 
-        length = len(payload)
-        header = b'$M<'  # Requête client -> FC
-        body = bytes([length, cmd]) + payload
-        checksum = 0
-        for b in body:
-            checksum ^= b
-
-        frame = header + body + bytes([checksum])
+        # Requête client -> FC
+        frame = encode_msp_v2(cmd, payload) if cmd > 0xFF else encode_msp_v1(cmd, payload)
 
+        tracer = self.tracer
+        if tracer is not None:
+            t_wait = time.perf_counter_ns()
         with self._lock:
+            if tracer is not None:
+                tracer.complete("serial lock wait", "lock", t_wait, time.perf_counter_ns())
             self._ser.write(frame)
+            self.link_stats.on_tx(len(frame))
+
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.record(DIR_TX, cmd, payload, FLAG_MSP_V2 if cmd > 0xFF else 0)
 
     def _msp_read_frame(self, expected_cmd: Optional[int] = None, timeout: float = 0.2) -> Tuple[int, bytes]:
-        """Lit un frame MSP v1 (depuis FC). Retourne (cmd_id, payload)."""
+        """
+        Lit un frame MSP v1 ou v2 (depuis FC). Retourne (cmd_id, payload).
+
+        Une trame d'erreur lève MSPUnsupportedError seulement si elle répond à
+        expected_cmd ; sans commande attendue (pipeline, rejeu), elle est
+        retournée comme les autres et signalée par self._last_rx_error.
+        """
         if not self._ser:
             raise RuntimeError("Port série non ouvert")
 
@@ -225,22 +864,28 @@ class INavDrone:
             if time.time() - start_time > timeout:
                 raise TimeoutError("Timeout MSP global")
 
-            # Cherche header '$M>' (réponse FC -> client)
+            # Cherche header '$M>' / '$X>' (réponse FC -> client) ou '$M!' / '$X!' (erreur)
             start = b''
-            while start != b'$M>':
+            while start not in RESPONSE_HEADERS:
                 ch = self._ser.read(1)
                 if not ch:
                     raise TimeoutError("Timeout MSP en lisant header")
                 start = (start + ch)[-3:]
-
-            # longueur + cmd
-            length_bytes = self._ser.read(1)
-            cmd_bytes = self._ser.read(1)
-            if len(length_bytes) < 1 or len(cmd_bytes) < 1:
-                raise TimeoutError("Timeout MSP longueur/cmd")
-
-            length = length_bytes[0]
-            cmd = cmd_bytes[0]
+            is_error = start[2:] == b'!'
+            is_v2 = start[1:2] == b'X'
+
+            if is_v2:
+                # flag u8, cmd u16, longueur u16
+                head = self._ser.read(5)
+                if len(head) < 5:
+                    raise TimeoutError("Timeout MSP v2 en-tête")
+                _, cmd, length = struct.unpack('<BHH', head)
+            else:
+                # longueur + cmd
+                head = self._ser.read(2)
+                if len(head) < 2:
+                    raise TimeoutError("Timeout MSP longueur/cmd")
+                length, cmd = head[0], head[1]
 
             payload = self._ser.read(length)
             if len(payload) < length:
@@ -250,49 +895,272 @@ class INavDrone:
             if len(checksum_rx) < 1:
                 raise TimeoutError("Timeout MSP checksum")
 
-            checksum_calc = 0
-            for b in (length_bytes + cmd_bytes + payload):
-                checksum_calc ^= b
+            if is_v2:
+                checksum_calc = crc8_dvb_s2(head + payload)
+            else:
+                checksum_calc = 0
+                for b in (head + payload):
+                    checksum_calc ^= b
             if checksum_calc != checksum_rx[0]:
                 # Checksum invalide, ignorer et continuer
+                self.link_stats.checksum_errors += 1
+                if self.tracer is not None:
+                    self.tracer.instant("checksum error", "msp", {"cmd": cmd})
                 continue
 
+            self._last_rx_ns = time.monotonic_ns()
+            self._last_rx_error = is_error
+            self.link_stats.on_rx(length + (9 if is_v2 else 6))
+            recorder = self.recorder
+            if recorder is not None:
+                recorder.record(DIR_RX, cmd, payload,
+                                (FLAG_ERROR if is_error else 0) | (FLAG_MSP_V2 if is_v2 else 0))
+
             # Si on attend une commande spécifique et ce n'est pas la bonne, ignorer
             if expected_cmd is not None and cmd != expected_cmd:
                 # Ignorer cette réponse et continuer à chercher
+                self.link_stats.unexpected_cmds += 1
+                if self.tracer is not None:
+                    self.tracer.instant("unexpected response", "msp", {"cmd": cmd, "expected": expected_cmd})
                 continue
 
+            if is_error:
+                self.link_stats.error_responses += 1
+                if expected_cmd is None:
+                    return cmd, payload
+                raise MSPUnsupportedError(f"Commande MSP {MSP_COMMAND_NAMES.get(cmd, cmd)} refusée par le FC", cmd)
+
             return cmd, payload
 
-    def _msp_request(self, cmd: int, timeout: float = 0.2) -> bytes:
-        """Envoie une requête MSP (payload vide) et lit la réponse."""
-        self._msp_send(cmd, b'')
-        _, payload = self._msp_read_frame(expected_cmd=cmd, timeout=timeout)
+    def _msp_request(self, cmd: int, timeout: Optional[float] = None) -> bytes:
+        """
+        Envoie une requête MSP (payload vide) et lit la réponse.
+
+        Sans timeout explicite, utilise le timeout adaptatif de la commande
+        (EWMA du RTT + 4 x variance, borné) ou DEFAULT_TIMEOUT si désactivé.
+        """
+        stats = self.link_stats.command(cmd)
+        if timeout is None:
+            timeout = self.link_stats.timeout_for(cmd) if self.adaptive_timeouts else self.DEFAULT_TIMEOUT
+        with self._transaction_lock:
+            stats.requests += 1
+            t0 = time.perf_counter_ns()
+            self._msp_send(cmd, b'')
+            try:
+                _, payload = self._msp_read_frame(expected_cmd=cmd, timeout=timeout)
+            except MSPUnsupportedError:
+                # Refus explicite du FC : inutile de la redemander à chaque cycle
+                self._unsupported.add(cmd)
+                raise
+            except TimeoutError:
+                self.link_stats.on_timeout(cmd)
+                if self.tracer is not None:
+                    self.tracer.complete(f"MSP {MSP_COMMAND_NAMES.get(cmd, cmd)}", "msp",
+                                         t0, time.perf_counter_ns(), {"cmd": cmd, "timeout": True})
+                raise
+            t1 = time.perf_counter_ns()
+            self.link_stats.on_response(cmd, t1 - t0)
+            if self.tracer is not None:
+                self.tracer.complete(f"MSP {MSP_COMMAND_NAMES.get(cmd, cmd)}", "msp", t0, t1,
+                                     {"cmd": cmd, "len": len(payload)})
         return payload
 
+    def _msp_request_many(self, cmds: List[int],
+                          on_reply: Callable[[int, Optional[bytes]], bool],
+                          timeout: Optional[float] = None) -> int:
+        """
+        Envoie plusieurs requêtes d'un bloc, puis lit les réponses au fil de l'eau.
+
+        on_reply(cmd, payload) est appelé pour chaque réponse attendue (payload
+        None pour une trame d'erreur '$M!') et retourne True pour arrêter la
+        lecture. Sinon, la lecture s'arrête quand toutes les commandes ont
+        répondu ou qu'aucune trame n'arrive pendant `timeout` s (défaut :
+        timeout adaptatif du lien).
+
+        Les RTT ne sont pas comptés dans les statistiques par commande : en
+        pipeline, ils incluent l'attente derrière les réponses précédentes.
+        Le verrou de transaction est tenu pendant toute la salve.
+
+        Returns:
+            Nombre de réponses reçues.
+        """
+        if timeout is None:
+            timeout = self.link_stats.link_rto.timeout if self.adaptive_timeouts else self.DEFAULT_TIMEOUT
+        with self._transaction_lock:
+            pending = set(cmds)
+            t0 = time.perf_counter_ns()
+            for cmd in cmds:
+                self._msp_send(cmd, b'')
+
+            received = 0
+            while pending:
+                try:
+                    cmd, payload = self._msp_read_frame(timeout=timeout)
+                except TimeoutError:
+                    break
+                if self._last_rx_error:
+                    payload = None
+                if cmd not in pending:
+                    self.link_stats.unexpected_cmds += 1
+                    continue
+                pending.discard(cmd)
+                received += 1
+                if on_reply(cmd, payload):
+                    break
+
+        if self.tracer is not None:
+            self.tracer.complete("MSP pipeline", "msp", t0, time.perf_counter_ns(),
+                                 {"sent": len(cmds), "received": received})
+        return received
+
+    def get_link_stats(self) -> Dict[str, object]:
+        """
+        Statistiques du lien MSP : compteurs globaux (trames/octets TX/RX, timeouts,
+        erreurs de checksum, réponses inattendues) et, par commande, RTT moyen/min/max,
+        percentiles et histogramme.
+        """
+        return self.link_stats.snapshot()
+
     # ------------- Sécurité / arming -------------
 
     def is_ready_to_arm(self) -> bool:
         """Check simple, à adapter selon ton setup."""
         if self.battery.voltage < 10.0:
             return False
+        # Causes d'interdiction rapportées par le FC
+        if self.arming is not None and self.arming.blocking:
+            return False
         # Si tu veux exiger GPS 3D:
         # if self.gps.fix_type < 3 or self.gps.sats < 6:
         #     return False
         return True
 
-    def arm(self):
-        """Arme le drone via canal ARM (AUX)."""
-        # Suppose que CH5 (AUX1) est le switch ARM : 1000=OFF, 2000=ON
-        self.set_rc_override({5: 2000})
-        self.armed = True
+    # Séquence d'armement : manches au neutre, gaz au ralenti, switch ARM (CH5) bas
+    ARM_CHANNEL = 5
+    ARM_IDLE_CHANNELS: Dict[int, int] = {1: 1500, 2: 1500, 3: 1000, 4: 1500, 5: 1000}
+
+    def read_arming_state(self, timeout: Optional[float] = None) -> Optional[ArmingState]:
+        """
+        Interroge immédiatement le FC (status_cmd) et met à jour drone.arming,
+        sans attendre le prochain cycle de polling.
+        Retourne None si le FC ne fournit aucune commande d'état.
+        """
+        cmd = self.status_cmd
+        if cmd is None:
+            return None
+        self._handle_frame(cmd, self._msp_request(cmd, timeout=timeout), self._last_rx_ns)
+        return self.arming
+
+    def wait_armed(self, armed: bool = True, timeout: float = 2.0,
+                   poll_interval: float = 0.01) -> Optional[ArmingState]:
+        """
+        Interroge l'état d'armement toutes les `poll_interval` s jusqu'à ce que
+        le FC rapporte `armed`. Retourne l'état atteint, ou None au timeout.
+        """
+        deadline = time.perf_counter() + timeout
+        while True:
+            state = self.read_arming_state()
+            if state is not None and state.armed == armed:
+                return state
+            if time.perf_counter() >= deadline:
+                return None
+            time.sleep(poll_interval)
+
+    def arm(self, timeout: float = 2.0, precondition_timeout: float = 2.0,
+            min_rc_s: float = 0.1, poll_interval: float = 0.01) -> ArmResult:
+        """
+        Arme le drone via le switch ARM (CH5) en boucle fermée sur l'état du FC.
+
+        1. precondition : envoie ARM_IDLE_CHANNELS (gaz au ralenti, CH5 bas) et
+           interroge l'état jusqu'à ce qu'aucun arming flag ne bloque (au moins
+           `min_rc_s` s de trames RC, pour que le FC valide le lien RC)
+        2. switch : passe CH5 à 2000 et interroge l'état toutes les
+           `poll_interval` s jusqu'à l'armement, ou jusqu'à l'apparition d'une
+           cause de blocage / `timeout` (CH5 est alors remis en bas)
+
+        Les canaux sont envoyés immédiatement à chaque étape ; l'override RC
+        est activé s'il ne l'était pas, pour que le FC continue de les recevoir.
+        Sans commande d'état (status_cmd None), le switch n'est pas envoyé :
+        un échec n'est jamais rapporté après une commande d'armement.
+
+        Returns:
+            ArmResult (évalué à True si armé) : latence switch -> armement,
+            durée totale, flags bloquants et raison en cas d'échec.
+        """
+        t0 = time.perf_counter()
+        polls = 0
+
+        def result(success: bool, phase: str, reason: str = "", state: Optional[ArmingState] = None,
+                   latency_s: Optional[float] = None) -> ArmResult:
+            blocking = state.blocking if state is not None else frozenset()
+            if reason:
+                logger.warning("Armement impossible (%s) : %s", phase, reason)
+            return ArmResult(success, phase, latency_s, time.perf_counter() - t0, polls, blocking, reason, state)
+
+        def poll() -> Optional[ArmingState]:
+            nonlocal polls
+            polls += 1
+            try:
+                return self.read_arming_state()
+            except TimeoutError:
+                return None  # requête perdue : la suivante part au prochain pas
+
+        if self._failsafe_active:
+            return result(False, "precondition", f"failsafe actif ({', '.join(sorted(self._failsafe_sources))})")
+        if self.status_cmd is None:
+            # Pas de retour d'état : un switch envoyé sans confirmation laisserait un FC
+            # peut-être armé derrière un échec, on ne le lève pas
+            return result(False, "precondition", "le FC ne rapporte pas l'état d'armement (switch non envoyé)")
+
+        if not self._rc_override_enabled:
+            self.enable_rc_override()
+
+        # 1. Pré-conditions
+        self._send_rc_priority(self.ARM_IDLE_CHANNELS)
+        t_rc = time.perf_counter()
+        deadline = t_rc + precondition_timeout
+        while True:
+            state = poll()
+            now = time.perf_counter()
+            if state is not None:
+                if state.armed:
+                    return result(True, "done", state=state, latency_s=0.0)
+                if not state.blocking and now - t_rc >= min_rc_s:
+                    break
+            if now >= deadline:
+                if state is None:
+                    return result(False, "precondition", "pas de réponse d'état du FC")
+                return result(False, "precondition", "; ".join(state.describe()), state)
+            time.sleep(poll_interval)
+
+        # 2. Switch ARM
+        self._send_rc_priority({self.ARM_CHANNEL: 2000})
+        t_switch = time.perf_counter()
+        deadline = t_switch + timeout
+        while True:
+            state = poll()
+            now = time.perf_counter()
+            if state is not None and state.armed:
+                latency = now - t_switch
+                logger.info("Armé en %.0f ms (%d requêtes d'état)", latency * 1000, polls)
+                return result(True, "done", state=state, latency_s=latency)
+            if state is not None and state.blocking:
+                reason = "; ".join(state.describe())
+                break
+            if now >= deadline:
+                reason = f"pas d'armement après {timeout:.1f} s"
+                break
+            time.sleep(poll_interval)
+
+        self._send_rc_priority({self.ARM_CHANNEL: 1000})
+        return result(False, "switch", reason, state)
 
     def disarm(self):
-        self.set_rc_override({5: 1000})
-        self.armed = False
+        """Désarme par le chemin prioritaire : jamais bloqué par le verrou failsafe."""
+        self._send_rc_priority({self.ARM_CHANNEL: 1000})
 
     def emergency_stop(self):
-        """Désarmement immédiat."""
+        """Désarmement immédiat (envoi prioritaire, même failsafe déclenché)."""
         self.disarm()
 
     # ------------- Modes de vol via AUX -------------
@@ -318,8 +1186,8 @@ class INavDrone:
         else:
             raise ValueError(f"Mode inconnu: {mode}")
 
-        self.set_rc_override(overrides)
-        self.nav.mode = mode
+        if self.set_rc_override(overrides):
+            self.nav.mode = mode  # mode rapporté = mode commandé, pas celui refusé par le failsafe
 
     # ------------- RC override -------------
 
@@ -340,7 +1208,7 @@ class INavDrone:
         self._rc_override_enabled = False
         print("[INavDrone] RC override désactivé")
 
-    def set_rc_override(self, channels: Dict[int, int]):
+    def set_rc_override(self, channels: Dict[int, int]) -> bool:
         """
         Met à jour les valeurs des canaux RC : dict {num_channel: valeur 1000..2000}.
 
@@ -349,7 +1217,14 @@ class INavDrone:
 
         Args:
             channels: Dictionnaire {canal: valeur}, ex: {1: 1500, 5: 2000}
+
+        Returns:
+            False si les valeurs ont été ignorées (failsafe déclenché), True sinon.
         """
+        if self._failsafe_active:
+            self._log.warning("RC override failsafe", "Failsafe actif : set_rc_override(%s) ignoré", channels)
+            return False
+
         # Mets à jour notre état TX (à envoyer)
         for ch, val in channels.items():
             self._rc_channels_tx[ch] = val
@@ -357,6 +1232,7 @@ class INavDrone:
         # Si le override n'est pas activé, envoyer immédiatement (mode legacy)
         if not self._rc_override_enabled:
             self._send_rc_channels()
+        return True
 
     def _send_rc_channels(self):
         """
@@ -369,6 +1245,17 @@ class INavDrone:
         values = [self._rc_channels_tx.get(i, 1500) for i in range(1, n + 1)]
         payload = struct.pack('<' + 'H' * n, *values)
         self._msp_send(self.MSP_SET_RAW_RC, payload)
+        self.rc_tx_t_ns = time.monotonic_ns()
+
+    def _send_rc_priority(self, channels: Dict[int, int]):
+        """
+        Chemin prioritaire (failsafe, arrêt d'urgence) : applique les canaux
+        sans passer par le verrou failsafe et les envoie tout de suite, sans
+        attendre le prochain cycle de _rc_loop.
+        """
+        for ch, val in channels.items():
+            self._rc_channels_tx[ch] = val
+        self._send_rc_channels()
 
     # ------------- Navigation haut niveau -------------
 
@@ -421,18 +1308,59 @@ class INavDrone:
         # Met en mode NAV_WP pour que iNAV suive ce WP
         self.set_mode("NAV_WP")
 
-    def follow_path(self, wps: List[Tuple[float, float, float]], radius_m: float = 2.0):
+    def follow_path(self, wps: List[Tuple[float, float, float]], radius_m: float = 2.0,
+                    alt_tol_m: Optional[float] = None, timeout_s: float = 120.0, gps_timeout_s: float = 2.0):
         """
         Suit une liste de waypoints [(lat, lon, alt), ...] en séquence.
-        Version simple bloquante.
+        Version simple bloquante : passe au waypoint suivant quand la distance
+        horizontale au waypoint courant est sous radius_m.
+
+        Args:
+            radius_m: Rayon d'arrivée horizontal (m)
+            alt_tol_m: Exiger aussi l'altitude à alt_tol_m près (None = horizontal seulement)
+            timeout_s: Délai maximal par waypoint, TimeoutError au-delà
+            gps_timeout_s: Âge maximal de la position GPS, RuntimeError au-delà (position figée)
         """
+        from geodesy import haversine_m  # NumPy, requis seulement pour la navigation
+
         for (lat, lon, alt) in wps:
             print(f"[INavDrone] GoTo {lat:.7f}, {lon:.7f}, {alt:.1f} m")
             self.go_to(lat, lon, alt, radius_m)
-            # Attente naïve : tu peux améliorer en utilisant la distance réelle
-            time.sleep(2.0)
+            deadline = time.monotonic() + timeout_s
+            while self._running:
+                gps_age = self.telemetry_age(self.MSP_RAW_GPS)
+                if gps_age is None or gps_age > gps_timeout_s:
+                    raise RuntimeError(f"GPS sans mise à jour depuis {gps_timeout_s:.1f} s, suivi de trajectoire interrompu")
+                if self.gps.lat is not None and self.gps.lon is not None:
+                    distance = float(haversine_m(self.gps.lat, self.gps.lon, lat, lon))
+                    current_alt = self.current_altitude()
+                    alt_ok = alt_tol_m is None or (current_alt is not None and abs(current_alt - alt) <= alt_tol_m)
+                    if distance <= radius_m and alt_ok:
+                        break
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Waypoint {lat:.7f}, {lon:.7f} non atteint en {timeout_s:.0f} s")
+                time.sleep(0.2)
+
+    def current_altitude(self, use_estimated_alt: bool = True, fused: bool = True) -> Optional[float]:
+        """
+        Altitude courante (m) pour les tests de convergence.
 
-    def climb_to(self, target_alt_m: float, tol_m: float = 1.0, use_estimated_alt: bool = True):
+        Args:
+            use_estimated_alt: Repère de l'altitude estimée du FC (relative au home) ou du GPS
+            fused: Altitude fusionnée baro / vario / GPS (altitude_filter) si disponible,
+                sinon la dernière valeur brute. Dans le repère GPS, le filtre ne sert
+                qu'après une mesure GPS acceptée (écart GPS-baro inconnu avant) : d'ici
+                là, repli explicite sur gps.alt (None sans fix)
+        """
+        f = self.altitude_filter
+        if fused and use_estimated_alt and f.has_baro:
+            return f.altitude()
+        if fused and not use_estimated_alt and f.has_gps:
+            return f.gps_altitude()
+        return self.altitude.estimated_alt if use_estimated_alt else self.gps.alt
+
+    def climb_to(self, target_alt_m: float, tol_m: float = 1.0, use_estimated_alt: bool = True,
+                 fused: bool = True):
         """
         Monte/descend jusqu'à target_alt_m en gardant la position lat/lon actuelle.
         Utilise go_to(...) avec même lat/lon et altitude différente.
@@ -441,6 +1369,7 @@ class INavDrone:
             target_alt_m: Altitude cible en mètres (relative au home)
             tol_m: Tolérance d'altitude en mètres
             use_estimated_alt: Utiliser l'altitude estimée du FC (recommandé) ou GPS
+            fused: Tester la convergence sur l'altitude fusionnée (voir current_altitude)
         """
         if self.gps.lat is None or self.gps.lon is None:
             raise RuntimeError("Pas de GPS pour climb_to")
@@ -449,7 +1378,7 @@ class INavDrone:
 
         # Boucle de convergence
         while self._running:
-            current_alt = self.altitude.estimated_alt if use_estimated_alt else self.gps.alt
+            current_alt = self.current_altitude(use_estimated_alt, fused)
             if current_alt is not None and abs(current_alt - target_alt_m) <= tol_m:
                 break
             time.sleep(0.2)
@@ -471,7 +1400,9 @@ class INavDrone:
         Args:
             target_alt: Altitude cible en mètres (défaut: 5m)
         """
-        self.arm()
+        result = self.arm()
+        if not result:
+            raise RuntimeError(f"Décollage annulé, armement impossible : {result.reason}")
         self.set_mode("POSHOLD")
         self.climb_to(target_alt)
 
@@ -482,3 +1413,10 @@ class INavDrone:
         """
         self.climb_to(0.5, tol_m=0.5)
         self.disarm()
+
+
+# Nom lisible de chaque commande MSP déclarée sur INavDrone (ex: 108 -> "ATTITUDE")
+MSP_COMMAND_NAMES: Dict[int, str] = {
+    value: name.split("_", 1)[1] for name, value in vars(INavDrone).items()
+    if name.startswith(("MSP_", "MSP2_")) and isinstance(value, int)
+}
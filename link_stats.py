@@ -0,0 +1,265 @@
+"""
+Statistiques du lien MSP : histogrammes de RTT par commande et compteurs.
+
+Les compteurs sont de simples entiers Python, sans verrou propre : ils ne
+sont incrémentés que sous les verrous de INavDrone, qui sérialisent déjà les
+threads de polling, RC et de flux. Compteurs TX (on_tx) : verrou d'écriture
+du port (_lock). Requêtes, RX, erreurs, timeouts et RTT : verrou de
+transaction (_transaction_lock), tenu pour toute lecture de trame. Les
+lectures (snapshot) se font sans verrou et peuvent voir des valeurs
+légèrement décalées entre elles.
+"""
+
+import bisect
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Bornes supérieures des classes d'histogramme RTT (µs), la dernière classe est +inf
+RTT_BUCKETS_US: Tuple[int, ...] = (250, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000, 200000, 500000)
+
+
+class RtoEstimator:
+    """
+    Timeout adaptatif façon TCP (RFC 6298) à partir des RTT mesurés.
+
+    SRTT et RTTVAR sont des moyennes glissantes exponentielles du RTT et de son
+    écart ; timeout = SRTT + 4 * RTTVAR, borné par [floor, ceiling]. Après un
+    timeout, la valeur double (backoff) et l'échantillon suivant, ambigu (il
+    peut s'agir de la réponse tardive à la requête expirée), est ignoré
+    (algorithme de Karn).
+    """
+
+    __slots__ = ("floor", "ceiling", "srtt", "rttvar", "timeout", "_backoff")
+
+    ALPHA = 1 / 8
+    BETA = 1 / 4
+    K = 4
+
+    def __init__(self, initial: float = 0.2, floor: float = 0.02, ceiling: float = 0.5):
+        self.floor = floor
+        self.ceiling = ceiling
+        self.srtt: Optional[float] = None
+        self.rttvar = 0.0
+        self.timeout = min(max(initial, floor), ceiling)
+        self._backoff = False
+
+    def observe(self, rtt_s: float):
+        if self._backoff:
+            self._backoff = False
+            if self.srtt is not None:
+                self._update_timeout()
+            return
+        if self.srtt is None:
+            self.srtt = rtt_s
+            self.rttvar = rtt_s / 2
+        else:
+            self.rttvar += self.BETA * (abs(self.srtt - rtt_s) - self.rttvar)
+            self.srtt += self.ALPHA * (rtt_s - self.srtt)
+        self._update_timeout()
+
+    def on_timeout(self):
+        self._backoff = True
+        self.timeout = min(self.timeout * 2, self.ceiling)
+
+    def _update_timeout(self):
+        self.timeout = min(max(self.srtt + self.K * self.rttvar, self.floor), self.ceiling)
+
+
+class CommandStats:
+    """Compteurs, histogramme RTT et timeout adaptatif pour une commande MSP."""
+
+    __slots__ = ("requests", "responses", "timeouts", "rtt_sum_ns", "rtt_min_ns", "rtt_max_ns",
+                 "last_rtt_ns", "buckets", "rto")
+
+    def __init__(self, rto: Optional[RtoEstimator] = None):
+        self.requests = 0
+        self.responses = 0
+        self.timeouts = 0
+        self.rtt_sum_ns = 0
+        self.rtt_min_ns = 0
+        self.rtt_max_ns = 0
+        self.last_rtt_ns = 0
+        self.buckets = [0] * (len(RTT_BUCKETS_US) + 1)
+        self.rto = rto if rto is not None else RtoEstimator()
+
+    def observe(self, rtt_ns: int):
+        self.rto.observe(rtt_ns / 1e9)
+        self.responses += 1
+        self.rtt_sum_ns += rtt_ns
+        self.last_rtt_ns = rtt_ns
+        if self.responses == 1 or rtt_ns < self.rtt_min_ns:
+            self.rtt_min_ns = rtt_ns
+        if rtt_ns > self.rtt_max_ns:
+            self.rtt_max_ns = rtt_ns
+        self.buckets[bisect.bisect_left(RTT_BUCKETS_US, rtt_ns // 1000)] += 1
+
+    @property
+    def rtt_mean_s(self) -> float:
+        return self.rtt_sum_ns / self.responses / 1e9 if self.responses else 0.0
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Percentile approché (s) d'après l'histogramme : borne sup. de la classe atteinte."""
+        if not self.responses:
+            return None
+        target = q / 100.0 * self.responses
+        acc = 0
+        for i, n in enumerate(self.buckets):
+            acc += n
+            if acc >= target:
+                if i < len(RTT_BUCKETS_US):
+                    return min(RTT_BUCKETS_US[i] / 1e6, self.rtt_max_ns / 1e9)
+                return self.rtt_max_ns / 1e9
+        return self.rtt_max_ns / 1e9
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "requests": self.requests,
+            "responses": self.responses,
+            "timeouts": self.timeouts,
+            "rtt_mean_s": self.rtt_mean_s,
+            "rtt_min_s": self.rtt_min_ns / 1e9,
+            "rtt_max_s": self.rtt_max_ns / 1e9,
+            "rtt_p50_s": self.percentile(50),
+            "rtt_p99_s": self.percentile(99),
+            "histogram": self.histogram(),
+        }
+
+    def histogram(self) -> List[Tuple[float, int]]:
+        """[(borne supérieure en s, nombre)], la dernière borne vaut inf."""
+        bounds = [b / 1e6 for b in RTT_BUCKETS_US] + [float("inf")]
+        return list(zip(bounds, self.buckets))
+
+
+class LinkStats:
+    """Compteurs globaux du lien MSP et statistiques par commande."""
+
+    def __init__(self, rto_initial: float = 0.2, rto_floor: float = 0.02, rto_ceiling: float = 0.5):
+        self.rto_initial = rto_initial
+        self.rto_floor = rto_floor
+        self.rto_ceiling = rto_ceiling
+        # Estimateur global (toutes commandes confondues) : sert de timeout pour les
+        # commandes qui n'ont encore jamais répondu, pour qu'une commande muette
+        # échoue au rythme du lien et non au timeout initial.
+        self.link_rto = RtoEstimator(rto_initial, rto_floor, rto_ceiling)
+        self.commands: Dict[int, CommandStats] = {}
+        self.tx_frames = 0
+        self.tx_bytes = 0
+        self.rx_frames = 0
+        self.rx_bytes = 0
+        self.timeouts = 0
+        self.checksum_errors = 0
+        self.unexpected_cmds = 0
+        self.error_responses = 0  # trames d'erreur '$M!' (commande refusée)
+        self.started = time.monotonic()
+
+        self._rate_t = self.started
+        self._rate_tx = 0
+        self._rate_rx = 0
+
+    def command(self, cmd: int) -> CommandStats:
+        stats = self.commands.get(cmd)
+        if stats is None:
+            rto = RtoEstimator(self.rto_initial, self.rto_floor, self.rto_ceiling)
+            # setdefault : deux threads qui créent la même entrée obtiennent le même objet
+            stats = self.commands.setdefault(cmd, CommandStats(rto))
+        return stats
+
+    # ------------- Mise à jour (appelée par INavDrone) -------------
+
+    def on_tx(self, n_bytes: int):
+        self.tx_frames += 1
+        self.tx_bytes += n_bytes
+
+    def on_rx(self, n_bytes: int):
+        self.rx_frames += 1
+        self.rx_bytes += n_bytes
+
+    def on_response(self, cmd: int, rtt_ns: int):
+        self.command(cmd).observe(rtt_ns)
+        self.link_rto.observe(rtt_ns / 1e9)
+
+    def on_timeout(self, cmd: int):
+        self.timeouts += 1
+        stats = self.command(cmd)
+        stats.timeouts += 1
+        if stats.rto.srtt is not None:
+            # Commande qui répondait : le lien a ralenti, backoff global aussi
+            self.link_rto.on_timeout()
+        stats.rto.on_timeout()
+
+    def timeout_for(self, cmd: int) -> float:
+        """Timeout adaptatif (s) à utiliser pour la prochaine requête cmd."""
+        stats = self.command(cmd)
+        if stats.rto.srtt is None:
+            return self.link_rto.timeout
+        return stats.rto.timeout
+
+    # ------------- Lecture -------------
+
+    def byte_rates(self) -> Tuple[float, float]:
+        """Débits (TX, RX) en octets/s depuis l'appel précédent de byte_rates()."""
+        now = time.monotonic()
+        dt = now - self._rate_t
+        tx, rx = self.tx_bytes, self.rx_bytes
+        rates = ((tx - self._rate_tx) / dt, (rx - self._rate_rx) / dt) if dt > 0 else (0.0, 0.0)
+        self._rate_t, self._rate_tx, self._rate_rx = now, tx, rx
+        return rates
+
+    def snapshot(self) -> Dict[str, object]:
+        """Copie des compteurs sous forme de dict (avec débits moyens depuis le démarrage)."""
+        uptime = time.monotonic() - self.started
+        return {
+            "uptime_s": uptime,
+            "tx_frames": self.tx_frames,
+            "tx_bytes": self.tx_bytes,
+            "rx_frames": self.rx_frames,
+            "rx_bytes": self.rx_bytes,
+            "tx_bytes_per_s": self.tx_bytes / uptime if uptime > 0 else 0.0,
+            "rx_bytes_per_s": self.rx_bytes / uptime if uptime > 0 else 0.0,
+            "timeouts": self.timeouts,
+            "checksum_errors": self.checksum_errors,
+            "unexpected_cmds": self.unexpected_cmds,
+            "error_responses": self.error_responses,
+            "commands": {cmd: dict(stats.as_dict(), timeout_s=self.timeout_for(cmd))
+                         for cmd, stats in list(self.commands.items())},
+        }
+
+
+class LoopStats:
+    """
+    Timing d'une boucle périodique (RC, polling) : période et durée de travail
+    lissées (EWMA), maxima et nombre de dépassements de la période cible.
+    Écrit uniquement par le thread de la boucle.
+    """
+
+    __slots__ = ("target_period_s", "iterations", "overruns", "period_s", "period_max_s",
+                 "work_s", "work_max_s", "_last_start_ns")
+
+    ALPHA = 0.1  # poids du nouvel échantillon dans les moyennes lissées
+
+    def __init__(self, target_period_s: float):
+        self.target_period_s = target_period_s
+        self.iterations = 0
+        self.overruns = 0
+        self.period_s = 0.0
+        self.period_max_s = 0.0
+        self.work_s = 0.0
+        self.work_max_s = 0.0
+        self._last_start_ns = 0
+
+    def record(self, start_ns: int, end_ns: int):
+        """Enregistre une itération (horodatages time.perf_counter_ns début / fin de travail)."""
+        if self._last_start_ns:
+            period = (start_ns - self._last_start_ns) / 1e9
+            self.period_s = period if self.iterations == 1 else self.period_s + self.ALPHA * (period - self.period_s)
+            if period > self.period_max_s:
+                self.period_max_s = period
+        self._last_start_ns = start_ns
+
+        work = (end_ns - start_ns) / 1e9
+        self.work_s = work if self.iterations == 0 else self.work_s + self.ALPHA * (work - self.work_s)
+        if work > self.work_max_s:
+            self.work_max_s = work
+        if work > self.target_period_s:
+            self.overruns += 1
+        self.iterations += 1
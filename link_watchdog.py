@@ -0,0 +1,157 @@
+"""
+Surveillance du lien MSP et reconnexion automatique.
+
+Le LinkWatchdog tourne dans son propre thread et déclare le lien perdu quand :
+- la télémétrie la plus récente est plus vieille que `stall_s` (UART muet,
+  FC redémarré, câble débranché), ou
+- une boucle de INavDrone a rencontré une erreur du port série (VCP USB
+  disparu : SerialException / OSError).
+
+Il rouvre alors le port avec un backoff exponentiel, vide le buffer d'entrée
+(resynchronisation du parseur sur une trame complète), vérifie que le FC
+répond, renvoie immédiatement les canaux RC si l'override était actif, et
+signale la perte et la reprise aux callbacks enregistrés.
+
+Exemple:
+    watchdog = drone.start_watchdog(stall_s=1.0)
+    watchdog.add_reconnect_listener(lambda ev: print("lien rétabli", ev.downtime_s))
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from drone_logging import RateLimitedLogger, get_logger
+
+logger = get_logger()
+
+
+@dataclass
+class ReconnectEvent:
+    reason: str           # "stall" ou "serial error: ..."
+    lost_at: float        # time.monotonic() de la détection
+    recovered_at: float   # time.monotonic() de la reprise
+    attempts: int         # tentatives de réouverture
+
+    @property
+    def downtime_s(self) -> float:
+        return self.recovered_at - self.lost_at
+
+
+class LinkWatchdog:
+    """Détection de perte du lien MSP et reconnexion avec backoff."""
+
+    def __init__(self, drone, stall_s: float = 1.0, check_interval: float = 0.05,
+                 backoff_initial: float = 0.1, backoff_max: float = 5.0, verify_timeout: float = 0.3):
+        """
+        Args:
+            drone: INavDrone connecté
+            stall_s: Âge maximal de la télémétrie la plus récente avant de déclarer le lien perdu
+            check_interval: Période de vérification (s)
+            backoff_initial / backoff_max: Délais entre tentatives de réouverture (doublés à chaque échec)
+            verify_timeout: Timeout de la requête de vérification après réouverture
+        """
+        self.drone = drone
+        self.stall_s = stall_s
+        self.check_interval = check_interval
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.verify_timeout = verify_timeout
+
+        self.link_up = threading.Event()
+        self.link_up.set()
+        self.reconnects = 0
+        self.last_event: Optional[ReconnectEvent] = None
+
+        self._lost_listeners: List[Callable[[str], None]] = []
+        self._reconnect_listeners: List[Callable[[ReconnectEvent], None]] = []
+        self._log = RateLimitedLogger(logger, window_s=10.0)
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._since_ns = 0  # début de la période surveillée (démarrage ou dernière reprise)
+
+    # ------------- Callbacks -------------
+
+    def add_lost_listener(self, callback: Callable[[str], None]):
+        """callback(raison), appelé dans le thread du watchdog à la perte du lien."""
+        self._lost_listeners = self._lost_listeners + [callback]
+
+    def add_reconnect_listener(self, callback: Callable[[ReconnectEvent], None]):
+        """callback(ReconnectEvent), appelé dans le thread du watchdog à la reprise."""
+        self._reconnect_listeners = self._reconnect_listeners + [callback]
+
+    # ------------- Thread -------------
+
+    def start(self):
+        self._since_ns = time.monotonic_ns()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="inav-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def telemetry_age(self) -> float:
+        """Âge (s) de la télémétrie la plus récente, compté depuis le démarrage / la dernière reprise."""
+        newest = max(self.drone.telemetry_t_ns.values(), default=0)
+        return (time.monotonic_ns() - max(newest, self._since_ns)) / 1e9
+
+    def _run(self):
+        while self._running:
+            error = self.drone.link_error
+            if error is not None:
+                self._recover(f"serial error: {error}")
+            elif self.telemetry_age() > self.stall_s:
+                self._recover("stall")
+            time.sleep(self.check_interval)
+
+    # ------------- Reprise -------------
+
+    def _recover(self, reason: str):
+        lost_at = time.monotonic()
+        self.link_up.clear()
+        logger.warning("Lien MSP perdu (%s), reconnexion...", reason)
+        for callback in self._lost_listeners:
+            try:
+                callback(reason)
+            except Exception as e:
+                self._log.error(f"Watchdog listener {type(e).__name__}", "Watchdog listener error: %s", e)
+
+        delay = self.backoff_initial
+        attempts = 0
+        while self._running:
+            attempts += 1
+            try:
+                self.drone._reopen_serial()
+                self.drone._msp_request(self.drone.MSP_API_VERSION, timeout=self.verify_timeout)
+                break
+            except Exception as e:
+                self._log.warning(f"Reconnect {type(e).__name__}", "Reconnexion échouée: %s", e)
+                self._log.flush()
+            time.sleep(delay)
+            delay = min(delay * 2, self.backoff_max)
+        else:
+            return
+
+        # L'override RC reprend tout de suite, sans attendre le prochain cycle de la boucle RC
+        if self.drone._rc_override_enabled:
+            try:
+                self.drone._send_rc_channels()
+            except Exception as e:
+                logger.warning("Renvoi des canaux RC impossible: %s", e)
+
+        event = ReconnectEvent(reason, lost_at, time.monotonic(), attempts)
+        self._since_ns = time.monotonic_ns()
+        self.reconnects += 1
+        self.last_event = event
+        self.link_up.set()
+        logger.info("Lien MSP rétabli en %.0f ms (%d tentative(s))", event.downtime_s * 1000, attempts)
+        for callback in self._reconnect_listeners:
+            try:
+                callback(event)
+            except Exception as e:
+                self._log.error(f"Watchdog listener {type(e).__name__}", "Watchdog listener error: %s", e)
@@ -0,0 +1,215 @@
+"""
+Endpoint HTTP local au format texte Prometheus pour le process du drone.
+
+Serveur stdlib (http.server) dans un thread daemon. Le rendu ne lit que des
+attributs de INavDrone (compteurs, objets de télémétrie remplacés atomiquement)
+et ne prend jamais le verrou du port série : un scrape ne peut pas bloquer les
+threads de télémétrie ou RC.
+
+Exemple:
+    from metrics_server import MetricsServer
+
+    server = MetricsServer(drone, port=9105)
+    server.start()
+    # curl http://<pi>:9105/metrics
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+from drone_logging import get_logger
+from inav_drone import INavDrone, MSP_COMMAND_NAMES
+
+logger = get_logger()
+
+
+class _MetricsWriter:
+    """Accumulateur de lignes au format d'exposition texte Prometheus."""
+
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def metric(self, name: str, kind: str, help_text: str, samples):
+        """samples : liste de (labels dict ou None, valeur) ; ignore les valeurs None."""
+        samples = [(labels, value) for labels, value in samples if value is not None]
+        if not samples:
+            return
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            self.lines.append(f"{name}{_labels(labels)} {_value(value)}")
+
+    def render(self) -> bytes:
+        return ("\n".join(self.lines) + "\n").encode("utf-8")
+
+
+def _labels(labels: Optional[dict]) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{k}="{v}"' for k, v in labels.items())
+    return "{" + inner + "}"
+
+
+def _value(value) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _cmd_label(cmd: int) -> dict:
+    return {"cmd": MSP_COMMAND_NAMES.get(cmd, str(cmd))}
+
+
+def render_metrics(drone: INavDrone) -> bytes:
+    """Construit la page /metrics à partir de l'état courant du drone (sans verrou)."""
+    w = _MetricsWriter()
+    link = drone.link_stats
+
+    # ---- Lien MSP ----
+    w.metric("inav_msp_tx_frames_total", "counter", "Trames MSP envoyées", [(None, link.tx_frames)])
+    w.metric("inav_msp_tx_bytes_total", "counter", "Octets MSP envoyés", [(None, link.tx_bytes)])
+    w.metric("inav_msp_rx_frames_total", "counter", "Trames MSP valides reçues", [(None, link.rx_frames)])
+    w.metric("inav_msp_rx_bytes_total", "counter", "Octets MSP reçus (trames valides)", [(None, link.rx_bytes)])
+    w.metric("inav_msp_checksum_errors_total", "counter", "Trames rejetées (checksum)", [(None, link.checksum_errors)])
+    w.metric("inav_msp_unexpected_responses_total", "counter", "Réponses ignorées (cmd inattendue)",
+             [(None, link.unexpected_cmds)])
+    w.metric("inav_msp_error_responses_total", "counter", "Trames d'erreur du FC ('$M!')",
+             [(None, link.error_responses)])
+    w.metric("inav_msp_unsupported_commands", "gauge", "Commandes sautées car non supportées par le FC",
+             [(None, len(drone._unsupported))])
+
+    commands = list(link.commands.items())
+    w.metric("inav_msp_requests_total", "counter", "Requêtes MSP par commande",
+             [(_cmd_label(cmd), st.requests) for cmd, st in commands])
+    w.metric("inav_msp_timeouts_total", "counter", "Timeouts MSP par commande",
+             [(_cmd_label(cmd), st.timeouts) for cmd, st in commands])
+
+    w.metric("inav_msp_timeout_seconds", "gauge", "Timeout adaptatif courant par commande",
+             [(_cmd_label(cmd), link.timeout_for(cmd)) for cmd, _ in commands])
+
+    # Histogramme RTT (classes cumulées)
+    rtt_lines = []
+    for cmd, st in commands:
+        cumulative = 0
+        for bound, n in st.histogram():
+            cumulative += n
+            rtt_lines.append((dict(_cmd_label(cmd), le=_value(bound)), cumulative))
+    if rtt_lines:
+        w.lines.append("# HELP inav_msp_rtt_seconds Temps aller-retour des requêtes MSP")
+        w.lines.append("# TYPE inav_msp_rtt_seconds histogram")
+        for labels, value in rtt_lines:
+            w.lines.append(f"inav_msp_rtt_seconds_bucket{_labels(labels)} {value}")
+        for cmd, st in commands:
+            w.lines.append(f"inav_msp_rtt_seconds_sum{_labels(_cmd_label(cmd))} {_value(st.rtt_sum_ns / 1e9)}")
+            w.lines.append(f"inav_msp_rtt_seconds_count{_labels(_cmd_label(cmd))} {st.responses}")
+
+    # ---- Boucles ----
+    loops = [("rc", drone.rc_loop_stats), ("poll", drone.poll_loop_stats)]
+    _loop_metrics(w, loops)
+    watchdog = drone.watchdog
+    if watchdog is not None:
+        w.metric("inav_link_up", "gauge", "Lien MSP opérationnel (watchdog)", [(None, watchdog.link_up.is_set())])
+        w.metric("inav_link_reconnects_total", "counter", "Reconnexions du lien MSP", [(None, watchdog.reconnects)])
+    w.metric("inav_rc_override_enabled", "gauge", "Transmission continue MSP_SET_RAW_RC active",
+             [(None, drone._rc_override_enabled)])
+
+    # ---- Télémétrie ----
+    w.metric("inav_telemetry_age_seconds", "gauge", "Âge de la dernière valeur reçue par flux",
+             [({"stream": name}, drone.telemetry_age(cmd))
+              for cmd, (name, _, _) in INavDrone.TELEMETRY_DECODERS.items()])
+
+    battery = drone.battery
+    w.metric("inav_battery_voltage_volts", "gauge", "Tension batterie", [(None, battery.voltage)])
+    w.metric("inav_battery_consumed_mah", "gauge", "Capacité consommée", [(None, battery.mah)])
+
+    gps = drone.gps
+    w.metric("inav_gps_fix_type", "gauge", "Type de fix GPS (0, 2=2D, 3=3D)", [(None, gps.fix_type)])
+    w.metric("inav_gps_satellites", "gauge", "Satellites utilisés", [(None, gps.sats)])
+    w.metric("inav_gps_hdop", "gauge", "HDOP", [(None, gps.hdop)])
+    w.metric("inav_gps_latitude_degrees", "gauge", "Latitude", [(None, gps.lat)])
+    w.metric("inav_gps_longitude_degrees", "gauge", "Longitude", [(None, gps.lon)])
+    w.metric("inav_gps_altitude_meters", "gauge", "Altitude GPS", [(None, gps.alt)])
+    w.metric("inav_gps_speed_mps", "gauge", "Vitesse sol", [(None, gps.speed)])
+
+    altitude = drone.altitude
+    w.metric("inav_altitude_meters", "gauge", "Altitude estimée par le FC", [(None, altitude.estimated_alt)])
+    w.metric("inav_vario_cm_per_second", "gauge", "Variomètre", [(None, altitude.vario)])
+
+    w.metric("inav_motor_output", "gauge", "Sortie moteur rapportée par le FC (MSP_MOTOR)",
+             [({"motor": str(i)}, v) for i, v in enumerate(drone.motors, start=1) if v])
+    w.metric("inav_servo_output", "gauge", "Sortie servo rapportée par le FC (MSP_SERVO)",
+             [({"servo": str(i)}, v) for i, v in enumerate(drone.servos, start=1) if v])
+
+    w.metric("inav_armed", "gauge", "Drone armé (rapporté par le FC)", [(None, drone.armed)])
+    arming = drone.arming
+    if arming is not None:
+        w.metric("inav_arming_flags", "gauge", "Arming flags bruts du FC", [(None, arming.raw)])
+        w.metric("inav_arming_disabled", "gauge", "Causes actives d'interdiction d'armement",
+                 [({"flag": flag.name}, 1) for flag in sorted(arming.blocking, key=lambda f: f.value)])
+    return w.render()
+
+
+def _loop_metrics(w: _MetricsWriter, loops: List):
+    def samples(attr):
+        return [({"loop": name}, getattr(stats, attr)) for name, stats in loops]
+
+    w.metric("inav_loop_iterations_total", "counter", "Itérations de boucle", samples("iterations"))
+    w.metric("inav_loop_overruns_total", "counter", "Itérations plus longues que la période cible",
+             samples("overruns"))
+    w.metric("inav_loop_target_period_seconds", "gauge", "Période cible", samples("target_period_s"))
+    w.metric("inav_loop_period_seconds", "gauge", "Période mesurée (moyenne lissée)", samples("period_s"))
+    w.metric("inav_loop_period_max_seconds", "gauge", "Période maximale observée", samples("period_max_s"))
+    w.metric("inav_loop_work_seconds", "gauge", "Durée de travail par itération (moyenne lissée)",
+             samples("work_s"))
+    w.metric("inav_loop_work_max_seconds", "gauge", "Durée de travail maximale", samples("work_max_s"))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    drone: INavDrone = None
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_metrics(self.drone)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Pas de log par requête sur stdout
+        pass
+
+
+class MetricsServer:
+    """Serveur HTTP /metrics optionnel (stdlib uniquement)."""
+
+    def __init__(self, drone: INavDrone, host: str = "0.0.0.0", port: int = 9105):
+        self.drone = drone
+        self.host = host
+        self.port = port
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        handler = type("MetricsHandler", (_Handler,), {"drone": self.drone})
+        self._httpd = ThreadingHTTPServer((self.host, self.port), handler)
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info("Métriques Prometheus sur http://%s:%d/metrics", self.host, self.port)
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
@@ -0,0 +1,333 @@
+"""
+Banc de test moteurs : profil de gaz déclaratif, envoi RC sur échéances
+absolues et capture simultanée des sorties moteurs.
+
+Un profil est une suite de segments (Step : saut puis maintien, Ramp : rampe
+linéaire, Hold : maintien). MotorTestRunner envoie une trame MSP_SET_RAW_RC
+à chaque échéance t0 + k / rate_hz (pas de dérive, contrairement à une
+boucle de time.sleep()), pendant qu'une OutputCapture lit MSP_MOTOR au débit
+maximal du lien. Le résultat aligne, pour chaque échantillon moteur, la
+commande de gaz en vigueur, et calcule le retard de réponse de chaque moteur
+à chaque saut de commande.
+
+⚠️ HÉLICES RETIRÉES OBLIGATOIRE ⚠️
+
+Exemple:
+    profile = ThrottleProfile([Ramp(1150, 5.0), Hold(2.0), Step(1300, 1.0), Step(1000, 0.5)])
+    result = MotorTestRunner(drone).run(profile)
+    print(result.response_delay_s)        # médiane par moteur (s)
+
+    python motor_test.py /dev/ttyACM0 --profile "step:1200:1,ramp:1400:2,step:1000:0.5" -o essai.npz
+"""
+
+import argparse
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+
+from drone_logging import get_logger, setup_logging
+from inav_drone import INavDrone
+from output_capture import OutputCapture
+
+logger = get_logger()
+
+THROTTLE_CHANNEL = 3
+THROTTLE_IDLE = 1000
+
+
+# ===================== Profil =====================
+
+@dataclass
+class Step:
+    throttle: int       # µs, appliqué immédiatement
+    duration_s: float   # maintien
+
+
+@dataclass
+class Ramp:
+    throttle: int       # µs atteints à la fin du segment
+    duration_s: float   # rampe linéaire depuis la valeur précédente
+
+
+@dataclass
+class Hold:
+    duration_s: float   # maintien de la valeur précédente
+
+
+Segment = Union[Step, Ramp, Hold]
+
+
+class ThrottleProfile:
+    """Profil de gaz : commande (µs) en fonction du temps depuis le début du test."""
+
+    def __init__(self, segments: Sequence[Segment], start: int = THROTTLE_IDLE):
+        self.segments = list(segments)
+        self.start = start
+        # (début du segment, valeur au début, segment)
+        self._table = []
+        t, value = 0.0, start
+        for seg in self.segments:
+            self._table.append((t, value, seg))
+            t += seg.duration_s
+            if not isinstance(seg, Hold):
+                value = seg.throttle
+        self.duration_s = t
+        self.end = value
+
+    @property
+    def max_throttle(self) -> int:
+        return max([self.start] + [s.throttle for s in self.segments if not isinstance(s, Hold)])
+
+    def throttle_at(self, t: float) -> int:
+        if t >= self.duration_s:
+            return self.end
+        for t_start, initial, seg in reversed(self._table):
+            if t >= t_start:
+                if isinstance(seg, Step):
+                    return seg.throttle
+                if isinstance(seg, Ramp) and seg.duration_s > 0:
+                    return int(round(initial + (seg.throttle - initial) * (t - t_start) / seg.duration_s))
+                return initial
+        return self.start
+
+    @classmethod
+    def parse(cls, spec: str, start: int = THROTTLE_IDLE) -> "ThrottleProfile":
+        """"step:1200:1,ramp:1400:2,hold:1" -> ThrottleProfile."""
+        segments: List[Segment] = []
+        for item in spec.split(","):
+            kind, *args = item.strip().split(":")
+            if kind == "step":
+                segments.append(Step(int(args[0]), float(args[1])))
+            elif kind == "ramp":
+                segments.append(Ramp(int(args[0]), float(args[1])))
+            elif kind == "hold":
+                segments.append(Hold(float(args[0])))
+            else:
+                raise ValueError(f"Segment de profil inconnu: {item}")
+        return cls(segments, start)
+
+
+# ===================== Résultat =====================
+
+@dataclass
+class MotorTestResult:
+    t_cmd: np.ndarray           # s depuis le début, envoi effectif de chaque trame RC
+    throttle_cmd: np.ndarray    # µs, gaz envoyés
+    late_s: np.ndarray          # retard de chaque envoi sur son échéance
+    t: np.ndarray               # s depuis le début, réception de chaque échantillon moteur
+    command: np.ndarray         # gaz en vigueur à chaque échantillon (aligné sur t)
+    motors: np.ndarray          # (n, moteurs) sorties rapportées par le FC
+    step_times: np.ndarray      # s, envoi des sauts de commande analysés
+    delays: np.ndarray          # (sauts, moteurs) retard de réponse (s), NaN si pas de réponse
+    aborted: str = ""           # raison de l'arrêt anticipé, "" si profil complet
+
+    @property
+    def response_delay_s(self) -> np.ndarray:
+        """Retard de réponse médian par moteur (s), NaN si aucun saut n'a répondu."""
+        if not len(self.delays):
+            return np.full(self.motors.shape[1], np.nan)
+        out = np.full(self.delays.shape[1], np.nan)
+        for i in range(self.delays.shape[1]):
+            col = self.delays[:, i]
+            col = col[~np.isnan(col)]
+            if len(col):
+                out[i] = np.median(col)
+        return out
+
+    @property
+    def sample_period_s(self) -> float:
+        """Période moyenne de la capture : résolution des retards mesurés."""
+        return float(np.mean(np.diff(self.t))) if len(self.t) > 1 else float("nan")
+
+    def save(self, path: str):
+        np.savez(path, t_cmd=self.t_cmd, throttle_cmd=self.throttle_cmd, late_s=self.late_s,
+                 t=self.t, command=self.command, motors=self.motors,
+                 step_times=self.step_times, delays=self.delays)
+
+
+def response_delays(t_cmd: np.ndarray, throttle_cmd: np.ndarray, t: np.ndarray, motors: np.ndarray,
+                    start: int = THROTTLE_IDLE, min_step: int = 20, threshold: int = 5) -> tuple:
+    """
+    Retard de réponse de chaque moteur à chaque saut de commande d'au moins
+    `min_step` µs : temps entre l'envoi et le premier échantillon dont la
+    sortie a bougé d'au moins `threshold` dans le sens du saut (les rampes,
+    faites de petits pas, ne sont pas analysées). `start` est la commande en
+    vigueur avant la première trame.
+
+    Returns:
+        (instants des sauts, retards (sauts, moteurs) avec NaN si pas de réponse
+        avant le saut suivant)
+    """
+    prev = np.concatenate(([start], throttle_cmd[:-1])).astype(np.int64)
+    jumps = np.nonzero(np.abs(throttle_cmd.astype(np.int64) - prev) >= min_step)[0]
+    step_times = t_cmd[jumps]
+    delays = np.full((len(jumps), motors.shape[1]), np.nan)
+    for k, j in enumerate(jumps):
+        t_step = t_cmd[j]
+        t_next = step_times[k + 1] if k + 1 < len(jumps) else np.inf
+        direction = np.sign(int(throttle_cmd[j]) - int(prev[j]))
+        i0 = np.searchsorted(t, t_step)
+        if i0 == 0 or i0 >= len(t):
+            continue
+        before = motors[i0 - 1].astype(np.int64)
+        i1 = np.searchsorted(t, t_next)
+        moved = direction * (motors[i0:i1].astype(np.int64) - before) >= threshold
+        for m in range(motors.shape[1]):
+            hits = np.nonzero(moved[:, m])[0]
+            if len(hits):
+                delays[k, m] = t[i0 + hits[0]] - t_step
+    return step_times, delays
+
+
+# ===================== Exécution =====================
+
+class MotorTestRunner:
+    """Exécute un ThrottleProfile en capturant les sorties moteurs."""
+
+    def __init__(self, drone: INavDrone, rate_hz: float = 50.0, max_throttle: int = 1700,
+                 tail_s: float = 0.3, min_step: int = 20, threshold: int = 5,
+                 capture_hz: Optional[float] = 2000.0):
+        """
+        Args:
+            drone: INavDrone connecté
+            rate_hz: Fréquence d'envoi des trames RC
+            max_throttle: Gaz maximal accepté dans un profil (sécurité)
+            tail_s: Capture prolongée après la dernière commande
+            min_step / threshold: Détection des sauts et des réponses (voir response_delays)
+            capture_hz: Fréquence maximale de la capture MSP_MOTOR (None = débit maximal du lien,
+                        capacité alors limitée à 100 000 échantillons)
+        """
+        self.drone = drone
+        self.interval_ns = int(1e9 / rate_hz)
+        self.max_throttle = max_throttle
+        self.tail_s = tail_s
+        self.min_step = min_step
+        self.threshold = threshold
+        self.capture_hz = capture_hz
+
+    def run(self, profile: ThrottleProfile, arm: bool = True) -> MotorTestResult:
+        """
+        Arme le drone (si arm), exécute le profil, revient au ralenti et
+        désarme (si arm, en attendant la confirmation du FC). Le profil s'arrête si le failsafe se
+        déclenche ou si le FC rapporte un désarmement.
+        """
+        if profile.max_throttle > self.max_throttle:
+            raise ValueError(f"Profil à {profile.max_throttle} µs au-delà de max_throttle ({self.max_throttle})")
+        drone = self.drone
+        if arm:
+            result = drone.arm()  # retourne tout de suite si le FC rapporte déjà l'armement
+            if not result:
+                raise RuntimeError(f"Test moteurs annulé, armement impossible : {result.reason}")
+
+        n_max = int(profile.duration_s * 1e9 / self.interval_ns) + 1
+        t_cmd = np.zeros(n_max, dtype=np.float64)
+        throttle_cmd = np.zeros(n_max, dtype=np.int32)
+        late = np.zeros(n_max, dtype=np.float64)
+        n = 0
+        aborted = ""
+
+        capacity = int((profile.duration_s + self.tail_s + 1.0) * self.capture_hz) if self.capture_hz else 100_000
+        capture = OutputCapture(drone, capacity=capacity, max_hz=self.capture_hz)
+        capture.start()
+        # Au moins un échantillon avant la première commande (référence du premier saut)
+        wait_until = time.monotonic() + 0.5
+        while not len(capture) and time.monotonic() < wait_until:
+            time.sleep(0.001)
+        t0_ns = time.monotonic_ns()
+        try:
+            for k in range(n_max):
+                deadline_ns = t0_ns + k * self.interval_ns
+                delay = deadline_ns - time.monotonic_ns()
+                if delay > 0:
+                    time.sleep(delay / 1e9)
+                if drone._failsafe_active:
+                    aborted = "failsafe"
+                    break
+                if arm and drone.arming is not None and not drone.armed:
+                    aborted = "désarmé par le FC"
+                    break
+                throttle = profile.throttle_at(k * self.interval_ns / 1e9)
+                drone._send_rc_priority({THROTTLE_CHANNEL: throttle})
+                sent_ns = time.monotonic_ns()
+                t_cmd[n] = sent_ns / 1e9
+                throttle_cmd[n] = throttle
+                late[n] = (sent_ns - deadline_ns) / 1e9
+                n += 1
+            time.sleep(self.tail_s)
+        finally:
+            if not drone._failsafe_active:
+                drone._send_rc_priority({THROTTLE_CHANNEL: THROTTLE_IDLE})
+            samples = capture.stop()
+            if arm:
+                drone.disarm()
+                if drone.status_cmd is not None:
+                    drone.wait_armed(False, timeout=1.0)
+        if aborted:
+            logger.warning("Test moteurs interrompu (%s) après %d trames", aborted, n)
+
+        t0 = t0_ns / 1e9
+        t_cmd, throttle_cmd, late = t_cmd[:n] - t0, throttle_cmd[:n], late[:n]
+        t = samples.t - t0
+        # Commande en vigueur à chaque échantillon : dernière trame envoyée avant sa réception
+        idx = np.searchsorted(t_cmd, t, side="right") - 1
+        command = np.full(len(t), profile.start, dtype=np.int32)
+        valid = idx >= 0
+        command[valid] = throttle_cmd[idx[valid]]
+        step_times, delays = response_delays(t_cmd, throttle_cmd, t, samples.motors, profile.start,
+                                             self.min_step, self.threshold)
+        return MotorTestResult(t_cmd, throttle_cmd, late, t, command, samples.motors,
+                               step_times, delays, aborted)
+
+
+def summarize(result: MotorTestResult) -> List[str]:
+    """Résumé lisible d'un essai."""
+    lines = [f"{len(result.t_cmd)} trames RC, retard d'envoi max {result.late_s.max() * 1000:.2f} ms"
+             if len(result.late_s) else "aucune trame RC envoyée",
+             f"{len(result.t)} échantillons moteurs (période {result.sample_period_s * 1000:.2f} ms)"]
+    n_motors = int((result.motors.max(axis=0) > 0).sum()) if len(result.motors) else 0
+    if not len(result.step_times):
+        lines.append("aucun saut de commande : retard de réponse non mesuré (rampes uniquement)")
+        n_motors = 0
+    delays = result.response_delay_s[:n_motors]
+    for i, d in enumerate(delays, start=1):
+        valid = int(np.sum(~np.isnan(result.delays[:, i - 1]))) if len(result.delays) else 0
+        text = f"{d * 1000:.1f} ms" if not np.isnan(d) else "pas de réponse"
+        lines.append(f"moteur {i}: retard médian {text} ({valid}/{len(result.step_times)} sauts)")
+    if result.aborted:
+        lines.append(f"interrompu : {result.aborted}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test moteurs sur profil de gaz (HÉLICES RETIRÉES)")
+    parser.add_argument("port", help="Port série du FC (ex: /dev/ttyACM0)")
+    parser.add_argument("--baudrate", type=int, default=115200)
+    parser.add_argument("--profile", default="step:1100:1,step:1200:1,step:1000:0.5",
+                        help="Segments step:µs:s, ramp:µs:s, hold:s séparés par des virgules")
+    parser.add_argument("--rate", type=float, default=50.0, help="Fréquence des trames RC (Hz)")
+    parser.add_argument("--max-throttle", type=int, default=1700)
+    parser.add_argument("-o", "--output", help="Fichier .npz de sortie")
+    args = parser.parse_args()
+    setup_logging()
+
+    profile = ThrottleProfile.parse(args.profile)
+    drone = INavDrone(args.port, baudrate=args.baudrate)
+    drone.connect()
+    try:
+        result = MotorTestRunner(drone, rate_hz=args.rate, max_throttle=args.max_throttle).run(profile)
+    except BaseException:
+        drone.emergency_stop()
+        raise
+    finally:
+        drone.disconnect()
+
+    print("\n".join(summarize(result)))
+    if args.output:
+        result.save(args.output)
+        print(f"écrit dans {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Traçage des transactions MSP au format Chrome trace / Perfetto.
+
+Le Tracer garde les derniers événements dans un buffer circulaire (deque
+bornée, append atomique sous le GIL, donc sans verrou) : requêtes MSP,
+attentes du verrou série, envois RC et itérations des boucles, avec le thread
+qui les a produits. dump() écrit un JSON ouvrable dans chrome://tracing ou
+https://ui.perfetto.dev pour inspecter visuellement les blocages.
+
+Exemple:
+    tracer = drone.start_tracing()
+    ...
+    drone.stop_tracing("trace.json")
+"""
+
+import collections
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+
+class Tracer:
+    """Buffer circulaire de spans (événements 'X') et d'instants (événements 'i')."""
+
+    def __init__(self, capacity: int = 100_000):
+        self.capacity = capacity
+        # (phase, nom, catégorie, tid, début ns, durée ns, args)
+        self._events = collections.deque(maxlen=capacity)
+        self._thread_names: Dict[int, str] = {}
+        self._pid = os.getpid()
+
+    def _tid(self) -> int:
+        tid = threading.get_ident()
+        if tid not in self._thread_names:
+            self._thread_names[tid] = threading.current_thread().name
+        return tid
+
+    # ------------- Enregistrement -------------
+
+    def complete(self, name: str, cat: str, start_ns: int, end_ns: int, args: Optional[dict] = None):
+        """Span terminé (horodatages time.perf_counter_ns)."""
+        self._events.append(('X', name, cat, self._tid(), start_ns, end_ns - start_ns, args))
+
+    def instant(self, name: str, cat: str, args: Optional[dict] = None):
+        """Événement ponctuel à l'instant présent."""
+        self._events.append(('i', name, cat, self._tid(), time.perf_counter_ns(), 0, args))
+
+    @contextmanager
+    def span(self, name: str, cat: str = "app", **args):
+        """Context manager : trace la durée du bloc."""
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.complete(name, cat, start, time.perf_counter_ns(), args or None)
+
+    def clear(self):
+        self._events.clear()
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    # ------------- Export -------------
+
+    def to_chrome(self) -> dict:
+        """Événements au format Chrome trace (JSON object format, temps en µs)."""
+        events = list(self._events)
+        out = [
+            {"ph": "M", "name": "thread_name", "pid": self._pid, "tid": tid, "args": {"name": name}}
+            for tid, name in list(self._thread_names.items())
+        ]
+        for ph, name, cat, tid, start_ns, dur_ns, args in events:
+            ev = {"ph": ph, "name": name, "cat": cat, "pid": self._pid, "tid": tid, "ts": start_ns / 1000.0}
+            if ph == 'X':
+                ev["dur"] = dur_ns / 1000.0
+            else:
+                ev["s"] = "t"
+            if args:
+                ev["args"] = args
+            out.append(ev)
+        return {"traceEvents": out, "displayTimeUnit": "ms"}
+
+    def dump(self, path: str):
+        """Écrit la trace JSON (chrome://tracing, ui.perfetto.dev)."""
+        with open(path, "w") as f:
+            json.dump(self.to_chrome(), f)
@@ -0,0 +1,225 @@
+"""
+Capture haute fréquence des sorties moteurs / servos (MSP_MOTOR, MSP_SERVO).
+
+La boucle de polling de INavDrone lit les sorties à `outputs_hz` (5 Hz par
+défaut), assez pour l'affichage mais pas pour diagnostiquer un ESC ou mesurer
+le temps de réponse d'un moteur. OutputCapture les interroge en continu, une
+requête derrière l'autre (MSP_MOTOR et MSP_SERVO envoyés d'un bloc quand les
+servos sont demandés), donc au débit maximal du lien, et range chaque
+échantillon dans des tableaux NumPy préalloués horodatés à la réception de la
+trame.
+
+Le verrou de transaction est relâché entre deux échantillons : la boucle de
+polling et l'envoi RC continuent pendant la capture (plus lentement).
+
+Exemple:
+    capture = OutputCapture(drone)
+    samples = capture.run(2.0)
+    print(f"{samples.rate_hz:.0f} Hz", samples.motors.max(axis=0))
+
+    python output_capture.py /dev/ttyACM0 --duration 2 --servos -o moteurs.npz
+"""
+
+import argparse
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from drone_logging import get_logger, setup_logging
+from inav_drone import INavDrone, MSPUnsupportedError, _is_link_error, decode_motor, decode_servo
+
+logger = get_logger()
+
+
+@dataclass
+class OutputSamples:
+    t: np.ndarray                   # s, horloge monotone (réception de la trame)
+    motors: np.ndarray              # (n, moteurs) uint16
+    servos: Optional[np.ndarray]    # (n, servos) uint16, None si non capturés
+    timeouts: int = 0
+
+    def __len__(self) -> int:
+        return len(self.t)
+
+    @property
+    def duration_s(self) -> float:
+        return float(self.t[-1] - self.t[0]) if len(self.t) > 1 else 0.0
+
+    @property
+    def rate_hz(self) -> float:
+        """Fréquence d'échantillonnage moyenne obtenue."""
+        return (len(self.t) - 1) / self.duration_s if self.duration_s > 0 else 0.0
+
+    def save(self, path: str):
+        arrays = {"t": self.t, "motors": self.motors}
+        if self.servos is not None:
+            arrays["servos"] = self.servos
+        np.savez(path, **arrays)
+
+
+class OutputCapture:
+    """Échantillonne MSP_MOTOR (et MSP_SERVO) aussi vite que le lien le permet."""
+
+    def __init__(self, drone: INavDrone, servos: bool = False, capacity: int = 100_000,
+                 max_hz: Optional[float] = None):
+        """
+        Args:
+            drone: INavDrone connecté
+            servos: Capturer aussi MSP_SERVO (une requête de plus par échantillon)
+            capacity: Nombre maximal d'échantillons (la capture s'arrête une fois plein)
+            max_hz: Fréquence maximale, None = débit maximal du lien
+        """
+        self.drone = drone
+        self.servos = servos
+        self.capacity = capacity
+        self.interval_ns = int(1e9 / max_hz) if max_hz else 0
+        self.timeouts = 0
+        self.error: Optional[Exception] = None  # erreur du port qui a arrêté la capture
+
+        self._t = np.zeros(capacity, dtype=np.float64)
+        self._motors: Optional[np.ndarray] = None  # alloués au premier échantillon (nombre de sorties)
+        self._servos: Optional[np.ndarray] = None
+        self._n = 0
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return self._n
+
+    # ------------- Thread -------------
+
+    def start(self):
+        cmds = [INavDrone.MSP_MOTOR] + ([INavDrone.MSP_SERVO] if self.servos else [])
+        for cmd in cmds:
+            if not self.drone.supports(cmd):
+                raise MSPUnsupportedError(f"Commande MSP {cmd} non supportée par le FC", cmd)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="inav-output-capture", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> OutputSamples:
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        return self.samples()
+
+    def run(self, duration_s: float) -> OutputSamples:
+        """Capture pendant duration_s (bloquant)."""
+        self.start()
+        time.sleep(duration_s)
+        return self.stop()
+
+    def samples(self) -> OutputSamples:
+        """Copie des échantillons capturés jusqu'ici."""
+        n = self._n
+        motors = self._motors[:n].copy() if self._motors is not None else np.zeros((0, 0), dtype=np.uint16)
+        servos = None
+        if self.servos:
+            servos = self._servos[:n].copy() if self._servos is not None else np.zeros((0, 0), dtype=np.uint16)
+        return OutputSamples(self._t[:n].copy(), motors, servos, self.timeouts)
+
+    # ------------- Échantillonnage -------------
+
+    def _run(self):
+        drone = self.drone
+        next_ns = time.perf_counter_ns()
+        while self._running:
+            if self._n >= self.capacity:
+                logger.warning("Capture des sorties pleine (%d échantillons)", self.capacity)
+                break
+            try:
+                if self.servos:
+                    sample = {}
+
+                    def on_reply(cmd: int, payload: Optional[bytes]) -> bool:
+                        if payload is not None:
+                            sample[cmd] = (payload, drone._last_rx_ns)
+                        return False
+
+                    drone._msp_request_many([INavDrone.MSP_MOTOR, INavDrone.MSP_SERVO], on_reply)
+                    if len(sample) < 2:
+                        self.timeouts += 1
+                        continue
+                    payload, t_ns = sample[INavDrone.MSP_MOTOR]
+                    servo_payload = sample[INavDrone.MSP_SERVO][0]
+                else:
+                    payload = drone._msp_request(INavDrone.MSP_MOTOR)
+                    t_ns, servo_payload = drone._last_rx_ns, None
+            except TimeoutError:
+                self.timeouts += 1
+                continue
+            except Exception as e:
+                if _is_link_error(e):
+                    drone.link_error = e
+                self.error = e
+                logger.error("Capture des sorties interrompue: %s", e)
+                break
+
+            self._append(t_ns, payload, servo_payload)
+            # Les valeurs courantes et les listeners de télémétrie suivent la capture
+            drone._handle_frame(INavDrone.MSP_MOTOR, payload, t_ns)
+            if servo_payload is not None:
+                drone._handle_frame(INavDrone.MSP_SERVO, servo_payload, t_ns)
+
+            if self.interval_ns:
+                next_ns += self.interval_ns
+                delay = next_ns - time.perf_counter_ns()
+                if delay > 0:
+                    time.sleep(delay / 1e9)
+                else:
+                    next_ns = time.perf_counter_ns()
+        self._running = False
+
+    def _append(self, t_ns: int, payload: bytes, servo_payload: Optional[bytes]):
+        motors = decode_motor(payload)
+        if motors is None:
+            return
+        servos = decode_servo(servo_payload) if servo_payload is not None else None
+        if self._motors is None:
+            self._motors = np.zeros((self.capacity, len(motors)), dtype=np.uint16)
+        if servos is not None and self._servos is None:
+            self._servos = np.zeros((self.capacity, len(servos)), dtype=np.uint16)
+
+        i = self._n
+        self._t[i] = t_ns / 1e9
+        width = self._motors.shape[1]
+        self._motors[i, :min(width, len(motors))] = motors[:width]
+        if servos is not None:
+            width = self._servos.shape[1]
+            self._servos[i, :min(width, len(servos))] = servos[:width]
+        self._n = i + 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Capture haute fréquence des sorties moteurs / servos")
+    parser.add_argument("port", help="Port série du FC (ex: /dev/ttyACM0)")
+    parser.add_argument("--baudrate", type=int, default=115200)
+    parser.add_argument("--duration", type=float, default=2.0, help="Durée de la capture (s)")
+    parser.add_argument("--servos", action="store_true", help="Capturer aussi MSP_SERVO")
+    parser.add_argument("--max-hz", type=float, default=None)
+    parser.add_argument("-o", "--output", help="Fichier .npz de sortie")
+    args = parser.parse_args()
+    setup_logging()
+
+    drone = INavDrone(args.port, baudrate=args.baudrate)
+    drone.connect()
+    try:
+        samples = OutputCapture(drone, servos=args.servos, max_hz=args.max_hz).run(args.duration)
+    finally:
+        drone.disconnect()
+
+    print(f"{len(samples)} échantillons en {samples.duration_s:.2f} s : {samples.rate_hz:.0f} Hz "
+          f"({samples.timeouts} timeouts)")
+    if len(samples):
+        print(f"moteurs min {samples.motors.min(axis=0).tolist()} max {samples.motors.max(axis=0).tolist()}")
+    if args.output:
+        samples.save(args.output)
+        print(f"écrit dans {args.output}")
+
+
+if __name__ == "__main__":
+    main()
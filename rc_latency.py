@@ -0,0 +1,155 @@
+"""
+Latence de bout en bout manche -> FC, mesurée par l'écho MSP_RC.
+
+Le banc bascule un canal AUX libre entre deux valeurs, horodate l'appel à
+set_rc_override(), puis interroge MSP_RC en continu (une requête derrière
+l'autre) jusqu'à ce que le FC renvoie la nouvelle valeur. Chaque mesure est
+décomposée en :
+
+- attente d'envoi : set_rc_override() -> trame MSP_SET_RAW_RC effectivement
+  écrite (jusqu'à une période de _rc_loop quand l'override est actif)
+- lien + FC : envoi -> premier écho MSP_RC portant la nouvelle valeur
+  (transmission, traitement RX du FC, résolution d'un RTT MSP_RC)
+
+⚠️ Le canal basculé ne doit être associé à aucun mode (onglet Modes) ; le banc
+refuse de tourner si le drone est armé.
+
+Exemple:
+    result = measure_rc_latency(drone, channel=8, samples=50)
+    print(result.summary())
+
+    python rc_latency.py /dev/ttyACM0 --rc-hz 0 20 50 --baud 115200 230400
+"""
+
+import argparse
+import random
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+from drone_logging import get_logger, setup_logging
+from inav_drone import INavDrone, decode_rc
+
+logger = get_logger()
+
+
+@dataclass
+class RCLatencyResult:
+    rc_hz: float                # fréquence de _rc_loop, 0 = envoi immédiat (override désactivé)
+    baudrate: int
+    latency_s: np.ndarray       # set_rc_override -> écho MSP_RC
+    send_delay_s: np.ndarray    # set_rc_override -> envoi MSP_SET_RAW_RC
+    polls: np.ndarray           # requêtes MSP_RC par mesure
+    timeouts: int = 0           # mesures sans écho dans le délai
+
+    @property
+    def link_s(self) -> np.ndarray:
+        """Envoi -> écho : transmission + traitement du FC."""
+        return self.latency_s - self.send_delay_s
+
+    def percentile(self, p: float) -> float:
+        return float(np.percentile(self.latency_s, p)) if len(self.latency_s) else float("nan")
+
+    def summary(self) -> str:
+        mode = f"{self.rc_hz:g} Hz" if self.rc_hz else "immédiat"
+        if not len(self.latency_s):
+            return f"{self.baudrate} bauds, RC {mode} : aucun écho ({self.timeouts} timeouts)"
+        ms = self.latency_s * 1000
+        return (f"{self.baudrate} bauds, RC {mode} : latence p50 {np.percentile(ms, 50):.1f} ms, "
+                f"p90 {np.percentile(ms, 90):.1f} ms, max {ms.max():.1f} ms "
+                f"(attente d'envoi {np.median(self.send_delay_s) * 1000:.1f} ms, "
+                f"lien + FC {np.median(self.link_s) * 1000:.1f} ms, "
+                f"{len(ms)} mesures, {self.timeouts} timeouts)")
+
+
+def measure_rc_latency(drone: INavDrone, channel: int = 8, samples: int = 50,
+                       values: tuple = (1000, 2000), timeout: float = 0.5,
+                       settle_s: float = 0.02) -> RCLatencyResult:
+    """
+    Bascule `channel` entre les deux `values` `samples` fois et mesure le
+    délai jusqu'à l'écho de chaque nouvelle valeur dans MSP_RC.
+
+    Entre deux mesures, une pause aléatoire d'une période RC au plus décorrèle
+    l'instant de la bascule de la phase de _rc_loop.
+    """
+    if drone.armed:
+        raise RuntimeError("Banc de latence RC refusé : drone armé")
+    rc_hz = 1.0 / drone.rc_update_interval if drone._rc_override_enabled else 0.0
+    jitter_s = drone.rc_update_interval if drone._rc_override_enabled else 0.0
+
+    latencies: List[float] = []
+    send_delays: List[float] = []
+    polls: List[int] = []
+    timeouts = 0
+    previous = drone._rc_channels_tx.get(channel, 1500)
+    try:
+        for k in range(samples):
+            target = values[k % 2]
+            if drone._rc_channels_tx.get(channel) == target:
+                target = values[(k + 1) % 2]
+            time.sleep(settle_s + random.uniform(0.0, jitter_s))
+
+            t0 = time.monotonic_ns()
+            drone.set_rc_override({channel: target})
+            deadline = t0 + int(timeout * 1e9)
+            sent_ns: Optional[int] = None
+            n = 0
+            while True:
+                if sent_ns is None and drone.rc_tx_t_ns >= t0:
+                    sent_ns = drone.rc_tx_t_ns
+                try:
+                    payload = drone._msp_request(INavDrone.MSP_RC)
+                    n += 1
+                except TimeoutError:
+                    payload = None
+                rx_ns = drone._last_rx_ns
+                if payload is not None:
+                    rc = decode_rc(payload)
+                    if rc is not None and abs(rc.get(channel, 0) - target) <= 5:
+                        if sent_ns is None:
+                            sent_ns = drone.rc_tx_t_ns
+                        latencies.append((rx_ns - t0) / 1e9)
+                        send_delays.append(max(0, sent_ns - t0) / 1e9)
+                        polls.append(n)
+                        break
+                if time.monotonic_ns() > deadline:
+                    timeouts += 1
+                    break
+    finally:
+        drone.set_rc_override({channel: previous})
+
+    return RCLatencyResult(rc_hz, drone.baudrate, np.array(latencies), np.array(send_delays),
+                           np.array(polls), timeouts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latence set_rc_override -> FC (écho MSP_RC)")
+    parser.add_argument("port", help="Port série du FC (ex: /dev/ttyACM0)")
+    parser.add_argument("--baud", type=int, nargs="+", default=[115200],
+                        help="Débits à tester (le port MSP du FC doit être configuré en conséquence ; "
+                             "sans effet sur un VCP USB)")
+    parser.add_argument("--rc-hz", type=float, nargs="+", default=[0, 20, 50],
+                        help="Fréquences de _rc_loop à tester, 0 = envoi immédiat sans override")
+    parser.add_argument("--channel", type=int, default=8, help="Canal AUX libre à basculer")
+    parser.add_argument("--samples", type=int, default=50)
+    args = parser.parse_args()
+    setup_logging()
+
+    results = []
+    for baud in args.baud:
+        for rc_hz in args.rc_hz:
+            drone = INavDrone(args.port, baudrate=baud, rc_update_hz=rc_hz or 50.0)
+            drone.connect()
+            try:
+                if rc_hz:
+                    drone.enable_rc_override()
+                results.append(measure_rc_latency(drone, args.channel, args.samples))
+            finally:
+                drone.disconnect()
+            print(results[-1].summary())
+
+
+if __name__ == "__main__":
+    main()
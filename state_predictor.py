@@ -0,0 +1,170 @@
+"""
+Prédiction de l'état courant du drone, compensée de la latence du lien.
+
+Quand le code utilisateur lit drone.gps ou drone.attitude, la valeur a déjà
+l'âge du cycle de polling plus le trajet FC -> Raspberry (typiquement 50 à
+150 ms). StatePredictor extrapole chaque flux jusqu'à « maintenant » :
+
+- âge d'un échantillon = (maintenant - réception de la trame)
+  + RTT lissé de la commande / 2 (l'état a été lu par le FC avant l'envoi de
+  la réponse) + retard propre de la source (gps_delay_s, fc_delay_s)
+- position : vitesse sol et route GPS
+- altitude estimée : vario
+- attitude : vitesses angulaires estimées sur les échantillons successifs
+  (lissage exponentiel)
+
+L'horizon d'extrapolation est borné par max_horizon_s : au-delà, une donnée
+trop vieille est extrapolée jusqu'à la borne seulement, et l'horizon retourné
+permet de la juger.
+
+Exemple:
+    predictor = StatePredictor()
+    predictor.attach(drone)
+    state = predictor.predict()
+    print(state.gps.lat, state.raw_gps.lat, state.horizon_s["gps"])
+"""
+
+import math
+import time
+from dataclasses import dataclass, field, replace
+from typing import Dict, Optional, Tuple
+
+from inav_drone import Attitude, AltitudeState, GPSState, INavDrone
+
+EARTH_RADIUS_M = 6371000.0
+
+
+@dataclass
+class PredictedState:
+    t: float                                # instant de la prédiction (s, horloge monotone)
+    attitude: Attitude                      # extrapolée
+    gps: GPSState                           # lat / lon / alt extrapolées
+    altitude: AltitudeState                 # estimated_alt extrapolée
+    raw_attitude: Attitude                  # valeurs reçues telles quelles
+    raw_gps: GPSState
+    raw_altitude: AltitudeState
+    rates: Attitude                         # vitesses angulaires estimées (deg/s)
+    horizon_s: Dict[str, float] = field(default_factory=dict)  # extrapolation appliquée par flux
+
+
+def _wrap180(angle: float) -> float:
+    """Écart angulaire ramené dans [-180, 180[ (plus court chemin)."""
+    return (angle + 180.0) % 360.0 - 180.0
+
+
+class StatePredictor:
+    """Extrapole attitude, position et altitude jusqu'à l'instant présent."""
+
+    def __init__(self, max_horizon_s: float = 0.5, gps_delay_s: float = 0.0, fc_delay_s: float = 0.0,
+                 rate_smoothing: float = 0.5, rate_timeout_s: float = 0.5):
+        """
+        Args:
+            max_horizon_s: Extrapolation maximale (s)
+            gps_delay_s: Retard propre du récepteur GPS, ajouté à l'âge de la position
+            fc_delay_s: Retard de l'estimateur du FC, ajouté à l'âge de tous les flux
+            rate_smoothing: Poids d'une nouvelle mesure dans le lissage des vitesses angulaires
+            rate_timeout_s: Écart maximal entre deux attitudes pour en déduire une vitesse
+        """
+        self.max_horizon_s = max_horizon_s
+        self.gps_delay_s = gps_delay_s
+        self.fc_delay_s = fc_delay_s
+        self.rate_smoothing = rate_smoothing
+        self.rate_timeout_s = rate_timeout_s
+
+        self.rates = Attitude()
+        self._prev_attitude: Optional[Tuple[int, Attitude]] = None
+        self._drone: Optional[INavDrone] = None
+
+    def attach(self, drone: INavDrone):
+        self._drone = drone
+        drone.add_telemetry_listener(self.on_telemetry)
+
+    def detach(self):
+        if self._drone is not None:
+            self._drone.remove_telemetry_listener(self.on_telemetry)
+            self._drone = None
+
+    def on_telemetry(self, cmd: int, value: object, t_ns: int):
+        """Listener INavDrone : met à jour les vitesses angulaires."""
+        if cmd != INavDrone.MSP_ATTITUDE:
+            return
+        prev = self._prev_attitude
+        self._prev_attitude = (t_ns, value)
+        if prev is None:
+            return
+        dt = (t_ns - prev[0]) / 1e9
+        if dt <= 0 or dt > self.rate_timeout_s:
+            self.rates = Attitude()
+            return
+        a = self.rate_smoothing
+        old = prev[1]
+        self.rates = Attitude(
+            roll=(1 - a) * self.rates.roll + a * (value.roll - old.roll) / dt,
+            pitch=(1 - a) * self.rates.pitch + a * (value.pitch - old.pitch) / dt,
+            yaw=(1 - a) * self.rates.yaw + a * _wrap180(value.yaw - old.yaw) / dt,
+        )
+
+    # ------------- Prédiction -------------
+
+    def age_s(self, cmd: int, now_ns: Optional[int] = None) -> Optional[float]:
+        """Âge estimé de la dernière valeur de cmd côté FC, None si jamais reçue."""
+        drone = self._drone
+        t_ns = drone.telemetry_t_ns.get(cmd)
+        if t_ns is None:
+            return None
+        if now_ns is None:
+            now_ns = time.monotonic_ns()
+        stats = drone.link_stats.commands.get(cmd)
+        srtt = stats.rto.srtt if stats is not None and stats.rto.srtt is not None else drone.link_stats.link_rto.srtt
+        return (now_ns - t_ns) / 1e9 + (srtt or 0.0) / 2 + self.fc_delay_s
+
+    def _horizon(self, cmd: int, now_ns: int, extra_s: float = 0.0) -> float:
+        age = self.age_s(cmd, now_ns)
+        return 0.0 if age is None else min(age + extra_s, self.max_horizon_s)
+
+    def predict(self, t: Optional[float] = None) -> PredictedState:
+        """
+        État extrapolé à l'instant t (horloge monotone, s ; maintenant par défaut).
+        """
+        if self._drone is None:
+            raise RuntimeError("StatePredictor non attaché à un drone")
+        drone = self._drone
+        now_ns = time.monotonic_ns() if t is None else int(t * 1e9)
+        attitude, gps, altitude, rates = drone.attitude, drone.gps, drone.altitude, self.rates
+
+        h_att = self._horizon(INavDrone.MSP_ATTITUDE, now_ns)
+        h_gps = self._horizon(INavDrone.MSP_RAW_GPS, now_ns, self.gps_delay_s)
+        h_alt = self._horizon(INavDrone.MSP_ALTITUDE, now_ns)
+
+        predicted_attitude = Attitude(
+            roll=attitude.roll + rates.roll * h_att,
+            pitch=attitude.pitch + rates.pitch * h_att,
+            yaw=(attitude.yaw + rates.yaw * h_att) % 360.0,  # même plage 0-360 que le cap brut
+        )
+
+        predicted_gps = gps
+        if gps.lat is not None and gps.lon is not None and gps.fix_type >= 2:
+            course = math.radians(gps.ground_course)
+            north = gps.speed * math.cos(course) * h_gps
+            east = gps.speed * math.sin(course) * h_gps
+            vario_ms = altitude.vario / 100.0
+            predicted_gps = replace(
+                gps,
+                lat=gps.lat + math.degrees(north / EARTH_RADIUS_M),
+                lon=gps.lon + math.degrees(east / (EARTH_RADIUS_M * max(math.cos(math.radians(gps.lat)), 1e-6))),
+                alt=gps.alt + vario_ms * h_gps if gps.alt is not None else None,
+            )
+
+        predicted_altitude = replace(altitude, estimated_alt=altitude.estimated_alt + altitude.vario / 100.0 * h_alt)
+
+        return PredictedState(
+            t=now_ns / 1e9,
+            attitude=predicted_attitude,
+            gps=predicted_gps,
+            altitude=predicted_altitude,
+            raw_attitude=attitude,
+            raw_gps=gps,
+            raw_altitude=altitude,
+            rates=rates,
+            horizon_s={"attitude": h_att, "gps": h_gps, "altitude": h_alt},
+        )
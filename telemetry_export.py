@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Export colonnaire de la télémétrie pour l'analyse après vol (NumPy).
+
+Pendant le vol, chaque flux (attitude, gps, altitude, battery, rc) est
+accumulé dans des colonnes typées préallouées. Quand un bloc de chunk_rows
+lignes est plein, il est écrit par un thread dédié dans un fichier .npz non
+compressé (une colonne = un tableau), puis renommé atomiquement :
+    <dossier>/attitude_00000.npz, attitude_00001.npz, ...
+
+Toutes les flush_interval_s secondes, le thread d'écriture écrit aussi les
+blocs partiels : un crash ne perd pas plus de cet intervalle de données,
+quel que soit le débit du flux.
+
+load_flight() recharge un vol complet en concaténant les chunks, sans aucun
+parsing texte.
+
+Usage (conversion d'un enregistrement MSP existant) :
+    python3 telemetry_export.py vol_001.msplog vol_001_npz/
+"""
+
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from drone_logging import RateLimitedLogger, get_logger
+from inav_drone import INavDrone
+
+logger = get_logger()
+
+RC_CHANNELS = 16
+MOTOR_OUTPUTS = 8
+SERVO_OUTPUTS = 16
+
+
+def _rc_row(rc: Dict[int, int]) -> Tuple:
+    return (tuple(rc.get(i, 0) for i in range(1, RC_CHANNELS + 1)),)
+
+
+def _outputs_row(values: List[int], width: int) -> Tuple:
+    return (tuple(values[:width]) + (0,) * (width - len(values)),)
+
+
+# cmd -> (nom du flux, colonnes (nom, dtype, forme), extraction des valeurs hors t_ns)
+STREAMS: Dict[int, Tuple[str, List[Tuple[str, str, Tuple[int, ...]]], Callable[[object], Tuple]]] = {
+    INavDrone.MSP_ATTITUDE: (
+        "attitude",
+        [("roll", "<f4", ()), ("pitch", "<f4", ()), ("yaw", "<f4", ())],
+        lambda v: (v.roll, v.pitch, v.yaw),
+    ),
+    INavDrone.MSP_RAW_GPS: (
+        "gps",
+        [("lat", "<f8", ()), ("lon", "<f8", ()), ("alt", "<f4", ()), ("speed", "<f4", ()),
+         ("ground_course", "<f4", ()), ("hdop", "<f4", ()), ("sats", "u1", ()), ("fix_type", "u1", ())],
+        lambda v: (v.lat, v.lon, v.alt, v.speed, v.ground_course, v.hdop, v.sats, v.fix_type),
+    ),
+    INavDrone.MSP_ALTITUDE: (
+        "altitude",
+        [("estimated_alt", "<f4", ()), ("vario", "<f4", ())],
+        lambda v: (v.estimated_alt, v.vario),
+    ),
+    INavDrone.MSP_ANALOG: (
+        "battery",
+        [("voltage", "<f4", ()), ("mah", "<f4", ())],
+        lambda v: (v.voltage, v.mah),
+    ),
+    INavDrone.MSP_RC: (
+        "rc",
+        [("channels", "<u2", (RC_CHANNELS,))],
+        _rc_row,
+    ),
+    INavDrone.MSP_MOTOR: (
+        "motors",
+        [("outputs", "<u2", (MOTOR_OUTPUTS,))],
+        lambda v: _outputs_row(v, MOTOR_OUTPUTS),
+    ),
+    INavDrone.MSP_SERVO: (
+        "servos",
+        [("outputs", "<u2", (SERVO_OUTPUTS,))],
+        lambda v: _outputs_row(v, SERVO_OUTPUTS),
+    ),
+}
+
+
+class _ColumnBlock:
+    """Bloc de colonnes préallouées pour un flux."""
+
+    def __init__(self, columns: List[Tuple[str, str, Tuple[int, ...]]], rows: int):
+        self.t_ns = np.zeros(rows, dtype="<i8")
+        self.columns = [np.zeros((rows,) + shape, dtype=dtype) for _, dtype, shape in columns]
+        self.names = [name for name, _, _ in columns]
+        self.n = 0
+
+    def as_dict(self) -> Dict[str, np.ndarray]:
+        out = {"t_ns": self.t_ns[:self.n]}
+        for name, col in zip(self.names, self.columns):
+            out[name] = col[:self.n]
+        return out
+
+
+class ColumnarExporter:
+    """
+    Écrit la télémétrie de INavDrone en chunks colonnaires pendant le vol.
+
+    Exemple:
+        exporter = ColumnarExporter("vol_001_npz")
+        exporter.attach(drone)
+        ...
+        exporter.close()
+    """
+
+    def __init__(self, directory: str, chunk_rows: int = 4096, max_pending_chunks: int = 32,
+                 drop_when_full: bool = True, flush_interval_s: Optional[float] = 5.0):
+        self.directory = directory
+        self.chunk_rows = chunk_rows
+        # Écriture des blocs partiels (None = seulement une fois pleins) ; chaque
+        # flush crée un fichier par flux, d'où un intervalle plus long que le recorder
+        self.flush_interval_s = flush_interval_s
+        # En vol on abandonne un chunk plutôt que de bloquer le thread de télémétrie
+        self.drop_when_full = drop_when_full
+        os.makedirs(directory, exist_ok=True)
+
+        self.rows_written = 0
+        self.chunks_written = 0
+        self.chunks_dropped = 0
+
+        self._blocks: Dict[int, _ColumnBlock] = {}
+        self._seq: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._drone: Optional[INavDrone] = None
+        self._closed = False
+        self._log = RateLimitedLogger(logger, window_s=10.0)
+
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=max_pending_chunks)
+        self._writer = threading.Thread(target=self._writer_loop, daemon=True)
+        self._writer.start()
+
+    # ------------- Branchement sur le drone -------------
+
+    def attach(self, drone: INavDrone):
+        """Commence à exporter la télémétrie décodée par drone."""
+        self._drone = drone
+        drone.add_telemetry_listener(self.on_telemetry)
+
+    def detach(self):
+        if self._drone is not None:
+            self._drone.remove_telemetry_listener(self.on_telemetry)
+            self._drone = None
+
+    # ------------- Chemin critique -------------
+
+    def on_telemetry(self, cmd: int, value: object, t_ns: int):
+        """Ajoute une ligne au bloc du flux (listener INavDrone)."""
+        stream = STREAMS.get(cmd)
+        if stream is None:
+            return
+        _, columns, extract = stream
+        values = extract(value)
+
+        with self._lock:
+            if self._closed:
+                return
+            block = self._blocks.get(cmd)
+            if block is None:
+                block = self._blocks[cmd] = _ColumnBlock(columns, self.chunk_rows)
+            i = block.n
+            block.t_ns[i] = t_ns
+            for col, v in zip(block.columns, values):
+                col[i] = v
+            block.n += 1
+
+            if block.n >= self.chunk_rows:
+                self._submit_locked(cmd)
+
+    def _submit_locked(self, cmd: int, block_put: bool = False):
+        block = self._blocks.pop(cmd, None)
+        if block is None or block.n == 0:
+            return
+        name = STREAMS[cmd][0]
+        seq = self._seq.get(name, 0)
+        self._seq[name] = seq + 1
+        try:
+            self._queue.put((name, seq, block.as_dict()), block=block_put or not self.drop_when_full)
+        except queue.Full:
+            self.chunks_dropped += 1
+
+    # ------------- Thread d'écriture -------------
+
+    def _writer_loop(self):
+        interval = self.flush_interval_s
+        next_flush = time.monotonic() + interval if interval else None
+        while True:
+            try:
+                timeout = None if next_flush is None else max(next_flush - time.monotonic(), 0.0)
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = ()
+            if next_flush is not None and time.monotonic() >= next_flush:
+                next_flush = time.monotonic() + interval
+                # Blocs partiels vers la file, sans attente : le thread d'écriture ne peut pas bloquer sur sa propre file
+                with self._lock:
+                    if not self._closed:
+                        for cmd in list(self._blocks):
+                            self._submit_locked(cmd, block_put=False)
+            if item is None:
+                break
+            if not item:
+                continue
+            name, seq, columns = item
+            path = os.path.join(self.directory, f"{name}_{seq:05d}.npz")
+            tmp = path + ".tmp"
+            try:
+                with open(tmp, "wb") as f:
+                    np.savez(f, **columns)
+                os.replace(tmp, path)
+                self.chunks_written += 1
+                self.rows_written += len(columns["t_ns"])
+            except Exception as e:
+                self._log.error(f"Export write {type(e).__name__}", "Écriture de l'export impossible: %s", e)
+            self._log.flush()
+
+    # ------------- Fermeture -------------
+
+    def flush(self):
+        """Écrit les blocs partiels de tous les flux."""
+        with self._lock:
+            for cmd in list(self._blocks):
+                self._submit_locked(cmd, block_put=True)
+
+    def close(self):
+        """Détache le drone, écrit les blocs restants et arrête le thread d'écriture."""
+        self.detach()
+        with self._lock:
+            if self._closed:
+                return
+            for cmd in list(self._blocks):
+                self._submit_locked(cmd, block_put=True)
+            self._closed = True
+        self._queue.put(None)
+        self._writer.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def load_stream(directory: str, name: str) -> Dict[str, np.ndarray]:
+    """Charge toutes les colonnes d'un flux (ex: "attitude") en concaténant ses chunks."""
+    files = sorted(f for f in os.listdir(directory) if f.startswith(name + "_") and f.endswith(".npz"))
+    parts: Dict[str, List[np.ndarray]] = {}
+    for fname in files:
+        with np.load(os.path.join(directory, fname)) as data:
+            for key in data.files:
+                parts.setdefault(key, []).append(data[key])
+    return {key: np.concatenate(arrays) for key, arrays in parts.items()}
+
+
+def load_flight(directory: str) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Charge un vol exporté : {flux: {colonne: tableau}}.
+
+    Exemple:
+        flight = load_flight("vol_001_npz")
+        t = (flight["attitude"]["t_ns"] - flight["attitude"]["t_ns"][0]) / 1e9
+        roll = flight["attitude"]["roll"]
+    """
+    flight = {}
+    for name, _, _ in STREAMS.values():
+        columns = load_stream(directory, name)
+        if columns:
+            flight[name] = columns
+    return flight
+
+
+def export_log(log_path: str, directory: str, chunk_rows: int = 4096) -> int:
+    """Convertit un enregistrement MSP (flight_recorder) en export colonnaire. Retourne le nb de lignes."""
+    from flight_log import FlightLogReader
+
+    with FlightLogReader(log_path) as log, ColumnarExporter(directory, chunk_rows, drop_when_full=False) as exporter:
+        for sample in log.telemetry():
+            exporter.on_telemetry(sample.cmd, sample.value, sample.t_ns)
+    return exporter.rows_written
+
+
+def main():
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+
+    rows = export_log(sys.argv[1], sys.argv[2])
+    print(f"✓ {rows} lignes exportées dans {sys.argv[2]}")
+
+
+if __name__ == "__main__":
+    main()
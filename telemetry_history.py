@@ -0,0 +1,331 @@
+"""
+Historique en mémoire de la télémétrie : un buffer circulaire NumPy par flux.
+
+INavDrone ne garde que la dernière valeur de chaque télémétrie. TelemetryHistory
+s'abonne à la télémétrie décodée et conserve les N dernières secondes de chaque
+flux dans des tableaux de taille fixe (mémoire bornée quelle que soit la durée
+du vol), avec des requêtes vectorisées sur une fenêtre temporelle.
+
+Exemple:
+    history = TelemetryHistory(seconds=60)
+    history.attach(drone)
+    ...
+    print(history.climb_rate(5.0))                  # m/s sur les 5 dernières s
+    print(history.attitude.stats(10.0)["roll"].std)  # écart-type du roulis
+    t, alt = history.altitude.resample(10.0, 30.0)   # 30 s rééchantillonnées à 10 Hz
+    state = history.state_at(t_photo)                # tous les flux alignés sur un instant
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from inav_drone import INavDrone
+
+
+@dataclass
+class FieldStats:
+    min: float
+    max: float
+    mean: float
+    std: float
+
+
+class RingBuffer:
+    """
+    Buffer circulaire horodaté de capacité fixe.
+
+    - append() en O(1) (écriture d'une ligne dans un tableau préalloué)
+    - les requêtes par temps utilisent searchsorted sur les horodatages,
+      qui sont croissants dans chacun des deux segments du buffer
+    - les temps sont en secondes, horloge monotone (time.monotonic)
+    - les champs d'angle (`angles` : champ -> borne basse de sa plage, -180
+      ou 0 degrés) sont interpolés par le plus court chemin et ramenés dans la
+      plage de la valeur brute
+    """
+
+    def __init__(self, capacity: int, fields: Sequence[str], angles: Optional[Dict[str, float]] = None):
+        self.capacity = capacity
+        self.fields = tuple(fields)
+        self._index = {name: i for i, name in enumerate(self.fields)}
+        angles = {name: low for name, low in (angles or {}).items() if name in self._index}
+        self._angles = np.array([self._index[name] for name in angles], dtype=np.intp)
+        self._angle_low = np.array(list(angles.values()), dtype=np.float64)
+        self._t = np.zeros(capacity, dtype=np.float64)
+        self._data = np.zeros((capacity, len(self.fields)), dtype=np.float64)
+        self._head = 0      # prochaine position d'écriture
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, t: float, values: Sequence[float]):
+        with self._lock:
+            self._t[self._head] = t
+            self._data[self._head] = values
+            self._head = (self._head + 1) % self.capacity
+            if self._count < self.capacity:
+                self._count += 1
+
+    def clear(self):
+        with self._lock:
+            self._head = 0
+            self._count = 0
+
+    # ------------- Accès interne (verrou pris) -------------
+
+    def _oldest(self) -> int:
+        return self._head if self._count == self.capacity else 0
+
+    def _search(self, t: float, side: str = 'left') -> int:
+        """
+        Index logique (0 = plus ancien) du premier échantillon avec horodatage
+        >= t (side='left') ou > t (side='right').
+        """
+        if self._count < self.capacity:
+            return int(np.searchsorted(self._t[:self._count], t, side=side))
+        older = self._t[self._head:]
+        if len(older) and (t <= older[-1] if side == 'left' else t < older[-1]):
+            return int(np.searchsorted(older, t, side=side))
+        return len(older) + int(np.searchsorted(self._t[:self._head], t, side=side))
+
+    def _slice(self, k0: int, k1: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Copie chronologique des échantillons logiques [k0, k1)."""
+        idx = (self._oldest() + np.arange(k0, k1)) % self.capacity
+        return self._t[idx], self._data[idx]
+
+    # ------------- Requêtes -------------
+
+    def latest(self) -> Optional[Tuple[float, np.ndarray]]:
+        """Dernier échantillon (t, valeurs) ou None si vide."""
+        with self._lock:
+            if self._count == 0:
+                return None
+            i = (self._head - 1) % self.capacity
+            return float(self._t[i]), self._data[i].copy()
+
+    def latest_before(self, t: float) -> Optional[Tuple[float, np.ndarray]]:
+        """Dernier échantillon reçu à ou avant t : (t_échantillon, valeurs), None s'il n'y en a pas."""
+        with self._lock:
+            k = self._search(t, side='right') - 1
+            if k < 0:
+                return None
+            i = (self._oldest() + k) % self.capacity
+            return float(self._t[i]), self._data[i].copy()
+
+    def at(self, t: float) -> Optional[np.ndarray]:
+        """
+        Valeurs interpolées à l'instant t entre les deux échantillons qui
+        l'encadrent ; après le dernier échantillon, sa valeur (pas
+        d'extrapolation). None si t précède le plus ancien échantillon.
+        """
+        values, valid = self.sample(np.array([t]))
+        return values[0] if valid[0] else None
+
+    def sample(self, times) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Interpolation vectorisée aux instants `times` (croissants ou non).
+
+        Seule la portion du buffer couvrant [min(times), max(times)] est copiée,
+        localisée par recherche binaire ; le coût ne dépend pas de la taille
+        de l'historique.
+
+        Returns:
+            (valeurs (n, n_fields), valide (n,)) ; les lignes non valides
+            (instants antérieurs au plus ancien échantillon) valent NaN.
+        """
+        times = np.asarray(times, dtype=np.float64)
+        out = np.full((len(times), len(self.fields)), np.nan)
+        valid = np.zeros(len(times), dtype=bool)
+        if len(times) == 0:
+            return out, valid
+        with self._lock:
+            if self._count == 0:
+                return out, valid
+            # Un échantillon de part et d'autre de l'intervalle demandé
+            k0 = max(0, self._search(float(times.min()), side='right') - 1)
+            k1 = min(self._count, self._search(float(times.max()), side='left') + 1)
+            t, data = self._slice(k0, max(k0 + 1, k1))
+
+        # j : dernier échantillon <= instant demandé
+        j = np.searchsorted(t, times, side='right') - 1
+        valid = j >= 0
+        j0 = np.clip(j, 0, len(t) - 1)
+        j1 = np.minimum(j0 + 1, len(t) - 1)
+        dt = t[j1] - t[j0]
+        a = np.where(dt > 0, (times - t[j0]) / np.where(dt > 0, dt, 1.0), 0.0)
+        a = np.clip(a, 0.0, 1.0)[:, None]
+        delta = data[j1] - data[j0]
+        if len(self._angles):
+            delta[:, self._angles] = (delta[:, self._angles] + 180.0) % 360.0 - 180.0
+        values = data[j0] + a * delta
+        if len(self._angles):
+            low = self._angle_low
+            values[:, self._angles] = (values[:, self._angles] - low) % 360.0 + low
+        out[valid] = values[valid]
+        return out, valid
+
+    def window(self, t0: float, t1: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Échantillons avec t0 <= t < t1 : (temps (n,), valeurs (n, n_fields))."""
+        with self._lock:
+            k0 = self._search(t0)
+            k1 = self._count if t1 is None else self._search(t1)
+            return self._slice(k0, max(k0, k1))
+
+    def last(self, seconds: float, now: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Échantillons des `seconds` dernières secondes."""
+        if now is None:
+            now = time.monotonic()
+        return self.window(now - seconds)
+
+    def column(self, name: str, seconds: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(temps, valeurs) d'un champ, sur tout le buffer ou les `seconds` dernières secondes."""
+        t, data = self.last(seconds) if seconds is not None else self.window(-np.inf)
+        return t, data[:, self._index[name]]
+
+    def stats(self, seconds: Optional[float] = None) -> Dict[str, FieldStats]:
+        """min / max / moyenne / écart-type de chaque champ sur la fenêtre."""
+        _, data = self.last(seconds) if seconds is not None else self.window(-np.inf)
+        if len(data) == 0:
+            return {}
+        mins, maxs = data.min(axis=0), data.max(axis=0)
+        means, stds = data.mean(axis=0), data.std(axis=0)
+        return {
+            name: FieldStats(float(mins[i]), float(maxs[i]), float(means[i]), float(stds[i]))
+            for i, name in enumerate(self.fields)
+        }
+
+    def resample(self, hz: float, seconds: float, now: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Interpolation linéaire des `seconds` dernières secondes sur une grille régulière à `hz`."""
+        t, data = self.last(seconds, now)
+        if len(t) < 2:
+            return t, data
+        grid = np.arange(t[0], t[-1], 1.0 / hz)
+        return grid, self.sample(grid)[0]
+
+
+# cmd -> (nom du flux, champs, extraction des valeurs)
+HISTORY_STREAMS: Dict[int, Tuple[str, Tuple[str, ...], Callable[[object], Sequence[float]]]] = {
+    INavDrone.MSP_ATTITUDE: (
+        "attitude", ("roll", "pitch", "yaw"),
+        lambda v: (v.roll, v.pitch, v.yaw),
+    ),
+    INavDrone.MSP_RAW_GPS: (
+        "gps", ("lat", "lon", "alt", "speed", "ground_course", "hdop", "sats", "fix_type"),
+        lambda v: (v.lat, v.lon, v.alt, v.speed, v.ground_course, v.hdop, v.sats, v.fix_type),
+    ),
+    INavDrone.MSP_ALTITUDE: (
+        "altitude", ("estimated_alt", "vario"),
+        lambda v: (v.estimated_alt, v.vario),
+    ),
+    INavDrone.MSP_ANALOG: (
+        "battery", ("voltage", "mah"),
+        lambda v: (v.voltage, v.mah),
+    ),
+    INavDrone.MSP_RC: (
+        "rc", tuple(f"ch{i}" for i in range(1, 9)),
+        lambda v: tuple(v.get(i, 0) for i in range(1, 9)),
+    ),
+    INavDrone.MSP_MOTOR: (
+        "motors", tuple(f"m{i}" for i in range(1, 9)),
+        lambda v: tuple(v[:8]) + (0,) * (8 - len(v)),
+    ),
+    INavDrone.MSP_SERVO: (
+        "servos", tuple(f"s{i}" for i in range(1, 9)),
+        lambda v: tuple(v[:8]) + (0,) * (8 - len(v)),
+    ),
+}
+
+
+# Champs en degrés, interpolés par le plus court chemin -> borne basse de leur plage :
+# cap (MSP_ATTITUDE) et route GPS (MSP_RAW_GPS), tous deux décodés en 0-360
+ANGLE_FIELDS = {"yaw": 0.0, "ground_course": 0.0}
+
+
+class TelemetryHistory:
+    """
+    Un RingBuffer par flux de télémétrie, alimenté par INavDrone.
+
+    La capacité de chaque buffer vaut seconds * max_rate_hz échantillons :
+    au-delà, les plus anciens sont écrasés.
+    """
+
+    def __init__(self, seconds: float = 60.0, max_rate_hz: float = 50.0):
+        capacity = max(2, int(seconds * max_rate_hz))
+        self.streams: Dict[int, RingBuffer] = {}
+        for cmd, (name, fields, _) in HISTORY_STREAMS.items():
+            buf = RingBuffer(capacity, fields, angles=ANGLE_FIELDS)
+            self.streams[cmd] = buf
+            setattr(self, name, buf)
+        self._drone: Optional[INavDrone] = None
+
+    def attach(self, drone: INavDrone):
+        self._drone = drone
+        drone.add_telemetry_listener(self.on_telemetry)
+
+    def detach(self):
+        if self._drone is not None:
+            self._drone.remove_telemetry_listener(self.on_telemetry)
+            self._drone = None
+
+    def on_telemetry(self, cmd: int, value: object, t_ns: int):
+        """Listener INavDrone : ajoute l'échantillon au buffer du flux."""
+        buf = self.streams.get(cmd)
+        if buf is not None:
+            buf.append(t_ns / 1e9, HISTORY_STREAMS[cmd][2](value))
+
+    # ------------- Alignement temporel -------------
+
+    def state_at(self, t: Optional[float] = None, interpolate: bool = True) -> Dict[str, Optional[Dict[str, float]]]:
+        """
+        État de chaque flux à l'instant t (horloge monotone, s ; maintenant par
+        défaut), les échantillons étant horodatés à la réception de leur trame.
+
+        Args:
+            interpolate: True = interpolation entre les échantillons encadrant t,
+                False = dernier échantillon reçu à ou avant t
+
+        Returns:
+            {nom du flux: {champ: valeur}}, None pour un flux sans échantillon avant t
+        """
+        if t is None:
+            t = time.monotonic()
+        state: Dict[str, Optional[Dict[str, float]]] = {}
+        for cmd, buf in self.streams.items():
+            if interpolate:
+                values = buf.at(t)
+            else:
+                found = buf.latest_before(t)
+                values = found[1] if found is not None else None
+            name = HISTORY_STREAMS[cmd][0]
+            state[name] = None if values is None else dict(zip(buf.fields, values.tolist()))
+        return state
+
+    def align(self, times, streams: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        Rééchantillonne plusieurs flux sur les mêmes instants : {nom: (n, n_fields)},
+        NaN avant le premier échantillon de chaque flux.
+        """
+        names = streams if streams is not None else [HISTORY_STREAMS[cmd][0] for cmd in self.streams]
+        return {name: getattr(self, name).sample(times)[0] for name in names}
+
+    # ------------- Requêtes dérivées -------------
+
+    def climb_rate(self, seconds: float = 5.0) -> Optional[float]:
+        """Taux de montée (m/s) : pente de l'altitude estimée par moindres carrés sur la fenêtre."""
+        t, alt = self.altitude.column("estimated_alt", seconds)
+        if len(t) < 2:
+            return None
+        slope, _ = np.polyfit(t - t[0], alt, 1)
+        return float(slope)
+
+    def attitude_variance(self, seconds: float = 5.0) -> Optional[Dict[str, float]]:
+        """Variance (deg²) de roll / pitch / yaw sur la fenêtre."""
+        stats = self.attitude.stats(seconds)
+        if not stats:
+            return None
+        return {name: s.std ** 2 for name, s in stats.items()}
@@ -1,183 +1,73 @@
 #!/usr/bin/env python3
 """
 Diagnostic complet pour comprendre pourquoi les moteurs ne tournent pas
+Les sorties moteurs (MSP_MOTOR) sont capturées au débit maximal du lien
+pendant chaque palier, au lieu d'une seule lecture après une attente
 """
 
-import serial
-import struct
+import sys
 import time
 
-def msp_send(ser, cmd, payload=b''):
-    """Envoie une commande MSP"""
-    length = len(payload)
-    header = b'$M<'
-    body = bytes([length, cmd]) + payload
-    checksum = 0
-    for b in body:
-        checksum ^= b
-    frame = header + body + bytes([checksum])
-    ser.write(frame)
-
-def msp_read(ser, expected_cmd, timeout=0.5):
-    """Lit une réponse MSP"""
-    ser.timeout = timeout
-    start_time = time.time()
-
-    while time.time() - start_time < timeout:
-        start = b''
-        while start != b'$M>':
-            ch = ser.read(1)
-            if not ch:
-                raise TimeoutError("Timeout header")
-            start = (start + ch)[-3:]
-
-        length_bytes = ser.read(1)
-        cmd_bytes = ser.read(1)
-        if len(length_bytes) < 1 or len(cmd_bytes) < 1:
-            continue
-
-        length = length_bytes[0]
-        cmd = cmd_bytes[0]
-        payload = ser.read(length)
-        checksum_rx = ser.read(1)
-
-        if len(payload) < length or len(checksum_rx) < 1:
-            continue
-
-        checksum_calc = 0
-        for b in (length_bytes + cmd_bytes + payload):
-            checksum_calc ^= b
-        if checksum_calc != checksum_rx[0]:
-            continue
-
-        if expected_cmd is None or cmd == expected_cmd:
-            return payload
-
-    raise TimeoutError(f"Timeout waiting for cmd {expected_cmd}")
-
-def read_motor_values(ser):
-    """Lit MSP_MOTOR (104) pour voir les valeurs envoyées aux moteurs"""
-    try:
-        msp_send(ser, 104)
-        payload = msp_read(ser, 104, timeout=0.5)
-
-        # Chaque moteur = 2 bytes (uint16)
-        num_motors = len(payload) // 2
-        motors = []
-        for i in range(num_motors):
-            motor_val = struct.unpack('<H', payload[i*2:(i+1)*2])[0]
-            motors.append(motor_val)
-        return motors
-    except Exception as e:
-        print(f"   Erreur lecture MSP_MOTOR: {e}")
-        return []
+from drone_logging import setup_logging
+from inav_drone import INavDrone
+from output_capture import OutputCapture
+
+setup_logging()
+
 
-def read_servo_values(ser):
-    """Lit MSP_SERVO (103) pour debug"""
-    try:
-        msp_send(ser, 103)
-        payload = msp_read(ser, 103, timeout=0.5)
-        num_servos = len(payload) // 2
-        servos = []
-        for i in range(num_servos):
-            servo_val = struct.unpack('<H', payload[i*2:(i+1)*2])[0]
-            servos.append(servo_val)
-        return servos
-    except Exception as e:
+def capture_motors(drone, duration_s=0.5):
+    """Capture MSP_MOTOR / MSP_SERVO et affiche min / moyenne / max par sortie"""
+    samples = OutputCapture(drone, servos=True).run(duration_s)
+    if not len(samples):
+        print("   Erreur: aucune réponse MSP_MOTOR")
         return []
+    n_motors = max(1, int((samples.motors.max(axis=0) > 0).sum()))
+    motors = samples.motors[:, :n_motors]
+    print(f"   {len(samples)} échantillons à {samples.rate_hz:.0f} Hz")
+    print(f"   Moteurs min:     {motors.min(axis=0).tolist()}")
+    print(f"   Moteurs moyenne: {[round(v) for v in motors.mean(axis=0)]}")
+    print(f"   Moteurs max:     {motors.max(axis=0).tolist()}")
+    if samples.servos is not None and len(samples.servos):
+        print(f"   Servos (dernier): {samples.servos[-1].tolist()}")
+    return [round(v) for v in motors.mean(axis=0)]
 
-def send_rc_channels(ser, channels):
-    """Envoie MSP_SET_RAW_RC (200)"""
-    values = [channels.get(i, 1500) for i in range(1, 9)]
-    payload = struct.pack('<HHHHHHHH', *values)
-    msp_send(ser, 200, payload)
-
-def check_armed(ser):
-    """Vérifie si armé"""
-    msp_send(ser, 101)
-    try:
-        payload = msp_read(ser, 101, timeout=0.3)
-        if len(payload) >= 11:
-            _, _, _, flags, _ = struct.unpack('<HHHIB', payload[:11])
-            armed = (flags & 0x01) != 0
-            return armed, flags
-    except:
-        pass
-    return False, 0
 
 print("=" * 60)
 print("🔍 DIAGNOSTIC MOTEURS")
 print("=" * 60)
 
+drone = None
 try:
     print("\n[1/6] Connexion...")
-    ser = serial.Serial('/dev/ttyACM0', 115200, timeout=0.5)
-    time.sleep(1.0)
+    drone = INavDrone("/dev/ttyACM0", baudrate=115200, rc_update_hz=50.0)
+    drone.connect(timeout=2.0)
     print("✓ Connecté")
 
     print("\n[2/6] Lecture valeurs moteurs AVANT armement...")
-    motors_before = read_motor_values(ser)
-    print(f"   Moteurs: {motors_before}")
+    motors_before = capture_motors(drone)
 
     print("\n[3/6] Configuration et armement...")
-    rc = {
-        1: 1500,
-        2: 1500,
-        3: 1000,  # Throttle idle
-        4: 1500,
-        5: 1000,  # ARM OFF
-    }
-
-    # Envoi RC pendant 2s
-    for _ in range(40):
-        send_rc_channels(ser, rc)
-        time.sleep(0.05)
-
-    # Armer
-    rc[5] = 2000
-    armed = False
-    for i in range(50):
-        send_rc_channels(ser, rc)
-        if i % 10 == 0:
-            armed, flags = check_armed(ser)
-            if armed:
-                print(f"   ✅ ARMÉ!")
-                break
-        time.sleep(0.05)
-
-    if not armed:
-        print("   ❌ Échec armement")
-        ser.close()
-        exit(1)
+    result = drone.arm()
+    if not result:
+        print(f"   ❌ Échec armement : {result.reason}")
+        drone.disconnect()
+        sys.exit(1)
+    print(f"   ✅ ARMÉ! ({result.latency_s * 1000:.0f} ms)")
 
     print("\n[4/6] Lecture valeurs moteurs APRÈS armement (throttle idle)...")
-    time.sleep(0.2)
-    motors_armed_idle = read_motor_values(ser)
-    print(f"   Moteurs: {motors_armed_idle}")
+    motors_armed_idle = capture_motors(drone)
 
     print("\n[5/6] Throttle à 1200 - Lecture valeurs moteurs...")
-    rc[3] = 1200
-
-    # Envoyer pendant 1 seconde
-    for i in range(20):
-        send_rc_channels(ser, rc)
-        time.sleep(0.05)
-
+    drone.set_rc_override({3: 1200})
     time.sleep(0.2)
-    motors_throttle = read_motor_values(ser)
-    print(f"   Moteurs: {motors_throttle}")
+    motors_throttle = capture_motors(drone, duration_s=1.0)
 
     # Retour idle
-    rc[3] = 1000
-    for _ in range(10):
-        send_rc_channels(ser, rc)
-        time.sleep(0.05)
+    drone.set_rc_override({3: 1000})
 
     print("\n[6/6] Désarmement...")
-    rc[5] = 1000
-    for _ in range(20):
-        send_rc_channels(ser, rc)
-        time.sleep(0.05)
+    drone.disarm()
+    drone.wait_armed(False, timeout=1.0)
 
     print("\n" + "=" * 60)
     print("📊 ANALYSE")
@@ -203,7 +93,7 @@ try:
         print("  → Ouvre iNAV Configurator")
         print("  → Onglet Motors : essaye de bouger les sliders")
         print("  → Si ça marche là, c'est un problème de throttle mapping")
-    elif all(m > 1000 for m in motors_throttle):
+    elif motors_throttle and all(m > 1000 for m in motors_throttle):
         print("\n✅ Les valeurs moteurs CHANGENT correctement!")
         print("\nSi les moteurs physiques ne tournent pas:")
         print("  1. ESCs pas alimentés (BEC 5V uniquement ne suffit pas)")
@@ -211,13 +101,15 @@ try:
         print("  3. Câblage moteurs/ESCs incorrect")
         print("  4. PWM protocole incompatible (essayez ONESHOT125)")
 
-    ser.close()
+    drone.disconnect()
 
 except Exception as e:
     print(f"\n❌ ERREUR: {e}")
     import traceback
     traceback.print_exc()
-    try:
-        ser.close()
-    except:
-        pass
+    if drone is not None:
+        try:
+            drone.emergency_stop()
+            drone.disconnect()
+        except Exception:
+            pass
@@ -3,11 +3,14 @@
 Test armement avec debug complet via MSP
 """
 
+from drone_logging import setup_logging
 from inav_drone import INavDrone
 import time
 import sys
 import struct
 
+setup_logging()
+
 def read_msp_status(drone):
     """Lit MSP_STATUS pour vérifier l'état et les flags"""
     try:
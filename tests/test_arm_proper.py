@@ -4,13 +4,15 @@ Test armement CORRECT selon documentation iNAV
 1. Interroge les box IDs (modes)
 2. Lit MSP_BOXNAMES pour identifier ARM
 3. Configure correctement les switches
-4. Tente l'armement
+4. Tente l'armement (séquence en boucle fermée de INavDrone.arm)
 """
 
+from drone_logging import setup_logging
 from inav_drone import INavDrone
 import time
 import sys
-import struct
+
+setup_logging()
 
 def read_msp_boxnames(drone):
     """Lit MSP_BOXNAMES (116) pour avoir les noms des modes"""
@@ -44,19 +46,6 @@ def read_msp_activeboxes(drone):
         print(f"   ❌ Erreur MSP_ACTIVEBOXES: {e}")
         return []
 
-def read_msp_status(drone):
-    """Lit MSP_STATUS"""
-    try:
-        payload = drone._msp_request(101, timeout=0.5)
-        if len(payload) >= 11:
-            cycle_time, i2c_errors, sensors, flags, config_profile = struct.unpack('<HHHIB', payload[:11])
-            armed = (flags & 0x01) != 0
-            return armed, flags
-        return False, 0
-    except Exception as e:
-        print(f"   ❌ Erreur MSP_STATUS: {e}")
-        return False, 0
-
 print("=" * 60)
 print("🎯 TEST ARMEMENT PROPER - Avec interrogation FC")
 print("=" * 60)
@@ -67,8 +56,7 @@ time.sleep(3)
 try:
     print("\n[1/8] Connexion...")
     drone = INavDrone("/dev/ttyACM0", baudrate=115200, rc_update_hz=50.0)
-    drone.connect()
-    time.sleep(1.5)
+    drone.connect(timeout=2.0)
     print("✓ Connecté")
 
     print("\n[2/8] Interrogation FC - Lecture box names...")
@@ -84,81 +72,59 @@ try:
 
     print("\n[3/8] État initial...")
     print(f"   Batterie: {drone.battery.voltage:.1f}V")
-    armed, flags = read_msp_status(drone)
-    print(f"   Armed: {armed}, Flags: 0x{flags:08x}")
+    state = drone.read_arming_state()
+    if state is None:
+        print("   ⚠️ Pas de réponse d'état du FC (MSP_STATUS)")
+    else:
+        print(f"   Armed: {state.armed}, Flags: 0x{state.raw:08x}")
+        for line in state.describe():
+            print(f"   ✗ {line}")
 
     active_before = read_msp_activeboxes(drone)
     print(f"   Boxes actifs: {active_before}")
 
-    print("\n[4/8] Activation RC override...")
-    drone.enable_rc_override()
-    time.sleep(1.0)
-    print("✓ RC override actif (50Hz)")
-
-    print("\n[5/8] Configuration canaux RC - Throttle IDLE...")
-    drone.set_rc_override({
-        1: 1500,  # Roll
-        2: 1500,  # Pitch
-        3: 1000,  # Throttle IDLE (CRITIQUE)
-        4: 1500,  # Yaw
-        5: 1000,  # ARM OFF
-        6: 1000,
-        7: 1000,
-        8: 1000
-    })
-    time.sleep(1.0)
-    print("✓ Canaux configurés")
-
-    # Vérifier que le FC les reçoit
-    print(f"\n   Vérification réception:")
-    print(f"   CH3 (Throttle): {drone.rc_channels.get(3, 0)} µs (doit être ~1000)")
-    print(f"   CH5 (ARM): {drone.rc_channels.get(5, 0)} µs (doit être ~1000)")
+    print("\n[4/8] Séquence d'armement (throttle idle, CH5 à 2000, suivi de l'état)...")
+    result = drone.arm()
+    armed = bool(result)
+    print(f"   Étape atteinte: {result.phase}, durée: {result.total_s * 1000:.0f} ms, "
+          f"{result.polls} requêtes d'état")
 
-    print("\n[6/8] 🔓 Armement - CH5 à 2000...")
-    drone.set_rc_override({5: 2000})
-    time.sleep(0.5)
+    # Vérifier que le FC reçoit les canaux
+    print(f"\n[5/8] Vérification réception:")
+    print(f"   CH3 (Throttle): {drone.rc_channels.get(3, 0)} µs (doit être ~1000)")
 
-    # Vérifier que CH5 change
+    print("\n[6/8] Vérification du switch ARM...")
+    if not armed and not result.blocking:
+        # arm() a remis CH5 en bas : le remonter le temps de lire les boxes actifs
+        drone.set_rc_override({5: 2000})
+        time.sleep(0.3)
     ch5_val = drone.rc_channels.get(5, 0)
     print(f"   CH5 reçu par FC: {ch5_val} µs")
-
-    if ch5_val < 1900:
-        print(f"   ⚠️  CH5 pas à 2000! Problème d'envoi MSP")
-
-    # Vérifier les boxes actifs
-    time.sleep(0.5)
     active_after = read_msp_activeboxes(drone)
-    print(f"   Boxes actifs après CH5=2000: {active_after}")
+    print(f"   Boxes actifs: {active_after}")
 
     if arm_box_id >= 0:
         if arm_box_id in active_after:
             print(f"   ✅ Box ARM (#{arm_box_id}) est ACTIF!")
-        else:
+        elif ch5_val >= 1900:
             print(f"   ❌ Box ARM (#{arm_box_id}) PAS actif malgré CH5=2000")
             print(f"      → Le mode ARM ne se déclenche pas avec CH5")
 
     print("\n[7/8] Vérification armement...")
-    armed = False
-    for i in range(5):
-        time.sleep(0.5)
-        armed, flags = read_msp_status(drone)
-
-        if armed:
-            print(f"\n   ✅ DRONE ARMÉ après {(i+1)*0.5:.1f}s!")
-            break
-        else:
-            print(f"   Tentative {i+1}/5: pas armé (flags=0x{flags:08x})")
-
     if armed:
+        print(f"\n   ✅ DRONE ARMÉ {result.latency_s * 1000:.0f} ms après le switch!")
         print("\n   Attente 1 seconde armé...")
         time.sleep(1.0)
+    else:
+        print(f"   Pas armé : {result.reason}")
 
     print("\n[8/8] 🔒 Désarmement...")
-    drone.set_rc_override({5: 1000})
-    time.sleep(0.5)
-
-    armed_after, flags_after = read_msp_status(drone)
-    print(f"   Armed: {armed_after}, Flags: 0x{flags_after:08x}")
+    drone.disarm()
+    state = drone.wait_armed(False, timeout=1.0) or drone.arming
+    if state is None:
+        print("   ⚠️ Pas de réponse d'état du FC (MSP_STATUS)")
+    else:
+        print(f"   Armed: {state.armed}, Flags: 0x{state.raw:08x}")
 
     print("\n" + "=" * 60)
     print("📊 DIAGNOSTIC FINAL")
@@ -170,7 +136,11 @@ try:
         print("\n❌ ÉCHEC: Le drone ne s'arme pas")
         print("\nDIAGNOSTIC:")
 
-        if ch5_val >= 1900:
+        if result.blocking:
+            print("  ❌ Armement bloqué par le FC :")
+            for line in result.state.describe():
+                print(f"     → {line}")
+        elif ch5_val >= 1900:
             print("  ✅ CH5 arrive bien à 2000 au FC")
         else:
             print(f"  ❌ CH5 ne change pas (reçu: {ch5_val})")
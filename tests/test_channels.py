@@ -3,9 +3,12 @@
 Test pour voir si le FC reçoit bien les changements de canaux RC
 """
 
+from drone_logging import setup_logging
 from inav_drone import INavDrone
 import time
 
+setup_logging()
+
 print("=" * 60)
 print("🔍 TEST LECTURE CANAUX RC")
 print("=" * 60)
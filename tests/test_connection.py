@@ -4,10 +4,12 @@ Script de test de connexion MSP - SANS armement ni contrôle moteurs
 Vérifie simplement que la communication MSP fonctionne et affiche la télémétrie.
 """
 
+from drone_logging import setup_logging
 from inav_drone import INavDrone
-import time
 import sys
 
+setup_logging()
+
 def main():
     print("=" * 60)
     print("TEST DE CONNEXION MSP - Lecture seule")
@@ -19,7 +21,7 @@ def main():
     print("[1/4] Connexion au port série /dev/ttyAMA0 @ 115200 bauds...")
     try:
         drone = INavDrone("/dev/ttyAMA0", baudrate=115200)
-        drone.connect()
+        snapshot_ok = drone.connect(timeout=3.0)
         print("✓ Port série ouvert avec succès\n")
     except Exception as e:
         print(f"✗ ERREUR de connexion: {e}")
@@ -29,9 +31,15 @@ def main():
         print("  - L'activation UART : sudo raspi-config")
         sys.exit(1)
 
-    # Attente de la télémétrie
-    print("[2/4] Attente de la télémétrie MSP (3 secondes)...")
-    time.sleep(3.0)
+    # Télémétrie : connect() attend le premier instantané complet (3 s max)
+    print("[2/4] Premier instantané de télémétrie MSP...")
+    if snapshot_ok:
+        print(f"✓ Reçu en {drone.first_snapshot_s * 1000:.0f} ms\n")
+    else:
+        print("⚠️  Instantané incomplet après 3 s (certaines valeurs peuvent manquer)\n")
+    caps = drone.capabilities
+    if caps is not None:
+        print(f"   FC : {caps.fc_variant} {caps.fc_version} (API {caps.api_version}, carte {caps.board_id})\n")
 
     # Lecture et affichage de la télémétrie
     print("[3/4] Lecture de la télémétrie...\n")
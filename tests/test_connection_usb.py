@@ -4,10 +4,13 @@ Script de test de connexion MSP via USB - SANS armement ni contrôle moteurs
 Vérifie simplement que la communication MSP fonctionne et affiche la télémétrie.
 """
 
+from drone_logging import setup_logging
 from inav_drone import INavDrone
 import time
 import sys
 
+setup_logging()
+
 def main():
     print("=" * 60)
     print("TEST DE CONNEXION MSP via USB - Lecture seule")
@@ -4,23 +4,12 @@ Test armement DIRECT via MSP_SET_MODE
 Au lieu de simuler un switch RC, on envoie directement la commande ARM
 """
 
+from drone_logging import setup_logging
 from inav_drone import INavDrone
 import time
 import sys
-import struct
 
-def read_msp_status(drone):
-    """Lit MSP_STATUS"""
-    try:
-        payload = drone._msp_request(101, timeout=0.5)
-        if len(payload) >= 11:
-            cycle_time, i2c_errors, sensors, flags, config_profile = struct.unpack('<HHHIB', payload[:11])
-            armed = (flags & 0x01) != 0
-            return armed, flags
-        return False, 0
-    except Exception as e:
-        print(f"   Erreur MSP_STATUS: {e}")
-        return False, 0
+setup_logging()
 
 def send_msp_arm_command(drone, arm: bool):
     """
@@ -49,13 +38,14 @@ time.sleep(3)
 try:
     print("\n[1/6] Connexion...")
     drone = INavDrone("/dev/ttyACM0", baudrate=115200, rc_update_hz=50.0)
-    drone.connect()
-    time.sleep(1.0)
+    drone.connect(timeout=2.0)
     print("✓ Connecté")
 
     print("\n[2/6] État initial...")
-    armed, flags = read_msp_status(drone)
-    print(f"   Armed: {armed}, Flags: 0x{flags:08x}")
+    state = drone.read_arming_state()
+    print(f"   Armed: {state.armed}, Flags: 0x{state.raw:08x}")
+    for line in state.describe():
+        print(f"   ✗ {line}")
 
     print("\n[3/6] Activation RC override...")
     drone.enable_rc_override()
@@ -76,17 +66,16 @@ try:
     print("\n[5/6] 🔓 Envoi commande MSP_ARM directe...")
     send_msp_arm_command(drone, arm=True)
 
-    # Vérifier plusieurs fois
-    armed = False
-    for i in range(5):
-        time.sleep(0.5)
-        armed, flags = read_msp_status(drone)
-
-        if armed:
-            print(f"\n   ✅ ARMÉ après {(i+1)*0.5:.1f}s!")
-            break
-        else:
-            print(f"   Tentative {i+1}/5: pas armé (flags=0x{flags:08x})")
+    t0 = time.perf_counter()
+    state = drone.wait_armed(timeout=2.5)
+    armed = state is not None
+    if armed:
+        print(f"\n   ✅ ARMÉ après {(time.perf_counter() - t0) * 1000:.0f} ms!")
+    else:
+        state = drone.arming
+        print(f"   Pas armé après 2.5s (flags=0x{state.raw:08x})")
+        for line in state.describe():
+            print(f"   ✗ {line}")
 
     if armed:
         print("\n   Attente 1 seconde armé...")
@@ -94,10 +83,7 @@ try:
 
     print("\n[6/6] 🔒 Désarmement...")
     send_msp_arm_command(drone, arm=False)
-    time.sleep(0.5)
-
-    armed, flags = read_msp_status(drone)
-    print(f"   Armed: {armed}, Flags: 0x{flags:08x}")
+    print(f"   Désarmé: {drone.wait_armed(False, timeout=0.5) is not None}")
 
     print("\n" + "=" * 60)
     print("📊 RÉSULTAT")
@@ -4,11 +4,14 @@ Test moteurs avec vérification complète de l'état d'armement via MSP
 ⚠️ HÉLICES RETIRÉES OBLIGATOIRE ⚠️
 """
 
+from drone_logging import setup_logging
 from inav_drone import INavDrone
 import time
 import sys
 import struct
 
+setup_logging()
+
 def read_msp_status(drone):
     """Lit MSP_STATUS pour vérifier l'état d'armement"""
     try:
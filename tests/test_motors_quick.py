@@ -4,10 +4,13 @@ Test moteurs rapide : 1200µs pendant 1 seconde
 ⚠️ HÉLICES RETIRÉES OBLIGATOIRE ⚠️
 """
 
+from drone_logging import setup_logging
 from inav_drone import INavDrone
 import time
 import sys
 
+setup_logging()
+
 print("=" * 60)
 print("⚠️  TEST MOTEURS - 1200µs pendant 1s")
 print("=" * 60)
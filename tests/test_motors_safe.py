@@ -4,9 +4,14 @@ Test moteurs ULTRA-SAFE : Fait tourner les moteurs très doucement pendant 1s
 ⚠️ HÉLICES RETIRÉES OBLIGATOIRE ⚠️
 """
 
-from inav_drone import INavDrone
-import time
 import sys
+import time
+
+from drone_logging import setup_logging
+from inav_drone import INavDrone
+from motor_test import MotorTestRunner, Step, ThrottleProfile, summarize
+
+setup_logging()
 
 print("=" * 60)
 print("⚠️  TEST MOTEURS - TRÈS FAIBLE PUISSANCE")
@@ -15,65 +20,38 @@ print("\n🔴 VÉRIFICATIONS FINALES :")
 print("   ✓ Hélices retirées ?")
 print("   ✓ Drone sécurisé ?")
 print("   ✓ Prêt à débrancher batterie si besoin ?\n")
-
-print("Démarrage dans 3 secondes...")
+print("\nDémarrage dans 3 secondes...")
 time.sleep(3)
 
+drone = None
 try:
-    print("\n[1/6] Connexion au drone...")
+    print("\n[1/3] Connexion...")
     drone = INavDrone("/dev/ttyACM0", baudrate=115200, rc_update_hz=50.0)
-    drone.connect()
-    print("✓ Connecté\n")
-
-    print("[2/6] Activation du RC override...")
-    drone.enable_rc_override()
-    time.sleep(1.0)
-    print("✓ RC override actif\n")
+    drone.connect(timeout=2.0)
+    print("✓ Connecté")
 
-    print("[3/6] Vérification de la télémétrie...")
-    time.sleep(1.0)
+    print("\n[2/3] 🚀 Armement puis profil de gaz...")
+    print("   1100µs pendant 1 seconde (très faible puissance, juste pour vérifier)")
     print(f"   Batterie : {drone.battery.voltage:.1f}V")
-    print(f"   Prêt à armer : {drone.is_ready_to_arm()}\n")
-
-    if not drone.is_ready_to_arm():
-        print("❌ Drone pas prêt à armer!")
+    if drone.battery.voltage < 10.0:
+        print("❌ Batterie trop faible!")
         drone.disconnect()
         sys.exit(1)
+    profile = ThrottleProfile([
+        Step(1100, 1.0),   # 100µs au-dessus de l'idle
+        Step(1000, 0.5),
+    ], start=1000)
 
-    print("[4/6] Armement du drone...")
-    print("   Throttle à 1000 (idle)")
-    drone.set_rc_override({
-        3: 1000,  # Throttle à idle
-        5: 2000   # ARM
-    })
-    time.sleep(2.0)  # Attendre que l'armement soit effectif
-    print("✓ Armé\n")
-
-    print("[5/6] ⚡ ACTIVATION MOTEURS - 1100µs pendant 1 seconde...")
-    print("   (Très faible puissance, juste pour vérifier)")
-
-    # Throttle très bas : 1100µs (100µs au-dessus de l'idle)
-    drone.set_rc_override({
-        3: 1100,  # Throttle très faible
-        5: 2000   # ARM toujours actif
-    })
-
-    # Attendre 1 seconde
-    time.sleep(1.0)
+    # Arme, suit le profil sur échéances absolues, revient au ralenti et désarme
+    result = MotorTestRunner(drone).run(profile)
 
-    print("✓ Test terminé\n")
+    print("\n[3/3] Résultat...")
+    for line in summarize(result):
+        print(f"   {line}")
+    print("✓ Désarmé")
 
-    print("[6/6] Désarmement...")
-    # Retour à idle puis désarmement
-    drone.set_rc_override({
-        3: 1000,  # Throttle à idle
-        5: 1000   # DISARM
-    })
-    time.sleep(1.0)
-    print("✓ Désarmé\n")
-
-    print("=" * 60)
-    print("✅ TEST RÉUSSI !")
+    print("\n" + "=" * 60)
+    print("✅ TEST TERMINÉ")
     print("=" * 60)
     print("\nLes moteurs ont-ils tourné ?")
     print("Si oui, la communication MSP fonctionne parfaitement !\n")
@@ -81,22 +59,20 @@ try:
     drone.disconnect()
 
 except KeyboardInterrupt:
-    print("\n\n⚠️  INTERRUPTION! Désarmement d'urgence...")
-    try:
+    print("\n\n⚠️  ARRÊT D'URGENCE!")
+    if drone is not None:
         drone.emergency_stop()
         drone.disconnect()
-    except:
-        pass
-    print("Débranchez la batterie si nécessaire!\n")
     sys.exit(1)
 
 except Exception as e:
     print(f"\n❌ ERREUR: {e}")
-    print("\nDésarmement d'urgence...")
-    try:
-        drone.emergency_stop()
-        drone.disconnect()
-    except:
-        pass
-    print("Débranchez la batterie si nécessaire!\n")
+    import traceback
+    traceback.print_exc()
+    if drone is not None:
+        try:
+            drone.emergency_stop()
+            drone.disconnect()
+        except Exception:
+            pass
     sys.exit(1)
@@ -4,10 +4,13 @@ Test moteurs v2 : Throttle progressif pour initialiser les ESCs
 ⚠️ HÉLICES RETIRÉES OBLIGATOIRE ⚠️
 """
 
+from drone_logging import setup_logging
 from inav_drone import INavDrone
 import time
 import sys
 
+setup_logging()
+
 print("=" * 60)
 print("⚠️  TEST MOTEURS V2 - Throttle progressif")
 print("=" * 60)